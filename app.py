@@ -4,7 +4,12 @@ from flask import Flask, request, jsonify, make_response
 from os import environ
 import dataset
 from binascii import hexlify
-from miner_config import BLOCKCHAIN_DB_URL
+from miner_config import BLOCKCHAIN_DB_URL, KEY_SCHEDULE_AHEAD
+from blockchain.key_schedule import KeySchedule, pub_key_record, pub_key_from_record
+from blockchain.release import ReleaseEngine
+from blockchain.block import MERKLE_BODY_VERSION
+from blockchain.merkle import MerkleTree
+from blockchain.transaction import Tx
 from crypto.tx_sign import validate_signature
 from dotenv import load_dotenv
 # load env var from .env
@@ -17,6 +22,8 @@ discarded and your transaction goes back as if it was never
 processed"""
 NODE_PENDING_TRANSACTIONS = []
 db = dataset.connect(BLOCKCHAIN_DB_URL)
+key_schedule = KeySchedule(db, ahead=KEY_SCHEDULE_AHEAD)
+release_engine = ReleaseEngine(db)
 
 
 def hexlify_block(db_block: dict):
@@ -25,6 +32,8 @@ def hexlify_block(db_block: dict):
     if db_block['prev_block_hash']:
         db_block['prev_block_hash'] = hexlify(db_block['prev_block_hash']).decode('ascii')
     db_block['header_hash'] = hexlify(db_block['header_hash']).decode('ascii')
+    if db_block.get('merkle_root'):
+        db_block['merkle_root'] = hexlify(db_block['merkle_root']).decode('ascii')
     return db_block
 
 
@@ -33,6 +42,19 @@ def index():
     return "<h1>NexToken Time Release Blockchain System</h1>"
 
 
+def block_range(start: int = None, end: int = None) -> list[dict]:
+    """Get the hexlified block records with heights in [start, end), the full chain by default."""
+    if start is None:
+        # index is not valid return empty chain
+        start = 0
+    if end is None:
+        end = len(db['blockchain'])
+    if start >= end:
+        return []
+    # Note: height = block_id - 1
+    return [hexlify_block(block) for block in db['blockchain'].find(id={'between': [start+1, end]})]
+
+
 @node.route('/blocks', methods=['GET'])
 def get_blocks():
     """
@@ -48,29 +70,32 @@ def get_blocks():
     """
 
     args = request.args
-    start = args.get("start", type=int)
-    end = args.get("end", type=int)
     # Converts our blocks into dictionaries so we can send them as json objects later
-    chain_to_send = []
-    if start is None:
-        # index is not valid return empty chain
-        start = 0
-    if end is None:
-        end = len(db['blockchain'])
-    if start < end:
-        for block in db['blockchain'].find(id={'between': [start+1, end]}):
-            # Note: height = block_id - 1
-            chain_to_send.append(hexlify_block(block))
-            # recover all Tx objects from db
-            tx_id_str = block['transactions']
-            if tx_id_str is not None:
-                tx_ids = [int(tx_id) for tx_id in tx_id_str.split(',')]
-                db_txs = [db_tx for db_tx in db['transactions'].find(id=tx_ids)]
-                block['transactions'] = db_txs
+    chain_to_send = block_range(args.get("start", type=int), args.get("end", type=int))
+    for block in chain_to_send:
+        # recover all Tx objects from db
+        tx_id_str = block['transactions']
+        if tx_id_str is not None:
+            tx_ids = [int(tx_id) for tx_id in tx_id_str.split(',')]
+            db_txs = [db_tx for db_tx in db['transactions'].find(id=tx_ids)]
+            block['transactions'] = db_txs
     return jsonify(chain_to_send)
     # Send our chain to whomever requested it
 
 
+@node.route('/headers', methods=['GET'])
+def get_headers():
+    """
+    Get block headers with 'start' and 'end' height index like /blocks, but without the transactions, so that a peer
+    can validate the headers of a chain before downloading the blocks.
+
+    Returns:
+        block headers in json format
+    """
+    args = request.args
+    return jsonify(block_range(args.get("start", type=int), args.get("end", type=int)))
+
+
 @node.route('/last', methods=['GET'])
 def get_last_block():
     last_block_idx = len(db['blockchain'])
@@ -82,6 +107,80 @@ def get_last_block():
         return jsonify(last_block)
 
 
+@node.route('/pubkeys', methods=['GET'])
+def get_pubkeys():
+    """
+    Get the scheduled public keys of future blocks with 'from' and 'to' height index.
+    Note: the upper limit index is exclusive and lower one is inclusive.
+    if 'to' index is not provided, only the key of height 'from' is sent.
+    If none of the keys is scheduled yet, the nearest scheduled key below 'from' is sent as a checkpoint, so that the
+    client only derives the keys between the checkpoint and the requested height.
+
+    Returns:
+        public keys in json format
+    """
+    args = request.args
+    start = args.get("from", type=int)
+    if start is None:
+        return make_response("Missing 'from' height\n", 400)
+    end = args.get("to", default=start + 1, type=int)
+    keys = key_schedule.range(start, min(end, start + KEY_SCHEDULE_AHEAD))
+    if not keys:
+        checkpoint = key_schedule.nearest(start)
+        if checkpoint:
+            keys = [pub_key_record(checkpoint["height"], pub_key_from_record(checkpoint), checkpoint["version"])]
+    return jsonify(keys)
+
+
+@node.route('/released', methods=['GET'])
+def get_released():
+    """
+    Get the messages released by the block with 'height' index, which are decrypted by the node once the block is
+    sealed. A message is null with an error if its cipher cannot be decrypted by the private key of the block.
+
+    Returns:
+        released messages in json format
+    """
+    height = request.args.get("height", type=int)
+    if height is None:
+        return make_response("Missing 'height'\n", 400)
+    return jsonify(release_engine.get(height))
+
+
+@node.route('/proof', methods=['GET'])
+def get_proof():
+    """
+    Get the inclusion proof of the transaction with 'tx' id, so that a light wallet can check the transaction against
+    the Merkle root of its block without fetching the block. The proof is the list of sibling hashes from the leaf to
+    the root with the side of every sibling, see blockchain.merkle.verify_proof.
+
+    Returns:
+        inclusion proof in json format
+    """
+    tx_id = request.args.get("tx", type=int)
+    if tx_id is None:
+        return make_response("Missing 'tx' id\n", 400)
+    db_tx = db['transactions'].find_one(id=tx_id)
+    if db_tx is None:
+        return make_response(f"Unknown transaction {tx_id}\n", 404)
+    db_block = db['blockchain'].find_one(height=db_tx['block_height'])
+    if db_block is None or (db_block.get('version') or 1) < MERKLE_BODY_VERSION:
+        return make_response(f"The block of transaction {tx_id} does not commit a Merkle root\n", 404)
+    # the leaves are in the order of the transactions of the block
+    tx_ids = [int(block_tx_id) for block_tx_id in db_block['transactions'].split(',')]
+    db_txs = {block_tx['id']: block_tx for block_tx in db['transactions'].find(id=tx_ids)}
+    tree = MerkleTree([Tx.from_dict(db_txs[block_tx_id]).encode() for block_tx_id in tx_ids])
+    index = tx_ids.index(tx_id)
+    return jsonify({
+        "tx": tx_id,
+        "height": db_block['height'],
+        "index": index,
+        "leaf": Tx.from_dict(db_tx).encode().decode('utf-8'),
+        "merkle_root": hexlify(tree.root).decode('ascii'),
+        "proof": [{"side": side, "hash": hexlify(sibling).decode('ascii')} for side, sibling in tree.proof(index)]
+    })
+
+
 @node.route('/logs', methods=['GET'])
 def get_logs():
     logs = []
@@ -177,5 +276,6 @@ if __name__ == '__main__':
     # wait 5 sec until the server fully setup
     time.sleep(5)
     miner.welcome_msg()
-    p2 = Process(target=miner.mine, args=(miner.retrieve_chain_from_db(db), [], db, True))
+    p2 = Process(target=miner.mine, args=(miner.retrieve_chain_from_db(db), [], db, True),
+                 kwargs={"miner_class": miner.get_miner_class()})
     p2.run()
@@ -0,0 +1,43 @@
+"""
+Benchmark of the arithmetic backends.
+
+Time the modular exponentiation and the public key generation with every available backend, e.g.
+    python -m bench.backend_bench 2000
+"""
+import random
+import sys
+import time
+import crypto.elgamal as elgamal
+from crypto import backend
+
+
+def bench_powmod(bit_length: int, rounds: int) -> float:
+    """Average time of one modular exponentiation in microseconds."""
+    rng = random.Random(bit_length)
+    args = [(rng.getrandbits(bit_length), rng.getrandbits(bit_length), rng.getrandbits(bit_length) | 1)
+            for _ in range(rounds)]
+    init_time = time.time()
+    for base, exp, modulus in args:
+        backend.powmod(base, exp, modulus)
+    return (time.time() - init_time) / rounds * 1e6
+
+
+def bench_pub_key(bit_length: int, keys: int) -> float:
+    """Average time of generating one public key of the chain in milliseconds."""
+    pub = elgamal.generate_pub_key(0xffffffffffff, bit_length)
+    init_time = time.time()
+    for _ in range(keys):
+        pub = elgamal.generate_pub_key(int(pub.p + pub.g + pub.h), bit_length)
+    return (time.time() - init_time) / keys * 1e3
+
+
+if __name__ == '__main__':
+    test_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    default_backend = backend.BACKEND
+    for name in backend.available_backends():
+        backend.set_backend(name)
+        for test_bits in (32, 64, 256, 1024):
+            print(f"{name:>6} {test_bits:>5} bits: powmod {bench_powmod(test_bits, test_rounds):9.2f} us")
+        for test_bits in (32, 64, 128):
+            print(f"{name:>6} {test_bits:>5} bits: pub key {bench_pub_key(test_bits, 5):9.2f} ms")
+    backend.set_backend(default_backend)
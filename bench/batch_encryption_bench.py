@@ -0,0 +1,39 @@
+"""
+Benchmark of the batch encryption to one public key.
+
+Encrypt many messages to the same key one by one with powmod of every backend, then by the batch encryptor with the
+fixed base tables of g and h and optionally a process pool, and report the messages per second, e.g.
+    python -m bench.batch_encryption_bench 256 1000 4
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from crypto import backend
+
+
+def bench(func, count: int) -> float:
+    """Messages per second of the function."""
+    init_time = time.time()
+    func()
+    return count / (time.time() - init_time)
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    test_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    test_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=test_bits)
+    messages = [f"time release message number {i} " * 4 for i in range(test_count)]
+    print(f"{test_bits}-bit key, {test_count} messages of {len(messages[0])} chars, messages/s")
+    for name in backend.available_backends():
+        backend.set_backend(name)
+        single = bench(lambda: [elgamal.encrypt(pub, message, compact=True) for message in messages], test_count)
+        init_time = time.time()
+        elgamal.FixedBaseExp(pub.g, pub.p)
+        table_time = time.time() - init_time
+        batch = bench(lambda: elgamal.encrypt_batch(pub, messages, compact=True), test_count)
+        line = f"{name:>7}: single {single:9.1f}, batch {batch:9.1f}"
+        if test_workers > 1:
+            pool = bench(lambda: elgamal.encrypt_batch(pub, messages, workers=test_workers, compact=True), test_count)
+            line += f", batch with {test_workers} workers {pool:9.1f}"
+        print(line + f", table build {table_time * 1000:.1f} ms per base")
@@ -0,0 +1,39 @@
+"""
+Benchmark of the vectorized batch miner against the scalar miners.
+
+Mine the same chain of public keys and report the steps per second of every miner, e.g.
+    python -m bench.batch_mining_bench 32 5
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.transaction import Tx
+from mining.pollard_rho_hash import SimplePRMiner, PRMiner
+from mining.pollard_rho_batch import BatchPRMiner
+
+
+def bench_miner(miner_class, bit_length: int, rounds: int):
+    pub_key = elgamal.generate_pub_key(0xffffffffffff, bit_length)
+    block = Block(0, time.time(), [Tx.coinbase("miner", 100)], pub_key)
+    total_steps = 0
+    total_time = 0.0
+    for _ in range(rounds):
+        miner = miner_class(block, block_time=600)
+        init_time = time.time()
+        miner.mining()
+        total_time += time.time() - init_time
+        total_steps += miner.steps
+        block.public_key = elgamal.generate_pub_key(seed=int(pub_key.p + pub_key.g + pub_key.h),
+                                                    bit_length=bit_length)
+        pub_key = block.public_key
+    return total_time / rounds, total_steps / total_time
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    test_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{test_rounds} blocks with {test_bits}-bit public keys")
+    for test_class in (SimplePRMiner, PRMiner, BatchPRMiner):
+        seal_time, steps_per_sec = bench_miner(test_class, test_bits, test_rounds)
+        print(f"{test_class.__name__:>13}: {seal_time:8.3f} s/block {steps_per_sec:12.0f} steps/s")
@@ -0,0 +1,41 @@
+"""
+Benchmark of the binary cipher format against the decimal cipher format.
+
+Encrypt a message with the compact encoding, then report the size of the cipher in the decimal and in the binary
+format, the size of its json transport and the time of parsing the (c, d) pairs back, e.g.
+    python -m bench.binary_cipher_bench 32 65536
+"""
+import json
+import random
+import sys
+import time
+import crypto.elgamal as elgamal
+
+
+def bench_parse(parse, repeat: int = 5) -> float:
+    """Best time of parsing the pairs in seconds."""
+    times = []
+    for _ in range(repeat):
+        init_time = time.time()
+        parse()
+        times.append(time.time() - init_time)
+    return min(times)
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    test_size = int(sys.argv[2]) if len(sys.argv) > 2 else 2 ** 16
+    pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=test_bits)
+    rng = random.Random(0)
+    message = "".join(chr(rng.randint(32, 126)) for _ in range(test_size))
+    pairs = elgamal.encrypt_integers(pub, elgamal.encode_bytes(message.encode('utf-8'),
+                                                               elgamal.compact_block_size(test_bits)), rng)
+    decimal = elgamal.format_pairs(pairs)
+    binary = elgamal.format_binary_pairs(pairs, pub.p)
+    assert elgamal.parse_pairs(decimal) == elgamal.parse_binary_pairs(binary, pub.p) == pairs
+    print(f"{test_bits}-bit key, {test_size} bytes message, {len(pairs)} pairs")
+    for name, cipher, parse in (("decimal", decimal, lambda: elgamal.parse_pairs(decimal)),
+                                ("binary", binary, lambda: elgamal.parse_binary_pairs(binary, pub.p))):
+        print(f"{name:>8}: cipher {len(cipher):>9} bytes, json {len(json.dumps({'cipher': cipher})):>9} bytes, "
+              f"parse {bench_parse(parse) * 1000:8.2f} ms")
+    print(f"size ratio {len(decimal) / len(binary):.2f}x")
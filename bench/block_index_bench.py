@@ -0,0 +1,67 @@
+"""
+Benchmark of the block index.
+
+Build a long chain of linked blocks without mining, then report the time of indexing a new tip, of a reorg of a few
+blocks near the tip, and of saving the reorg to a sqlite database by the chain store, against the former update of
+every block row of the new chain, e.g.
+    python -m bench.block_index_bench 10000 3
+"""
+import os
+import sys
+import time
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.block_index import BlockIndex
+from blockchain.chain_store import ChainStore
+
+
+def make_chain(chain: list[Block], length: int) -> list[Block]:
+    """Append linked blocks with random header hashes, which are not mined."""
+    chain = list(chain)
+    for _ in range(length):
+        prev_block = chain[-1]
+        block = Block(prev_block.height + 1, time.time(), [], prev_block.public_key,
+                      prev_block_hash=prev_block.current_block_hash)
+        block.current_block_hash = os.urandom(32)
+        chain.append(block)
+    return chain
+
+
+def timed(func) -> tuple[float, object]:
+    """Run the function and return its time in ms and its result."""
+    init_time = time.time()
+    result = func()
+    return (time.time() - init_time) * 1000, result
+
+
+if __name__ == '__main__':
+    test_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    test_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 32))
+    genesis.current_block_hash = os.urandom(32)
+    main = make_chain([genesis], test_blocks - 1)
+    fork = make_chain(main[:-test_depth], test_depth + 1)
+    database = dataset.connect('sqlite:///:memory:')
+    database['blockchain'].insert_many([dict(block.get_db_record(), transactions=None) for block in main])
+    chain_store = ChainStore(database)
+    for block in main:
+        block.dirty = False
+    print(f"{test_blocks} blocks, reorg of {test_depth} blocks")
+
+    index_time, block_index = timed(lambda: BlockIndex(list(main)))
+    print(f"index the chain:           {index_time:9.1f} ms")
+    tip_time, _ = timed(lambda: block_index.add_blocks(fork[-test_depth - 1:-1]))
+    print(f"index a tied fork:         {tip_time:9.3f} ms")
+    reorg_time, fork_height = timed(lambda: block_index.add(fork[-1]))
+    print(f"reorg to the heavier fork: {reorg_time:9.3f} ms")
+    save_time, rows = timed(lambda: chain_store.save(block_index.chain))
+    print(f"save the reorg:            {save_time:9.1f} ms, {rows} block rows")
+
+    def former_update():
+        # the former consensus compared the chains by length and equality, then updated every block row
+        assert len(fork) > len(main) and fork != main
+        for block in fork:
+            database['blockchain'].update(block.get_db_record(), ['height'])
+    former_time, _ = timed(former_update)
+    print(f"former update:             {former_time:9.1f} ms, {len(fork)} block rows")
@@ -0,0 +1,55 @@
+"""
+Benchmark of the memory-bounded BSGS solver.
+
+Solve random keys of the same group with the dict based BSGS and with the compact table for several baby step budgets
+and worker counts, then report the memory of the table and the keys solved per second, e.g.
+    python -m bench.bsgs_bench 40 5
+"""
+import random
+import sys
+import time
+import tracemalloc
+import crypto.elgamal as elgamal
+from crypto import bsgs
+
+
+def random_keys(bit_length: int, keys: int) -> list[elgamal.PublicKey]:
+    pub_key = elgamal.generate_pub_key(0xffffffffffff, bit_length)
+    return [elgamal.PublicKey(pub_key.p, pub_key.g, pow(pub_key.g, random.randint(2, pub_key.p - 2), pub_key.p),
+                              bit_length) for _ in range(keys)]
+
+
+def bench_dict(keys: list[elgamal.PublicKey]):
+    tracemalloc.start()
+    init_time = time.time()
+    for pub_key in keys:
+        elgamal.bsgs_search_private_key(pub_key)
+    elapsed = time.time() - init_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, len(keys) / elapsed
+
+
+def bench_compact(keys: list[elgamal.PublicKey], baby_steps: int, workers: int):
+    init_time = time.time()
+    solver = bsgs.BSGSSolver(keys[0], baby_steps, workers)
+    build_time = time.time() - init_time
+    init_time = time.time()
+    for pub_key in keys:
+        solver.search_private_key(pub_key)
+    return solver.memory, build_time, len(keys) / (time.time() - init_time)
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    test_keys = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pub_keys = random_keys(test_bits, test_keys)
+    print(f"{test_keys} keys with {test_bits}-bit p")
+    dict_memory, dict_rate = bench_dict(pub_keys)
+    print(f"dict             : {dict_memory / 2 ** 20:9.1f} MB {dict_rate:9.3f} keys/s")
+    full = int(pub_keys[0].p ** 0.5) + 1
+    for test_budget in (full, full // 4, full // 16):
+        for test_workers in (1, 4):
+            memory, build, rate = bench_compact(pub_keys, test_budget, test_workers)
+            print(f"compact m={test_budget:>9} workers={test_workers}: {memory / 2 ** 20:9.1f} MB "
+                  f"{rate:9.3f} keys/s (table built in {build:.2f} s)")
@@ -0,0 +1,70 @@
+"""
+Benchmark of loading the chain from database at startup.
+
+Store a chain of linked blocks with a coinbase transaction each in a sqlite database file, then report the time of
+loading the chain by the former loader, which queried the transactions of every block separately, by the chain store
+with deferred transactions, and by the chain store with the transactions merged from a second ordered query, e.g.
+    python -m bench.chain_load_bench 10000 100000
+"""
+import os
+import sys
+import tempfile
+import time
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.chain_store import ChainStore, pad_rows
+from blockchain.transaction import Tx
+from bench.block_index_bench import make_chain, timed
+from bench.chain_store_bench import add_coinbase
+from mining.pollard_rho_hash import PRMiner
+
+
+def former_load(database) -> list[Block]:
+    """The former loader of the miner, which loaded the transactions of every block by a separate query."""
+    chain = []
+    for db_block in database['blockchain']:
+        block = Block.from_db(db_block)
+        tx_id_str = db_block['transactions']
+        if tx_id_str is not None and tx_id_str != "[]":
+            tx_ids = [int(tx_id) for tx_id in tx_id_str.split(',')]
+            block.transactions = [Tx.from_dict(db_tx) for db_tx in database['transactions'].find(id=tx_ids)]
+        chain.append(block)
+    return chain
+
+
+def make_database(path: str, length: int):
+    """Store a chain of the given length, every block has the solution and nonce of a mined block."""
+    genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 32))
+    genesis.current_block_hash = os.urandom(32)
+    chain = [genesis] + add_coinbase(make_chain([genesis], length - 1)[1:])
+    mined = Block(1, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 24))
+    nonce, solution = PRMiner(mined, 600).mining()
+    for block in chain[1:]:
+        block.nonce = nonce
+        block.solution = solution
+    database = dataset.connect(f"sqlite:///{path}")
+    # the tables are created with all columns
+    database['blockchain'].insert(pad_rows([genesis.get_db_record(), chain[1].get_db_record(tx_ids=[0])])[0])
+    tx_id = database['transactions'].insert(dict(chain[1].transactions[0].to_dict(), block_height=1))
+    database['transactions'].delete(id=tx_id)
+    genesis.dirty = False
+    ChainStore(database).save(chain)
+    database.close()
+
+
+if __name__ == '__main__':
+    test_lengths = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for length in test_lengths:
+            path = f"{tmp_dir}/blockchain_{length}.db"
+            make_database(path, length)
+            print(f"{length} blocks")
+            for name, load in (("former loader", former_load),
+                               ("lazy loader", lambda database: ChainStore(database).load()),
+                               ("eager loader", lambda database: ChainStore(database).load(lazy=False))):
+                database = dataset.connect(f"sqlite:///{path}")
+                load_time, chain = timed(lambda: load(database))
+                assert len(chain) == length
+                print(f"  {name:14} {load_time:9.1f} ms")
+                database.close()
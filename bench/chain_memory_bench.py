@@ -0,0 +1,51 @@
+"""
+Memory benchmark of the chain kept by the miner.
+
+Build a chain of sealed blocks with a coinbase and a time-locked transaction each, like the list of blocks kept by
+mine(), then report the memory allocated per block by tracemalloc and the max resident set size of the process, which
+also counts the hash objects allocated by OpenSSL outside of the Python allocator, e.g.
+    python -m bench.chain_memory_bench 100000
+"""
+import random
+import resource
+import sys
+import time
+import tracemalloc
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.transaction import Tx
+from mining.pollard_rho_solution import PRSolution
+
+
+def build_chain(length: int, bit_length: int = 32) -> list[Block]:
+    """Build a chain of sealed blocks with random keys and solutions."""
+    rng = random.Random(0)
+    chain = []
+    prev_block_hash = None
+    for height in range(length):
+        pub_key = elgamal.PublicKey(rng.getrandbits(bit_length), rng.getrandbits(bit_length),
+                                    rng.getrandbits(bit_length), bit_length)
+        txs = [Tx.coinbase("miner address", 100),
+               Tx("alice", "bob", 1, f"#4:1,{rng.getrandbits(bit_length)},{rng.getrandbits(bit_length)}:AAAA", height)]
+        block = Block(height, time.time(), txs, pub_key, nonce=rng.getrandbits(bit_length),
+                      prev_block_hash=prev_block_hash)
+        # the miner hashes the header with the nonce before the block is sealed
+        block.hash_header()
+        n = pub_key.p // 2
+        block.seal(PRSolution(rng.randrange(n), rng.randrange(n), rng.randrange(n), rng.randrange(n), n, pub_key))
+        prev_block_hash = block.current_block_hash
+        chain.append(block)
+    return chain
+
+
+if __name__ == '__main__':
+    test_length = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tracemalloc.start()
+    init_time = time.time()
+    test_chain = build_chain(test_length)
+    build_time = time.time() - init_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{test_length} blocks built in {build_time:.2f} s: {current / 2 ** 20:.1f} MB, "
+          f"{current / test_length:.0f} bytes per block, peak {peak / 2 ** 20:.1f} MB, "
+          f"max rss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10:.1f} MB")
@@ -0,0 +1,61 @@
+"""
+Benchmark of the delta persistence of the chain.
+
+Store a long chain of linked blocks without mining in a sqlite database, then report the time and the rows written by
+a save of the chain store after a new block is appended, after a reorg of a few blocks and without any change, against
+the former round which updated the row of every block, e.g.
+    python -m bench.chain_store_bench 50000 3
+"""
+import os
+import sys
+import tempfile
+import time
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.block_index import BlockIndex
+from blockchain.chain_store import ChainStore, pad_rows
+from blockchain.transaction import Tx
+from bench.block_index_bench import make_chain, timed
+
+
+def add_coinbase(blocks: list[Block]) -> list[Block]:
+    """Add a coinbase transaction to every block."""
+    for block in blocks:
+        block.add_transactions([Tx.coinbase("miner", 100)])
+    return blocks
+
+
+if __name__ == '__main__':
+    test_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    test_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 32))
+    genesis.current_block_hash = os.urandom(32)
+    chain = [genesis] + add_coinbase(make_chain([genesis], test_blocks - 1)[1:])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = dataset.connect(f"sqlite:///{tmp_dir}/blockchain.db")
+        # the database of a node with the genesis block, whose tables have all columns
+        database['blockchain'].insert(pad_rows([genesis.get_db_record(), chain[1].get_db_record(tx_ids=[0])])[0])
+        tx_id = database['transactions'].insert(dict(chain[1].transactions[0].to_dict(), block_height=1))
+        database['transactions'].delete(id=tx_id)
+        genesis.dirty = False
+        chain_store = ChainStore(database)
+        print(f"{test_blocks} blocks, reorg of {test_depth} blocks")
+        store_time, rows = timed(lambda: chain_store.save(chain))
+        print(f"initial save:       {store_time:9.1f} ms, {rows} rows")
+        block_index = BlockIndex(chain)
+        block_index.add_blocks(add_coinbase(make_chain(chain, 1)[-1:]))
+        new_time, rows = timed(lambda: chain_store.save(chain))
+        print(f"new block:          {new_time:9.1f} ms, {rows} rows")
+        idle_time, rows = timed(lambda: chain_store.save(chain))
+        print(f"no change:          {idle_time:9.3f} ms, {rows} rows")
+        fork = add_coinbase(make_chain(chain[:-test_depth], test_depth + 1)[-test_depth - 1:])
+        block_index.add_blocks(fork)
+        reorg_time, rows = timed(lambda: chain_store.save(chain))
+        print(f"reorg:              {reorg_time:9.1f} ms, {rows} rows")
+
+        def former_round():
+            for block in chain:
+                database['blockchain'].update(block.get_db_record(), ['height'])
+        former_time, _ = timed(former_round)
+        print(f"former round:       {former_time:9.1f} ms, {len(chain)} rows")
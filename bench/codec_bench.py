@@ -0,0 +1,64 @@
+"""
+Benchmark of the message codec of the elgamal encryption.
+
+Encode and decode payloads from 1 KB to 10 MB with the former per-byte arithmetic (up to 1 MB, since its decode is
+quadratic in the bytes per integer) and with the int.from_bytes / int.to_bytes codec, then report the throughput, e.g.
+    python -m bench.codec_bench 64
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+
+
+def legacy_encode(data: bytes, k: int) -> list[int]:
+    """The former encode loop over the message bytes."""
+    z = []
+    j = -1 * k
+    for idx in range(len(data)):
+        if idx % k == 0:
+            j += k
+            z.append(0)
+        z[j // k] += data[idx] * (2 ** (8 * (idx % k)))
+    return z
+
+
+def legacy_decode(encoded_integers: list[int], k: int) -> bytes:
+    """The former decode loop over the bytes of every integer."""
+    bytes_array = []
+    for num in encoded_integers:
+        for idx in range(k):
+            temp = num
+            for j in range(idx + 1, k):
+                temp = temp % (2 ** (8 * j))
+            letter = temp // (2 ** (8 * idx))
+            bytes_array.append(letter)
+            num = num - (letter * (2 ** (8 * idx)))
+    return bytearray(b for b in bytes_array)
+
+
+def bench_codec(encode, decode, data: bytes, k: int) -> tuple[float, float]:
+    """Throughput of encode and decode in MB/s."""
+    init_time = time.time()
+    z = encode(data, k)
+    encode_time = time.time() - init_time
+    init_time = time.time()
+    decoded = decode(z, k)
+    decode_time = time.time() - init_time
+    assert decoded[:len(data)] == data
+    size = len(data) / 2 ** 20
+    return size / encode_time, size / decode_time
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    test_k = elgamal.compact_block_size(test_bits)
+    print(f"{test_bits}-bit keys, {test_k} bytes per integer, MB/s of encode / decode")
+    for test_size in (2 ** 10, 2 ** 14, 2 ** 17, 2 ** 20, 10 * 2 ** 20):
+        test_data = bytes(i % 251 for i in range(test_size))
+        new_encode, new_decode = bench_codec(elgamal.encode_bytes, elgamal.decode_bytes, test_data, test_k)
+        if test_size <= 2 ** 20:
+            old_encode, old_decode = bench_codec(legacy_encode, legacy_decode, test_data, test_k)
+            old = f"former {old_encode:8.2f} / {old_decode:8.2f}"
+        else:
+            old = "former        - /        -"
+        print(f"{test_size / 1024:>8.0f} KB: {old}, bytes codec {new_encode:8.2f} / {new_decode:8.2f}")
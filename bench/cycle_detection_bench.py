@@ -0,0 +1,40 @@
+"""
+Benchmark of the cycle detection strategies of the pollard rho miner.
+
+Mine the same chain of public keys with every strategy and report the average number of step evaluations
+(header hash + mapping functions) and steps per second, e.g.
+    python -m bench.cycle_detection_bench 32 20
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from mining.pollard_rho_hash import SimplePRMiner, PRMiner, CYCLE_DETECTIONS
+
+
+def bench_strategy(miner_class, cycle_detection: str, bit_length: int, rounds: int):
+    pub_key = elgamal.generate_pub_key(0xffffffffffff, bit_length)
+    block = Block(0, time.time(), [], pub_key)
+    total_steps = 0
+    total_time = 0.0
+    for _ in range(rounds):
+        miner = miner_class(block, block_time=600, cycle_detection=cycle_detection)
+        init_time = time.time()
+        miner.mining()
+        total_time += time.time() - init_time
+        total_steps += miner.steps
+        block.public_key = elgamal.generate_pub_key(seed=int(pub_key.p + pub_key.g + pub_key.h),
+                                                    bit_length=bit_length)
+        pub_key = block.public_key
+    return total_steps / rounds, total_steps / total_time
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    test_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"{test_rounds} blocks with {test_bits}-bit public keys")
+    for test_class in (SimplePRMiner, PRMiner):
+        for strategy in CYCLE_DETECTIONS:
+            mean_steps, steps_per_sec = bench_strategy(test_class, strategy, test_bits, test_rounds)
+            print(f"{test_class.__name__:>13} {strategy:>6}: {mean_steps:12.0f} steps/block "
+                  f"{steps_per_sec:12.0f} steps/s")
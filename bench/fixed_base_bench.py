@@ -0,0 +1,42 @@
+"""
+Benchmark of the fixed base tables of g and h in PRMiner.func_f.
+
+Walk the same number of steps with the table lookups and with the built-in pow, then report steps per second, e.g.
+    python -m bench.fixed_base_bench 50000
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from mining.pollard_rho_hash import PRMiner
+
+
+class PowPRMiner(PRMiner):
+    """PRMiner computing g^hash and h^hash with the built-in pow as before."""
+    def func_f(self, hash_i, y_i):
+        pubkey = self.block.public_key
+        if hash_i % 3 == 2:
+            return (pow(pubkey.h, hash_i, pubkey.p) * y_i) % pubkey.p
+        elif hash_i % 3 == 0:
+            return pow(y_i, hash_i, pubkey.p)
+        else:
+            return (pow(pubkey.g, hash_i, pubkey.p) * y_i) % pubkey.p
+
+
+def bench_walk(miner_class, bit_length: int, steps: int) -> float:
+    pub_key = elgamal.generate_pub_key(0xffffffffffff, bit_length)
+    miner = miner_class(Block(0, time.time(), [], pub_key))
+    n = (pub_key.p - 1) // 2
+    a_i, b_i, y_i = miner._random_point(n)
+    init_time = time.time()
+    for _ in range(steps):
+        a_i, b_i, y_i = miner._step(a_i, b_i, y_i, n)
+    return steps / (time.time() - init_time)
+
+
+if __name__ == '__main__':
+    test_steps = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for test_bits in (32, 48, 64):
+        before = bench_walk(PowPRMiner, test_bits, test_steps)
+        after = bench_walk(PRMiner, test_bits, test_steps)
+        print(f"{test_bits}-bit: pow {before:10.0f} steps/s, table {after:10.0f} steps/s, x{after / before:.2f}")
@@ -0,0 +1,45 @@
+"""
+Benchmark of the header hash in the mining loop.
+
+Report the time per header hash of the former path of the miner, which assigns the nonce to the block and hashes the
+string header, and of Block.hash_with_nonce for the string header of v1 and the binary header of v4, then the steps
+per second of the pollard rho miner for both header versions, e.g.
+    python -m bench.header_hash_bench 32
+"""
+import sys
+import time
+import timeit
+import crypto.elgamal as elgamal
+from blockchain.block import Block, BINARY_HEADER_VERSION
+from blockchain.transaction import Tx
+from mining.pollard_rho_hash import PRMiner
+
+
+def former_header_hash(block: Block, nonce: int) -> int:
+    """The former header hash of the miner."""
+    block.nonce = nonce
+    return int.from_bytes(block.hash_header(), byteorder='little', signed=True) % block.public_key.p
+
+
+def bench_hash(func, number: int = 100000) -> float:
+    """Best time per call in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=test_bits)
+    txs = [Tx.coinbase("miner", 100)] + [Tx("alice", "bob", i, "#4:1,2,3:" + "A" * 200, 10) for i in range(100)]
+    nonce = pub.p - 12345
+    print(f"{test_bits}-bit key, 100 transactions")
+    for version in (1, BINARY_HEADER_VERSION):
+        block = Block(1, time.time(), list(txs), pub, prev_block_hash=b"\x01" * 32, version=version)
+        assert former_header_hash(block, nonce) == block.hash_with_nonce(nonce)
+        former = bench_hash(lambda: former_header_hash(block, nonce))
+        fast = bench_hash(lambda: block.hash_with_nonce(nonce))
+        miner = PRMiner(block, block_time=5)
+        init_time = time.time()
+        miner.mining()
+        steps = miner.steps / (time.time() - init_time)
+        print(f"v{version}: former header hash {former:6.2f} us, hash_with_nonce {fast:6.2f} us, "
+              f"miner {steps:9.0f} steps/s")
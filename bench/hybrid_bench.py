@@ -0,0 +1,33 @@
+"""
+Benchmark of the hybrid time release encryption.
+
+Seal payloads from 1 KB to 1 MB with the legacy pairs, the compact pairs and the hybrid envelope under a block key,
+then report the time to seal, the time to release and the size of the cipher string, e.g.
+    python -m bench.hybrid_bench 32
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+
+
+def bench_mode(pub_key, private_key, message: str, **mode) -> tuple[float, float, int]:
+    init_time = time.time()
+    cipher = elgamal.encrypt(pub_key, message, **mode)
+    seal_time = time.time() - init_time
+    init_time = time.time()
+    assert elgamal.decrypt(private_key, cipher) == message
+    return seal_time, time.time() - init_time, len(cipher)
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    test_pub = elgamal.generate_pub_key(0xffffffffffff, test_bits)
+    test_private = elgamal.bsgs_search_private_key(test_pub)
+    print(f"{test_bits}-bit block key: seal s / release s / cipher bytes")
+    for test_size in (2 ** 10, 2 ** 14, 2 ** 17, 2 ** 20):
+        test_message = "time release " * (test_size // 13)
+        results = []
+        for name, test_mode in (("legacy", {}), ("compact", {"compact": True}), ("hybrid", {"hybrid": True})):
+            seal, release, size = bench_mode(test_pub, test_private, test_message, **test_mode)
+            results.append(f"{name} {seal:7.3f} / {release:7.3f} / {size:>9}")
+        print(f"{len(test_message) / 1024:>6.0f} KB: " + ", ".join(results))
@@ -0,0 +1,41 @@
+"""
+Benchmark of the Merkle body hash.
+
+Hash the body of a candidate block with many transactions by the former string hash and by the Merkle tree, then
+append transactions one by one and report the time of rehashing the body after every append, e.g.
+    python -m bench.merkle_bench 10000 100
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from blockchain.block import Block, MERKLE_BODY_VERSION
+from blockchain.transaction import Tx
+
+
+def make_txs(count: int, start: int = 0) -> list[Tx]:
+    """Transactions with time-locked ciphers of a typical size."""
+    cipher = "#4:1,123456789,987654321:" + "A" * 200
+    return [Tx("alice" * 16, "bob" * 16, i, cipher, 10) for i in range(start, start + count)]
+
+
+def bench_appends(block: Block, txs: list[Tx]) -> float:
+    """Mean time in ms of appending a transaction and rehashing the body."""
+    init_time = time.time()
+    for tx in txs:
+        block.add_transactions([tx])
+        block.body_hash()
+    return (time.time() - init_time) / len(txs) * 1000
+
+
+if __name__ == '__main__':
+    test_txs = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    test_appends = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=32)
+    print(f"{test_txs} transactions, {test_appends} appends")
+    for name, version in (("string", 1), ("merkle", MERKLE_BODY_VERSION)):
+        block = Block(1, time.time(), make_txs(test_txs), pub, version=version)
+        init_time = time.time()
+        block.body_hash()
+        full_time = (time.time() - init_time) * 1000
+        append_time = bench_appends(block, make_txs(test_appends, test_txs))
+        print(f"{name:>7}: full body hash {full_time:8.2f} ms, append and rehash {append_time:8.3f} ms")
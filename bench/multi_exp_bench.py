@@ -0,0 +1,46 @@
+"""
+Benchmark of the simultaneous multi-exponentiation in block validation.
+
+Compute the two test values g^a1 * h^b1 and g^a2 * h^b2 of a block solution with four separate exponentiations and
+with multi_exp, for every arithmetic backend, e.g.
+    python -m bench.multi_exp_bench 200
+"""
+import random
+import sys
+import time
+from crypto import backend
+from crypto.elgamal_util import multi_exp, joint_window_exp
+
+
+def separate_exp(bases: list[int], exps: list[int], modulus: int) -> int:
+    result = 1
+    for base, exp in zip(bases, exps):
+        result = result * backend.powmod(base, exp, modulus) % modulus
+    return result
+
+
+def bench_validation(func, bit_length: int, rounds: int) -> float:
+    """Average time to compute both test values of a solution in microseconds."""
+    rng = random.Random(bit_length)
+    p = rng.getrandbits(bit_length) | 1 | (1 << (bit_length - 1))
+    solutions = [[rng.getrandbits(bit_length) for _ in range(6)] for _ in range(rounds)]
+    init_time = time.time()
+    for g, h, a1, b1, a2, b2 in solutions:
+        func([g, h], [a1, b1], p)
+        func([g, h], [a2, b2], p)
+    return (time.time() - init_time) / rounds * 1e6
+
+
+if __name__ == '__main__':
+    test_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    default_backend = backend.BACKEND
+    for name in backend.available_backends():
+        backend.set_backend(name)
+        for test_bits in (64, 256, 512, 1024, 2048):
+            rounds = max(10, test_rounds * 64 // test_bits)
+            separate = bench_validation(separate_exp, test_bits, rounds)
+            joint = bench_validation(lambda b, e, m: joint_window_exp(b, e, m, 3), test_bits, rounds)
+            selected = bench_validation(multi_exp, test_bits, rounds)
+            print(f"{name:>6} {test_bits:>5} bits: separate {separate:10.1f} us, joint window {joint:10.1f} us, "
+                  f"multi_exp {selected:10.1f} us")
+    backend.set_backend(default_backend)
@@ -0,0 +1,42 @@
+"""
+Benchmark of the parallel pollard rho miner.
+
+Mine the same chain of public keys with 1, 2, 4, ... worker processes and report the average time to seal a block
+and the steps per second of all workers, e.g.
+    python -m bench.parallel_mining_bench 32 10 8
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.transaction import Tx
+from mining.pollard_rho_parallel import ParallelPRMiner
+
+
+def bench_workers(workers: int, bit_length: int, rounds: int):
+    pub_key = elgamal.generate_pub_key(0xffffffffffff, bit_length)
+    block = Block(0, time.time(), [Tx.coinbase("miner", 100)], pub_key)
+    total_steps = 0
+    total_time = 0.0
+    for _ in range(rounds):
+        miner = ParallelPRMiner(block, block_time=600, workers=workers)
+        init_time = time.time()
+        miner.mining()
+        total_time += time.time() - init_time
+        total_steps += miner.steps
+        block.public_key = elgamal.generate_pub_key(seed=int(pub_key.p + pub_key.g + pub_key.h),
+                                                    bit_length=bit_length)
+        pub_key = block.public_key
+    return total_time / rounds, total_steps / total_time
+
+
+if __name__ == '__main__':
+    test_bits = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    test_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    print(f"{test_rounds} blocks with {test_bits}-bit public keys")
+    test_workers = 1
+    while test_workers <= max_workers:
+        seal_time, steps_per_sec = bench_workers(test_workers, test_bits, test_rounds)
+        print(f"{test_workers:>3} workers: {seal_time:8.3f} s/block {steps_per_sec:12.0f} steps/s")
+        test_workers *= 2
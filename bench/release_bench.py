@@ -0,0 +1,40 @@
+"""
+Benchmark of the release engine.
+
+Fill an in-memory transactions table with ciphers locked to many heights, then report the time of finding the ciphers
+of one height without and with the index on the release height, and the time of releasing them, e.g.
+    python -m bench.release_bench 100000 1000 2
+"""
+import sys
+import time
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.release import ReleaseEngine
+
+
+if __name__ == '__main__':
+    test_txs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    test_heights = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    test_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    db = dataset.connect('sqlite:///:memory:')
+    pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=20)
+    private_key = elgamal.find_private_key(pub)
+    cipher = elgamal.encrypt(pub, "time release message", hybrid=True)
+    db["transactions"].insert_many([{"addr_from": "alice", "addr_to": "bob", "amount": 1, "cipher": cipher,
+                                     "release_block_idx": i % test_heights} for i in range(test_txs)])
+    target = test_heights // 2
+    print(f"{test_txs} transactions locked to {test_heights} heights, {test_txs // test_heights} per height")
+    init_time = time.time()
+    scanned = [tx for tx in db["transactions"].find(release_block_idx=target) if tx.get("cipher")]
+    print(f"query without index: {(time.time() - init_time) * 1000:8.2f} ms")
+    with ReleaseEngine(db, workers=test_workers) as engine:
+        engine.pending(0)
+        init_time = time.time()
+        assert len(engine.pending(target)) == len(scanned)
+        print(f"query with index:    {(time.time() - init_time) * 1000:8.2f} ms")
+        init_time = time.time()
+        released = engine.release(target, private_key)
+        print(f"release of {released} messages with {test_workers} workers: {(time.time() - init_time) * 1000:8.2f} ms")
+        init_time = time.time()
+        engine.get(target)
+        print(f"lookup of released messages: {(time.time() - init_time) * 1000:8.2f} ms")
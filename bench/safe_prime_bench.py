@@ -0,0 +1,34 @@
+"""
+Benchmark of the public key derivation schemes.
+
+Derive the same number of chained public keys with the v1 (solovay-strassen) and v2 (sieve and BPSW) schemes for
+bit lengths from 32 to 256 and report the average time per key. The v2 chain is also derived by the parallel search
+with the given number of workers, e.g.
+    python -m bench.safe_prime_bench 5 4
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from crypto import backend
+
+
+def bench_chain(version: int, bit_length: int, keys: int, search: elgamal.ParallelSafePrimeSearch = None) -> float:
+    """Average time to derive one public key of the chain in milliseconds."""
+    pub = elgamal.generate_pub_key(0xffffffffffff, bit_length, version=version)
+    init_time = time.time()
+    for _ in range(keys):
+        pub = elgamal.generate_pub_key(int(pub.p + pub.g + pub.h), bit_length, version=version, search=search)
+    return (time.time() - init_time) / keys * 1e3
+
+
+if __name__ == '__main__':
+    test_keys = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    test_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{test_keys} chained keys per bit length, {backend.BACKEND} backend")
+    with elgamal.ParallelSafePrimeSearch(test_workers) as test_search:
+        for test_bits in (32, 64, 128, 192, 256):
+            v1 = bench_chain(1, test_bits, test_keys)
+            v2 = bench_chain(2, test_bits, test_keys)
+            v2_parallel = bench_chain(2, test_bits, test_keys, test_search)
+            print(f"{test_bits:>4} bits: v1 {v1:10.2f} ms/key, v2 {v2:8.2f} ms/key, x{v1 / v2:.1f}, "
+                  f"v2 with {test_workers} workers {v2_parallel:8.2f} ms/key")
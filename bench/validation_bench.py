@@ -0,0 +1,56 @@
+"""
+Benchmark of the full chain validation.
+
+Mine a chain of small blocks, then report the time of validating the whole chain by the former check of every link,
+by the chain validator in the calling process and with a process pool, and the time of validating the chain again
+after some new blocks are appended, which only validates the new blocks above the verified tip, e.g.
+    python -m bench.validation_bench 200 24 2
+"""
+import sys
+import time
+import crypto.elgamal as elgamal
+from blockchain.block import Block, derive_public_key
+from blockchain.transaction import Tx
+from blockchain.validator import ChainValidator, block_hash, validate_link
+from mining.pollard_rho_hash import PRMiner
+
+
+def mine_chain(chain: list[Block], length: int) -> list[Block]:
+    """Mine blocks with the derived keys of the same bit length on top of a chain."""
+    chain = list(chain)
+    for _ in range(length):
+        prev_block = chain[-1]
+        block = Block(prev_block.height + 1, time.time(), [Tx.coinbase("miner", 100)],
+                      derive_public_key(prev_block.public_key, prev_block.difficulty, 1),
+                      prev_block_hash=block_hash(prev_block))
+        nonce, solution = PRMiner(block, 600).mining()
+        block.seal(solution)
+        chain.append(block)
+    return chain
+
+
+def timed(func) -> tuple[float, object]:
+    """Run the function and return its time in ms and its result."""
+    init_time = time.time()
+    result = func()
+    return (time.time() - init_time) * 1000, result
+
+
+if __name__ == '__main__':
+    test_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    test_bits = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    test_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, test_bits))
+    genesis.current_block_hash = genesis.hash_header()
+    chain = mine_chain([genesis], test_blocks)
+    extended = mine_chain(chain, 10)
+    print(f"{test_blocks} blocks of {test_bits}-bit keys")
+    link_time, _ = timed(lambda: all(validate_link(a, b) for a, b in zip(chain, chain[1:])))
+    print(f"links only:                       {link_time:8.1f} ms")
+    for workers in (1, test_workers):
+        with ChainValidator(workers=workers) as validator:
+            full_time, valid = timed(lambda: validator.validate(chain))
+            assert valid
+            again_time, valid = timed(lambda: validator.validate(extended))
+            assert valid
+        print(f"{workers} worker(s): full chain {full_time:8.1f} ms, 10 new blocks {again_time:8.1f} ms")
@@ -1,7 +1,21 @@
 import time
+import struct
 import hashlib
+from typing import Callable
 import crypto.elgamal as elgamal
 from mining.pollard_rho_solution import PRSolution
+from blockchain.merkle import MerkleTree
+
+
+# block version from which the public key is derived by the v2 scheme of elgamal.generate_pub_key
+KEY_DERIVATION_V2_VERSION = 2
+# block version from which the body hash is the root of the Merkle tree of the canonical tx encodings
+MERKLE_BODY_VERSION = 3
+# block version from which the header is the binary layout below instead of the concatenated strings of its fields
+BINARY_HEADER_VERSION = 4
+# version, height, timestamp, bit length of the key, previous block hash and body hash, which are followed by p, g and h
+# of the public key and at last the nonce, all of them big endian with the byte length of p
+BINARY_HEADER_FORMAT = struct.Struct(">IQdH32s32s")
 
 
 def create_genesis_block():
@@ -9,7 +23,34 @@ def create_genesis_block():
     return Block(0, time.time(), [], cipher)
 
 
+def key_derivation_version(block_version: int) -> int:
+    """Key derivation scheme of the public key of a block with the given version."""
+    return 2 if block_version >= KEY_DERIVATION_V2_VERSION else 1
+
+
+def derive_public_key(prev_public_key: elgamal.PublicKey, bit_length: int, block_version: int,
+                      search: elgamal.ParallelSafePrimeSearch = None) -> elgamal.PublicKey:
+    """Derive the public key of the next block from the public key of the previous block.
+
+    Args:
+        prev_public_key: public key of the previous block, which seeds the derivation
+        bit_length: difficulty of the next block
+        block_version: version of the next block, which selects the key derivation scheme
+        search: optional process pool of the v2 safe prime search
+
+    Returns:
+        public key of the next block
+    """
+    return elgamal.generate_pub_key(seed=int(prev_public_key.p + prev_public_key.g + prev_public_key.h),
+                                    bit_length=bit_length, version=key_derivation_version(block_version),
+                                    search=search)
+
+
 class Block:
+    # the miner keeps the whole chain in memory, so the attributes are slotted without instance dict
+    __slots__ = ("version", "height", "timestamp", "_transactions", "_tx_loader", "prev_block_hash", "nonce",
+                 "solution", "public_key", "_static_hash", "_merkle", "current_block_hash", "dirty")
+
     def __init__(self,
                  height: int,
                  timestamp: float,
@@ -17,7 +58,8 @@ class Block:
                  public_key: elgamal.PublicKey,
                  nonce=None,
                  solution: PRSolution = None,
-                 prev_block_hash=None):
+                 prev_block_hash=None,
+                 version: int = 1):
         """Init time release block.
 
         Args:
@@ -28,21 +70,70 @@ class Block:
             nonce: nonce value for mining
             solution: solution for deriving private key
             prev_block_hash: hash of previous block header
+            version: block version, which selects the key derivation scheme of the public key
         """
-        self.version = 1.0
+        self.version = version
         self.height = height
         self.timestamp = timestamp
         self.transactions = transactions
         self.prev_block_hash = prev_block_hash
         self.nonce = nonce
         self.solution = solution
-        self.difficulty = public_key.bit_length
         self.public_key = public_key
-        # the static hash is the sha256 object to calculate header hash with different nonce without reallocation
+        # the static hash is the sha256 object to calculate header hash with different nonce without reallocation,
+        # it is only kept for a candidate block and released once the block is sealed
         self._static_hash = None
+        # the cached Merkle tree of the transactions, which is built on the first body hash of a v3 block
+        self._merkle = None
         # this static header hash is for database retrieved block only, so that do not recalculate hash value
         # TODO: fix hash_header replication issue so that the header hash could be recalculated
         self.current_block_hash = None
+        # whether the block shall be written to the database, a new block is dirty until it is persisted
+        self.dirty = True
+
+    def __getstate__(self):
+        """Pickle the block without the cached hashes, e.g. for a worker process, the hash obj cannot be pickled."""
+        state = {name: getattr(self, name) for name in self.__slots__}
+        # the deferred transactions are loaded, since their loader is bound to the database
+        state["_transactions"] = self.transactions
+        state["_tx_loader"] = None
+        state["_static_hash"] = None
+        state["_merkle"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def transactions(self) -> list:
+        """Transactions of the block, the deferred transactions of a block loaded from database are loaded here."""
+        if self._tx_loader is not None:
+            self._transactions = self._tx_loader()
+            self._tx_loader = None
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, transactions: list):
+        self._transactions = transactions
+        self._tx_loader = None
+
+    def defer_transactions(self, loader: Callable[[], list]):
+        """Defer the loading of the transactions until they are accessed, e.g. by body hash or a chain rewrite."""
+        self._transactions = None
+        self._tx_loader = loader
+
+    @property
+    def difficulty(self) -> int:
+        """Difficulty of the block, which is the bit length of its public key."""
+        return self.public_key.bit_length
+
+    def seal(self, solution: PRSolution):
+        """Attach the solution of the mined block, cache its header hash and release the hash object of the header."""
+        self.solution = solution
+        self.current_block_hash = self.hash_header()
+        self._static_hash = None
+        self.dirty = True
 
     @classmethod
     def from_db(cls, db_block: dict):
@@ -59,12 +150,17 @@ class Block:
                       timestamp=db_block['timestamp'],
                       transactions=[],
                       public_key=pub_key,
-                      prev_block_hash=db_block['prev_block_hash'])
-        if db_block["solution"]:
+                      prev_block_hash=db_block['prev_block_hash'],
+                      version=db_block.get('version') or 1)
+        if db_block.get('nonce') is not None:
+            # the nonce may be stored as text, since it can exceed the 64-bit integer of the database
+            block.nonce = int(db_block['nonce'])
+        if db_block.get("solution"):
             block.solution = PRSolution.from_str(db_block['solution'])
         # WARNING: this part of code is insecure and it is not based on original design but only for
         # simplification of code.
         block.current_block_hash = db_block['header_hash']
+        block.dirty = False
         return block
 
     def get_db_record(self, tx_ids: list[int] = None):
@@ -72,42 +168,115 @@ class Block:
         db_record = {
                 "height": self.height,
                 "timestamp": self.timestamp,
-                "header_hash": self.hash_header(),
+                "header_hash": self.current_block_hash or self.hash_header(),
                 "difficulty": self.difficulty,
                 "prev_block_hash": self.prev_block_hash,
                 "public_key": repr(self.public_key),
-                "nonce": self.nonce
+                "nonce": self.nonce,
+                "version": self.version
             }
         if tx_ids:
             db_record["transactions"] = ", ".join(str(tx_id) for tx_id in tx_ids)
         if self.solution:
             db_record["solution"] = repr(self.solution)
+        if self.version >= MERKLE_BODY_VERSION:
+            # the root is committed by the header, so a light wallet can check an inclusion proof against it
+            db_record["merkle_root"] = self.body_hash()
         return db_record
 
+    def key_width(self) -> int:
+        """Byte length of the public key fields and the nonce field of the binary header."""
+        return (self.public_key.p.bit_length() + 7) // 8
+
+    def binary_header(self) -> bytes:
+        """The binary header of a v4 block without nonce."""
+        width = self.key_width()
+        pub_key = self.public_key
+        return (BINARY_HEADER_FORMAT.pack(self.version, self.height, self.timestamp, pub_key.bit_length,
+                                          self.prev_block_hash or b"", self.body_hash()) +
+                pub_key.p.to_bytes(width, 'big') + pub_key.g.to_bytes(width, 'big') + pub_key.h.to_bytes(width, 'big'))
+
+    def _static_header(self):
+        """The sha256 object of the block header without nonce, which is the midstate of the header hash."""
+        if self._static_hash:
+            return self._static_hash
+        static_hash = hashlib.sha256()
+        if self.version >= BINARY_HEADER_VERSION:
+            static_hash.update(self.binary_header())
+        else:
+            if self.version >= KEY_DERIVATION_V2_VERSION:
+                # the version is committed by the header, the header of a v1 block is unchanged
+                static_hash.update(f"v{self.version}".encode('utf-8'))
+            static_hash.update((str(self.height) + str(self.timestamp) + str(self.body_hash()) +
+                                str(self.public_key)).encode('utf-8'))
+        if self.current_block_hash is None:
+            # only a candidate block keeps the hash object to hash the header with different nonce values, the hash
+            # obj cannot be serialized so the init is not inside __init__
+            self._static_hash = static_hash
+        return static_hash
+
+    def static_digest(self) -> bytes:
+        """Hash of the block header without nonce, which identifies a candidate block during mining."""
+        return self._static_header().copy().digest()
+
+    def _nonce_bytes(self, nonce) -> bytes:
+        """Encoded nonce at the end of the header, a fixed width field from v4 and its string before."""
+        if self.version >= BINARY_HEADER_VERSION:
+            return (nonce or 0).to_bytes(self.key_width(), 'big')
+        return str(nonce).encode('utf-8')
+
     def hash_header(self):
         """Double hash of the block header
 
         Returns:
             SHA256(SHA256(block_header))
         """
-        if not self._static_hash:
-            # if the static hash is not yet allocated, do it here, the hash obj cannot be serialized so the init is not
-            # inside __init__
-            self._static_hash = hashlib.sha256()
-            self._static_hash.update((str(self.height) + str(self.timestamp) + str(self.body_hash()) +
-                                      str(self.public_key)).encode('utf-8'))
-        sha1 = self._static_hash.copy()
-        sha1.update(str(self.nonce).encode('utf-8'))
+        sha1 = self._static_header().copy()
+        sha1.update(self._nonce_bytes(self.nonce))
         sha2 = hashlib.sha256()
         sha2.update(sha1.digest())
         return sha2.digest()
 
+    def hash_with_nonce(self, nonce: int) -> int:
+        """Header hash of the block with the given nonce modulo p, which is the fast path of the miner.
+
+        The midstate of the header without nonce is copied and only the nonce is hashed, the nonce of the block is
+        not changed.
+        """
+        sha1 = self._static_header().copy()
+        sha1.update(self._nonce_bytes(nonce))
+        return int.from_bytes(hashlib.sha256(sha1.digest()).digest(), byteorder='little', signed=True) % \
+            self.public_key.p
+
+    def merkle_tree(self) -> MerkleTree:
+        """The cached Merkle tree of the transactions."""
+        if self._merkle is None:
+            self._merkle = MerkleTree([tx.encode() for tx in self.transactions])
+        return self._merkle
+
+    def add_transactions(self, transactions: list):
+        """Append transactions to the block, only the path of every new leaf is rehashed in the cached Merkle tree.
+
+        The transactions of a block shall be appended by this method, so that its cached hashes are kept in sync.
+        """
+        if self._merkle is not None:
+            self._merkle.extend(tx.encode() for tx in transactions)
+        self.transactions.extend(transactions)
+        # the header changes with the body
+        self._static_hash = None
+        self.dirty = True
+
     def body_hash(self):
-        """Instead of building the Merkel tree, hash all transactions here for simplification.
+        """Hash of all transactions.
+
+        From version 3 it is the root of the Merkle tree of the canonical tx encodings, the body hash of earlier
+        versions hashes the string of the transaction list for simplification.
 
         Returns:
             SHA256 hash of transactions
         """
+        if self.version >= MERKLE_BODY_VERSION:
+            return self.merkle_tree().root
         sha = hashlib.sha256()
         sha.update(str(self.transactions).encode('utf-8'))
         return sha.digest()
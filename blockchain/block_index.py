@@ -0,0 +1,113 @@
+"""
+In-memory index of the block tree keyed by header hash.
+
+Every block known to the node is indexed with a pointer to its parent and the cumulative work of its chain, so the
+best tip is kept up to date on every new block without comparing whole chains. The main chain is kept as a list of the
+blocks from genesis to the best tip, and a reorg only replaces the blocks above the fork point.
+"""
+import math
+from typing import Optional
+from blockchain.block import Block
+from blockchain.validator import block_hash
+
+
+def block_work(block: Block) -> int:
+    """Expected work of mining a block, the pollard rho miner takes about sqrt(p) steps for a key of p."""
+    return math.isqrt(1 << block.difficulty)
+
+
+class IndexEntry(object):
+    """A block of the block tree with its parent and the cumulative work of the chain up to it."""
+    __slots__ = ("block", "block_hash", "parent", "work")
+
+    def __init__(self, block: Block, parent: Optional["IndexEntry"]):
+        self.block = block
+        self.block_hash = block_hash(block)
+        self.parent = parent
+        self.work = (parent.work if parent else 0) + block_work(block)
+
+    @property
+    def height(self) -> int:
+        return self.block.height
+
+
+class BlockIndex(object):
+    """Block tree of all known blocks, the main chain ends at the tip with the most cumulative work."""
+    def __init__(self, chain: list[Block]):
+        """Init the block index.
+
+        Args:
+            chain: main chain from the genesis block, the list is kept as the main chain and updated in place
+        """
+        self.entries = {}
+        self.chain = chain
+        self.tip = None
+        # the blocks of the given main chain are indexed as they are, so they are not marked dirty
+        for block in chain:
+            self.tip = IndexEntry(block, self.tip)
+            self.entries[self.tip.block_hash] = self.tip
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, header_hash: bytes):
+        return header_hash in self.entries
+
+    def get(self, header_hash: bytes) -> Optional[IndexEntry]:
+        """Get the indexed entry of a block by its header hash."""
+        return self.entries.get(header_hash)
+
+    def on_main_chain(self, entry: IndexEntry) -> bool:
+        """Whether the block of the entry is in the main chain."""
+        return entry.height < len(self.chain) and self.chain[entry.height] is entry.block
+
+    def add(self, block: Block) -> Optional[int]:
+        """Index a block, the main chain is switched to the block if its chain has more work than the best tip.
+
+        Args:
+            block: new block whose parent is indexed, or the genesis block of an empty index
+
+        Returns:
+            fork height, which is the first height of the main chain changed by the block, or None if the main chain
+            is unchanged
+        """
+        header_hash = block_hash(block)
+        if header_hash in self.entries:
+            return None
+        if self.tip is None:
+            parent = None
+        else:
+            parent = self.entries.get(block.prev_block_hash)
+            if parent is None or parent.height + 1 != block.height:
+                raise ValueError(f"The parent of the block {block.height} is not indexed!")
+        entry = IndexEntry(block, parent)
+        self.entries[header_hash] = entry
+        # a tie keeps the tip which has been seen first
+        if self.tip is not None and entry.work <= self.tip.work:
+            return None
+        self.tip = entry
+        return self._reorg(entry)
+
+    def add_blocks(self, blocks: list[Block]) -> Optional[int]:
+        """Index blocks in the order of their heights.
+
+        Returns:
+            lowest fork height of the main chain changed by the blocks, or None if the main chain is unchanged
+        """
+        forks = [self.add(block) for block in blocks]
+        return min((fork for fork in forks if fork is not None), default=None)
+
+    def _reorg(self, entry: IndexEntry) -> int:
+        """Switch the main chain to end at the entry, only the blocks above the fork point are replaced."""
+        branch = []
+        while entry is not None and not self.on_main_chain(entry):
+            branch.append(entry.block)
+            entry = entry.parent
+        fork = entry.height + 1 if entry else 0
+        del self.chain[fork:]
+        for block in reversed(branch):
+            # the rows of a block switched back into the main chain may have been overwritten by another branch
+            block.dirty = True
+            self.chain.append(block)
+        return fork
+
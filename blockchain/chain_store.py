@@ -0,0 +1,137 @@
+"""
+Delta persistence and bulk loading of the main chain.
+
+A block is dirty from its creation until it is written, and the block index marks the blocks switched into the main
+chain dirty, so the dirty blocks are always a suffix of the main chain. Every save only writes this suffix with its
+transactions and deletes the rows above the tip, in a single transaction with one executemany per table and statement.
+
+The chain is loaded by streaming the block rows in height order. The transactions are either merged from a second
+query in the same order, or deferred until the transactions of a block are accessed, which most blocks below the tip
+never are.
+"""
+from collections import defaultdict
+from functools import partial
+from blockchain.block import Block
+from blockchain.release import ensure_index
+from blockchain.transaction import Tx
+
+
+def pad_rows(rows: list[dict]) -> list[dict]:
+    """Pad the rows to the same columns for executemany, a missing column of a row is written as null."""
+    columns = {column: None for row in rows for column in row}
+    return [dict(columns, **row) for row in rows]
+
+
+class ChainStore(object):
+    """Write the new and changed blocks of the main chain to the database."""
+    def __init__(self, database, table: str = "blockchain", tx_table: str = "transactions"):
+        """Init chain store.
+
+        Args:
+            database: dataset database of the node
+            table: name of the table of blocks, whose row id is the block height + 1
+            tx_table: name of the table of transactions
+        """
+        self.database = database
+        self.table = table
+        self.tx_table = tx_table
+        # number of block rows in the database, which are the heights below it
+        self.height = len(database[table])
+
+    def _ensure_columns(self, table, rows: list[dict]):
+        """Create the missing columns by the first non null value of the rows, outside of the transaction."""
+        for column in rows[0]:
+            if not table.has_column(column):
+                example = next((row[column] for row in rows if row[column] is not None), None)
+                table.create_column_by_example(column, example)
+
+    def save(self, chain: list[Block]) -> int:
+        """Write the dirty blocks of the main chain and delete the rows above its tip.
+
+        Args:
+            chain: main chain from the genesis block
+
+        Returns:
+            number of rows written, i.e. the block rows and the transaction rows inserted or updated
+        """
+        start = len(chain)
+        while start > 0 and chain[start - 1].dirty:
+            start -= 1
+        if start == len(chain) and self.height == len(chain):
+            return 0
+        blocks = chain[start:]
+        tx_rows = [dict(tx.to_dict(), block_height=block.height) for block in blocks for tx in block.transactions]
+        # the schema is not changed within the transaction, the tx ids of the block records are known after insertion
+        if tx_rows:
+            self._ensure_columns(self.database[self.tx_table], tx_rows)
+            ensure_index(self.database[self.tx_table], "block_height")
+        if blocks:
+            self._ensure_columns(self.database[self.table], pad_rows([block.get_db_record(tx_ids=[0])
+                                                                      for block in blocks]))
+            ensure_index(self.database[self.table], "height")
+        records = []
+        with self.database as db_tx:
+            txs = db_tx[self.tx_table]
+            if txs.exists:
+                txs.delete(block_height={'>=': start})
+            if tx_rows:
+                db_tx.executable.execute(txs.table.insert(), tx_rows)
+            tx_ids = defaultdict(list)
+            for row in txs.find(block_height={'>=': start}, order_by="id"):
+                tx_ids[row["block_height"]].append(row["id"])
+            # the rows above the tip are deleted first, so the ids of the inserted rows follow the heights
+            db_tx[self.table].delete(height={'>=': len(chain)})
+            if blocks:
+                records = pad_rows([block.get_db_record(tx_ids=tx_ids[block.height]) for block in blocks])
+                self._write_blocks(db_tx[self.table], records)
+        for block in blocks:
+            block.dirty = False
+        self.height = len(chain)
+        return len(records) + len(tx_rows)
+
+    def _write_blocks(self, table, records: list[dict]):
+        """Update the rows of the persisted heights and insert the others, each by one executemany."""
+        updates = [record for record in records if record["height"] < self.height]
+        inserts = [record for record in records if record["height"] >= self.height]
+        if updates:
+            table.update_many(updates, ["height"])
+        if inserts:
+            table.db.executable.execute(table.table.insert(), inserts)
+
+    def load_transactions(self, height: int) -> list[Tx]:
+        """Load the transactions of the block of a height in the order of insertion."""
+        return [Tx.from_dict(row) for row in self.database[self.tx_table].find(block_height=height, order_by="id")]
+
+    def load(self, lazy: bool = True) -> list[Block]:
+        """Load the main chain in height order, the block rows and transaction rows are streamed by ordered queries.
+
+        Args:
+            lazy: defer the transactions of every block until they are accessed, otherwise they are merged from a
+                single query of all transactions ordered by block height
+
+        Returns:
+            main chain from the genesis block
+        """
+        chain = []
+        block_rows = self.database[self.table].find(order_by="height")
+        if lazy:
+            ensure_index(self.database[self.tx_table], "block_height")
+            for row in block_rows:
+                block = Block.from_db(row)
+                if row.get("transactions"):
+                    block.defer_transactions(partial(self.load_transactions, block.height))
+                chain.append(block)
+        else:
+            # both queries are in height order, so the transactions of every block are merged in a single pass
+            tx_rows = iter(self.database[self.tx_table].find(block_height={'>=': 0}, order_by=["block_height", "id"]))
+            tx_row = next(tx_rows, None)
+            for row in block_rows:
+                block = Block.from_db(row)
+                while tx_row is not None and tx_row["block_height"] < block.height:
+                    tx_row = next(tx_rows, None)
+                while tx_row is not None and tx_row["block_height"] == block.height:
+                    block.transactions.append(Tx.from_dict(tx_row))
+                    tx_row = next(tx_rows, None)
+                chain.append(block)
+        self.height = len(chain)
+        return chain
@@ -0,0 +1,118 @@
+"""
+Persistent schedule of the future public keys.
+
+The public key of every block is derived from the public key of the previous block, so the whole chain of future keys
+is known once the tip is known, as long as the difficulty and the block version stay the same. The node precomputes
+this chain ahead of the tip and stores it in an indexed table keyed by height, so that a wallet encrypting a message
+for a far-future block can fetch the key, or the nearest cached checkpoint below it, instead of deriving thousands of
+keys in a row.
+"""
+from typing import Optional
+import crypto.elgamal as elgamal
+from blockchain.block import Block, derive_public_key
+
+
+def pub_key_record(height: int, public_key: elgamal.PublicKey, version: int) -> dict:
+    """Dump a scheduled public key as dict for database insertion and json responses."""
+    return {
+        "height": height,
+        "p": hex(public_key.p),
+        "g": hex(public_key.g),
+        "h": hex(public_key.h),
+        "bit_length": public_key.bit_length,
+        "version": version
+    }
+
+
+def pub_key_from_record(record: dict) -> elgamal.PublicKey:
+    """Load a scheduled public key from its database record or json response."""
+    return elgamal.PublicKey(int(record["p"], 16), int(record["g"], 16), int(record["h"], 16),
+                             bit_length=record["bit_length"])
+
+
+class KeySchedule(object):
+    """Public keys derived ahead of the tip, persisted in a database table indexed by height."""
+    def __init__(self, database, ahead: int = 2880, table: str = "pubkeys",
+                 search: elgamal.ParallelSafePrimeSearch = None):
+        """Init key schedule.
+
+        Args:
+            database: dataset database of the node
+            ahead: number of public keys derived ahead of the tip
+            table: name of the table of scheduled keys
+            search: optional process pool of the v2 safe prime search
+        """
+        self.database = database
+        self.ahead = ahead
+        # the height is the primary key, so the keys are indexed by height
+        self.table = database.create_table(table, primary_id="height", primary_type=database.types.bigint)
+        self.search = search
+
+    def head(self) -> Optional[int]:
+        """Height of the last scheduled public key."""
+        record = self.table.find_one(order_by="-height")
+        return record["height"] if record else None
+
+    def get(self, height: int) -> Optional[elgamal.PublicKey]:
+        """Get the scheduled public key of the block with the given height."""
+        record = self.table.find_one(height=height)
+        return pub_key_from_record(record) if record else None
+
+    def nearest(self, height: int) -> Optional[dict]:
+        """Get the record of the scheduled key with the greatest height not greater than the given height."""
+        return self.table.find_one(height={"<=": height}, order_by="-height")
+
+    def range(self, start: int, end: int) -> list[dict]:
+        """Get the records of the scheduled keys with heights in [start, end)."""
+        return [pub_key_record(record["height"], pub_key_from_record(record), record["version"])
+                for record in self.table.find(height={"between": [start, end - 1]}, order_by="height")]
+
+    def advance(self, block: Block, max_keys: int = None) -> int:
+        """Anchor the schedule on a new tip and derive the missing keys ahead of it.
+
+        The keys already scheduled are kept if the key of the tip matches its scheduled key, otherwise the schedule
+        above the tip is derived again, e.g. after a change of difficulty or block version.
+
+        Args:
+            block: the new tip of the chain
+            max_keys: max number of keys derived in this call, so that the caller is not blocked for too long
+
+        Returns:
+            number of derived keys
+        """
+        scheduled = self.get(block.height)
+        if scheduled is None or scheduled != block.public_key:
+            with self.database as tx:
+                tx[self.table.name].delete(height={">=": block.height})
+                tx[self.table.name].insert(pub_key_record(block.height, block.public_key, block.version))
+        head = self.head()
+        head_record = self.table.find_one(height=head)
+        pub_key = pub_key_from_record(head_record)
+        target = block.height + self.ahead
+        if max_keys is not None:
+            target = min(target, head + max_keys)
+        records = []
+        for height in range(head + 1, target + 1):
+            pub_key = derive_public_key(pub_key, pub_key.bit_length, block.version, self.search)
+            records.append(pub_key_record(height, pub_key, block.version))
+        if records:
+            self.table.insert_many(records)
+        return len(records)
+
+
+def derive_from_checkpoint(checkpoint: dict, height: int,
+                           search: elgamal.ParallelSafePrimeSearch = None) -> elgamal.PublicKey:
+    """Derive the public key of a future block from the nearest scheduled key below it.
+
+    Args:
+        checkpoint: record of a scheduled key with height not greater than the given height
+        height: height of the future block
+        search: optional process pool of the v2 safe prime search
+
+    Returns:
+        public key of the future block
+    """
+    pub_key = pub_key_from_record(checkpoint)
+    for _ in range(height - checkpoint["height"]):
+        pub_key = derive_public_key(pub_key, pub_key.bit_length, checkpoint["version"], search)
+    return pub_key
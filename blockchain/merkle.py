@@ -0,0 +1,106 @@
+"""
+Merkle tree of the transactions of a block.
+
+The leaves are the SHA-256 hashes of the canonical encodings of the transactions, prefixed by 0x00, and an inner node
+is the SHA-256 hash of its two children, prefixed by 0x01, so that a leaf cannot be passed off as an inner node. A lone
+node at the end of a level is promoted to the next level as it is, instead of being paired with a copy of itself, so
+that two different lists of transactions never share a root.
+
+All levels of the tree are cached, so appending a transaction only rehashes the last node of every level, and an
+inclusion proof is the list of sibling hashes on the path from the leaf to the root.
+"""
+import hashlib
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+# root of the tree without any leaf
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+# side of a sibling hash in an inclusion proof
+LEFT = "left"
+RIGHT = "right"
+
+
+def leaf_hash(data: bytes) -> bytes:
+    """Hash of a leaf with the encoded transaction."""
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash of an inner node with its two children."""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree(object):
+    """Merkle tree with all node hashes cached by level, the leaves are the level 0."""
+    __slots__ = ("levels",)
+
+    def __init__(self, leaves: list[bytes] = ()):
+        """Build the tree.
+
+        Args:
+            leaves: encoded transactions in the order of the block
+        """
+        self.levels = [[leaf_hash(leaf) for leaf in leaves]]
+        # build every level from the level below at once
+        while len(self.levels[-1]) > 1:
+            below = self.levels[-1]
+            level = [node_hash(below[i], below[i + 1]) for i in range(0, len(below) - 1, 2)]
+            if len(below) % 2:
+                level.append(below[-1])
+            self.levels.append(level)
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> bytes:
+        """Root hash of the tree."""
+        return self.levels[-1][0] if self.levels[0] else EMPTY_ROOT
+
+    def append(self, leaf: bytes):
+        """Append an encoded transaction and rehash the path from the new leaf to the root."""
+        self.levels[0].append(leaf_hash(leaf))
+        depth = 0
+        while len(self.levels[depth]) > 1:
+            below = self.levels[depth]
+            if depth + 1 == len(self.levels):
+                self.levels.append([])
+            level = self.levels[depth + 1]
+            # only the last node of every level depends on the new leaf
+            index = (len(below) - 1) // 2
+            node = below[-1] if len(below) % 2 else node_hash(below[-2], below[-1])
+            if index < len(level):
+                level[index] = node
+            else:
+                level.append(node)
+            depth += 1
+
+    def extend(self, leaves: list[bytes]):
+        """Append encoded transactions."""
+        for leaf in leaves:
+            self.append(leaf)
+
+    def proof(self, index: int) -> list[tuple[str, bytes]]:
+        """Inclusion proof of the leaf with the given index.
+
+        Returns:
+            side and hash of the sibling of every node on the path from the leaf to the root, the levels in which the
+            node is promoted without sibling are skipped
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Leaf {index} is not in the tree of {len(self)} leaves")
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append((LEFT if sibling < index else RIGHT, level[sibling]))
+            index //= 2
+        return path
+
+
+def verify_proof(leaf: bytes, proof: list[tuple[str, bytes]], root: bytes) -> bool:
+    """Check the inclusion proof of an encoded transaction against the root of a tree."""
+    node = leaf_hash(leaf)
+    for side, sibling in proof:
+        node = node_hash(sibling, node) if side == LEFT else node_hash(node, sibling)
+    return node == root
@@ -0,0 +1,114 @@
+"""
+Release engine of the time-locked transactions.
+
+Once a block is sealed, its private key is recovered from the solution of the miner, so every cipher locked to the
+height of the block can be decrypted. The engine finds these ciphers by an index on the release height of the
+transactions table, decrypts them in a worker pool and stores the plaintexts in the released table, so that a client
+gets the released messages of a height by a single indexed lookup instead of downloading the key and decrypting the
+ciphers by itself.
+"""
+import itertools
+import multiprocessing
+import crypto.elgamal as elgamal
+
+
+def ensure_index(table, column: str):
+    """Create the index of a column once the column exists, since dataset only creates columns on insertion."""
+    if table.has_column(column) and not table.has_index([column]):
+        table.create_index([column])
+
+
+def _decrypt_ciphers(args: tuple) -> list[tuple]:
+    """Decrypt a chunk of ciphers and return the message or the error of every cipher."""
+    private_key, ciphers = args
+    results = []
+    for cipher in ciphers:
+        try:
+            results.append((elgamal.decrypt(private_key, cipher), None))
+        except ValueError as err:
+            # a malformed cipher or a cipher locked to another key shall not block the release of the others
+            results.append((None, str(err) or type(err).__name__))
+    return results
+
+
+class ReleaseEngine(object):
+    """Decrypt the ciphers of the transactions locked to a sealed block and store the released messages."""
+    def __init__(self, database, workers: int = 1, chunk_size: int = 64, table: str = "released"):
+        """Init release engine.
+
+        Args:
+            database: dataset database of the node
+            workers: number of worker processes, the ciphers are decrypted in the calling process if 1
+            chunk_size: number of ciphers per task of the process pool
+            table: name of the table of released messages
+        """
+        self.database = database
+        self.workers = workers
+        self.chunk_size = chunk_size
+        # the id of the transaction is the primary key, so a message is only released once
+        self.table = database.create_table(table, primary_id="tx_id", primary_type=database.types.bigint)
+        self.pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Terminate the process pool."""
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def pending(self, height: int) -> list[dict]:
+        """Get the transactions with ciphers locked to the given height."""
+        txs = self.database["transactions"]
+        if not txs.has_column("release_block_idx"):
+            return []
+        ensure_index(txs, "release_block_idx")
+        return [tx for tx in txs.find(release_block_idx=height, order_by="id") if tx.get("cipher")]
+
+    def decrypt(self, private_key: elgamal.PrivateKey, ciphers: list[str]) -> list[tuple]:
+        """Decrypt the ciphers, in the process pool if there are more ciphers than a chunk."""
+        if self.pool is None or len(ciphers) <= self.chunk_size:
+            return _decrypt_ciphers((private_key, ciphers))
+        chunks = [(private_key, ciphers[i:i + self.chunk_size]) for i in range(0, len(ciphers), self.chunk_size)]
+        return list(itertools.chain.from_iterable(self.pool.map(_decrypt_ciphers, chunks)))
+
+    def release(self, height: int, private_key: elgamal.PrivateKey) -> int:
+        """Release the messages locked to the block of the given height.
+
+        The released messages of the height are replaced, e.g. if the block has been replaced by a longer chain.
+
+        Args:
+            height: height of the sealed block
+            private_key: private key recovered from the solution of the block
+
+        Returns:
+            number of released messages
+        """
+        txs = self.pending(height)
+        results = self.decrypt(private_key, [tx["cipher"] for tx in txs])
+        records = [{"tx_id": tx["id"],
+                    "height": height,
+                    "addr_from": tx["addr_from"],
+                    "addr_to": tx["addr_to"],
+                    "message": message,
+                    "error": error} for tx, (message, error) in zip(txs, results)]
+        if not self.table.has_column("height"):
+            # the first release creates the columns, which shall not be changed inside a transaction
+            self.table.insert_many(records)
+        else:
+            with self.database as db_tx:
+                db_tx[self.table.name].delete(height=height)
+                db_tx[self.table.name].insert_many(records)
+        ensure_index(self.table, "height")
+        return sum(1 for record in records if record["error"] is None)
+
+    def get(self, height: int) -> list[dict]:
+        """Get the released messages of the given height."""
+        if not self.table.has_column("height"):
+            return []
+        return list(self.table.find(height=height, order_by="tx_id"))
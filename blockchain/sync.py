@@ -0,0 +1,195 @@
+"""
+Headers-first incremental sync of the chain with the peer nodes.
+
+Every peer is polled for its last block concurrently, and only a peer with a longer chain is synced. The headers of the
+peer are fetched backwards from the local tip until they link to the local chain, so the fork point is found with a
+number of requests which grows with the depth of the fork instead of the length of the chain. The headers are validated
+before any block body is requested, then the bodies of the missing height range are fetched in concurrent ranges. The
+peers are queried over pooled keep-alive sessions, which are kept across sync rounds.
+"""
+import json
+from binascii import unhexlify
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from blockchain.block import Block
+from blockchain.transaction import Tx
+from blockchain.validator import ChainValidator, block_hash, validate_link
+
+
+def parse_peers(peer_nodes: Optional[str]) -> list[str]:
+    """Parse the peer node urls from a json list or a comma separated string, e.g. of the PEER_NODES variable."""
+    if not peer_nodes:
+        return []
+    peer_nodes = peer_nodes.strip()
+    if peer_nodes.startswith('['):
+        return [str(peer) for peer in json.loads(peer_nodes)]
+    return [peer.strip() for peer in peer_nodes.split(',') if peer.strip()]
+
+
+def block_from_json(record: dict) -> Block:
+    """Load a block from its json record of the /blocks or /headers endpoint, the hashes are hex strings."""
+    record = dict(record)
+    for field in ("prev_block_hash", "header_hash"):
+        if record.get(field):
+            record[field] = unhexlify(record[field])
+    block = Block.from_db(record)
+    if isinstance(record.get("transactions"), list):
+        block.transactions = [Tx.from_dict(tx) for tx in record["transactions"]]
+    # the block of a peer is not in the database of this node
+    block.dirty = True
+    return block
+
+
+def fork_index(old_chain: list[Block], new_chain: list[Block]) -> int:
+    """Number of leading blocks shared by the old and the new chain, which are the same objects after a sync."""
+    fork = min(len(old_chain), len(new_chain))
+    while fork > 0 and old_chain[fork - 1] is not new_chain[fork - 1]:
+        fork -= 1
+    return fork
+
+
+class ChainSync(object):
+    """Sync the chain with the longest valid chain of the peer nodes."""
+    def __init__(self, peers: list[str], workers: int = 8, batch: int = 500, timeout: float = 10,
+                 validator: ChainValidator = None):
+        """Init chain sync.
+
+        Args:
+            peers: urls of the peer nodes
+            workers: number of concurrent requests
+            batch: max number of blocks per request
+            timeout: timeout in seconds of a request
+            validator: optional full validator of the synced chain, only the header links are validated if None
+        """
+        self.peers = peers
+        self.validator = validator
+        self.batch = batch
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # a keep-alive session per peer with a connection for every concurrent request
+        self.sessions = {}
+        for peer in peers:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.sessions[peer] = session
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the sessions and the request threads."""
+        self.executor.shutdown(wait=False)
+        for session in self.sessions.values():
+            session.close()
+
+    def _get(self, peer: str, path: str, params: dict = None):
+        """GET the json response of a peer."""
+        res = self.sessions[peer].get(peer + path, params=params, timeout=self.timeout)
+        res.raise_for_status()
+        return res.json()
+
+    def _fetch(self, peer: str, path: str, start: int, end: int) -> list[Block]:
+        """Fetch the blocks or headers of the heights in [start, end) in concurrent requests of a batch each."""
+        ranges = [(i, min(i + self.batch, end)) for i in range(start, end, self.batch)]
+        responses = self.executor.map(lambda r: self._get(peer, path, {"start": r[0], "end": r[1]}), ranges)
+        blocks = [block_from_json(record) for response in responses for record in response]
+        if [block.height for block in blocks] != list(range(start, end)):
+            raise ValueError(f"Peer {peer} sent an incomplete range [{start}, {end})")
+        return blocks
+
+    def poll(self) -> dict[str, int]:
+        """Poll the height of the last block of every peer concurrently, the unreachable peers are left out."""
+        def last_height(peer):
+            try:
+                return self._get(peer, "/last")["height"]
+            except (requests.RequestException, ValueError, KeyError):
+                return None
+        heights = self.executor.map(last_height, self.peers)
+        return {peer: height for peer, height in zip(self.peers, heights) if height is not None}
+
+    def fetch_headers(self, peer: str, start: int, end: int) -> list[Block]:
+        """Fetch the headers of the heights in [start, end) without transactions."""
+        return self._fetch(peer, "/headers", start, end)
+
+    def fetch_blocks(self, peer: str, start: int, end: int) -> list[Block]:
+        """Fetch the blocks of the heights in [start, end) with transactions."""
+        return self._fetch(peer, "/blocks", start, end)
+
+    def find_fork(self, peer: str, chain: list[Block], peer_height: int) -> Optional[tuple[int, list[Block]]]:
+        """Fetch the headers of the peer backwards from the local tip until they link to the local chain.
+
+        Returns:
+            fork height, which is the first height of the peer chain not in the local chain, and the headers of the
+            peer from the fork height, or None if the peer chain does not link to the local chain above genesis
+        """
+        end = peer_height + 1
+        start = len(chain)
+        headers = []
+        step = 1
+        while True:
+            headers = self.fetch_headers(peer, start, end) + headers
+            end = start
+            # skip the headers which are already in the local chain
+            known = 0
+            while known < len(headers) and headers[known].height < len(chain) and \
+                    block_hash(headers[known]) == block_hash(chain[headers[known].height]):
+                known += 1
+            headers = headers[known:]
+            if headers and headers[0].prev_block_hash == block_hash(chain[headers[0].height - 1]):
+                return headers[0].height, headers
+            if start <= 1:
+                return None
+            # walk back twice as far in every round, the genesis block is shared by all chains
+            start = max(1, start - step)
+            step *= 2
+
+    def sync_peer(self, peer: str, chain: list[Block], peer_height: int) -> Optional[list[Block]]:
+        """Sync the local chain with a peer chain.
+
+        Returns:
+            the local blocks below the fork height and the validated blocks of the peer from the fork height, or None
+            if the peer chain is not valid
+        """
+        found = self.find_fork(peer, chain, peer_height)
+        if found is None:
+            return None
+        fork, headers = found
+        # validate the headers before downloading the bodies
+        prev_block = chain[fork - 1]
+        for header in headers:
+            if not validate_link(prev_block, header):
+                return None
+            prev_block = header
+        blocks = self.fetch_blocks(peer, fork, peer_height + 1)
+        if [block_hash(block) for block in blocks] != [block_hash(header) for header in headers]:
+            # the bodies do not match the validated headers, e.g. the peer chain has changed meanwhile
+            return None
+        new_chain = chain[:fork] + blocks
+        if self.validator and not self.validator.validate(new_chain):
+            return None
+        return new_chain
+
+    def sync(self, chain: list[Block]) -> Optional[list[Block]]:
+        """Sync the local chain with the longest valid peer chain which is longer than the local chain.
+
+        Returns:
+            the new chain, or None if no peer has a longer valid chain
+        """
+        heights = self.poll()
+        for peer in sorted(heights, key=heights.get, reverse=True):
+            if heights[peer] < len(chain):
+                break
+            try:
+                new_chain = self.sync_peer(peer, chain, heights[peer])
+            except (requests.RequestException, ValueError, KeyError):
+                continue
+            if new_chain is not None:
+                return new_chain
+        return None
@@ -1,6 +1,13 @@
+import json
+
+# encoder of the canonical tx encoding, which is shared since json.dumps creates an encoder for every call with options
+CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'), ensure_ascii=False)
 
 
 class Tx:
+    # the transactions of all blocks are kept in memory by the miner, so the attributes are slotted
+    __slots__ = ("version", "addr_from", "addr_to", "amount", "cipher", "release_block_idx")
+
     def __init__(self,
                  addr_from: str,
                  addr_to: str,
@@ -11,7 +18,7 @@ class Tx:
         self.addr_from = addr_from
         self.addr_to = addr_to
         self.amount = amount
-        # time release message
+        # time release message, the header of the cipher string selects its format, see elgamal.decrypt
         self.cipher = cipher
         # now only support single release block
         # TODO: support release the message in a range of block
@@ -29,6 +36,27 @@ class Tx:
         else:
             return Tx(addr_from, addr_to, amount)
 
+    def to_dict(self) -> dict:
+        """Dump the transaction as a new dict for database insertion and json transport."""
+        return {
+            "version": self.version,
+            "addr_from": self.addr_from,
+            "addr_to": self.addr_to,
+            "amount": self.amount,
+            "cipher": self.cipher,
+            "release_block_idx": self.release_block_idx
+        }
+
+    def encode(self) -> bytes:
+        """Canonical encoding of the transaction for the Merkle tree of the block.
+
+        The fields are dumped as compact json with sorted keys, and the amount is normalized to an integer, since it
+        is received as string from the wallet but stored as integer in the database.
+        """
+        tx = self.to_dict()
+        tx["amount"] = int(tx["amount"])
+        return CANONICAL_ENCODER.encode(tx).encode('utf-8')
+
     @classmethod
     def coinbase(cls, miner_address: str, reward: int):
         """
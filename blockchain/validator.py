@@ -0,0 +1,163 @@
+"""
+Validation of the blocks of a chain.
+
+Each block is checked against its previous block only, so the blocks of a long chain are validated in independent
+chunks by a process pool. The hash of a block commits to all blocks below it, so the validator remembers the height
+verified for every tip hash, and a chain which extends a verified tip is only validated above it.
+"""
+import multiprocessing
+from collections import OrderedDict
+from typing import Optional
+import crypto.elgamal as elgamal
+from blockchain.block import Block, derive_public_key
+from mining.pollard_rho_hash import PRMiner
+
+
+def block_hash(block: Block) -> bytes:
+    """Header hash of a block, which is cached for a sealed block or a block loaded from database or json."""
+    return block.current_block_hash or block.hash_header()
+
+
+def validate_link(prev_block: Block, block: Block) -> bool:
+    """Validate a block against its previous block.
+
+    The block shall follow the previous block by height and header hash, and its nonce shall match the solution of the
+    miner, i.e. f(hash(header, nonce), nonce) == g^a1 * h^b1 == g^a2 * h^b2 mod p.
+
+    Args:
+        prev_block: the previous block of the chain
+        block: the block to be validated
+
+    Returns:
+        True if the block is valid
+    """
+    if block.height != prev_block.height + 1 or block.prev_block_hash != block_hash(prev_block):
+        # the blocks are not chained
+        return False
+    if block.solution is None or block.nonce is None:
+        return False
+    v_miner = PRMiner(block)
+    v_pub_key = block.public_key
+    v_solution = block.solution
+    # test value is g^a & h^b
+    bases = [v_pub_key.g, v_pub_key.h]
+    test_val_1 = elgamal.multi_exp(bases, [v_solution.a1, v_solution.b1], v_pub_key.p)
+    test_val_2 = elgamal.multi_exp(bases, [v_solution.a2, v_solution.b2], v_pub_key.p)
+    if test_val_1 != test_val_2:
+        return False
+    # validate nonce value to match the solution
+    header_hash = v_miner.header_hash(block.nonce)
+    f_value = v_miner.func_f(header_hash, block.nonce)
+    return f_value == test_val_1
+
+
+def validate_block(prev_block: Block, block: Block) -> bool:
+    """Fully validate a block against its previous block.
+
+    Besides the link and the solution of validate_link, the public key of the block shall be derived from the public
+    key of the previous block, which is the most expensive check for a large key.
+
+    Args:
+        prev_block: the previous block of the chain
+        block: the block to be validated
+
+    Returns:
+        True if the block is valid
+    """
+    if not validate_link(prev_block, block):
+        return False
+    return block.public_key == derive_public_key(prev_block.public_key, block.difficulty, block.version)
+
+
+def _first_invalid(blocks: list[Block]) -> Optional[int]:
+    """Validate every block of a chunk against the block before it, the first block of the chunk is not validated.
+
+    Returns:
+        index in the chunk of the first invalid block, or None if all blocks are valid
+    """
+    for i in range(1, len(blocks)):
+        if not validate_block(blocks[i - 1], blocks[i]):
+            return i
+    return None
+
+
+class ChainValidator(object):
+    """Validate all blocks of a chain, the blocks below a verified tip are not validated again.
+
+    With more than one worker, the blocks are validated in chunks by a process pool, which is kept across calls, so
+    close the validator or use it as a context manager.
+    """
+    def __init__(self, workers: int = 1, chunk_size: int = 16, max_checkpoints: int = 1024):
+        """Init the chain validator.
+
+        Args:
+            workers: number of worker processes, the blocks are validated in the calling process if 1
+            chunk_size: number of blocks per task of the process pool
+            max_checkpoints: max number of verified tips, the least recently used tips are dropped
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_checkpoints = max_checkpoints
+        # verified height by the header hash of the tip of a verified chain
+        self.checkpoints = OrderedDict()
+        self.pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Terminate the process pool."""
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def _checkpoint(self, block: Block):
+        """Record a block as the tip of a verified chain."""
+        tip_hash = block_hash(block)
+        self.checkpoints[tip_hash] = block.height
+        self.checkpoints.move_to_end(tip_hash)
+        while len(self.checkpoints) > self.max_checkpoints:
+            self.checkpoints.popitem(last=False)
+
+    def verified_height(self, chain: list[Block]) -> int:
+        """Highest height of the chain which has been verified, the genesis block is trusted.
+
+        The chain is searched down from its tip, so the search is as long as the blocks added since the last check.
+        """
+        for block in reversed(chain):
+            if block.height == 0:
+                return 0
+            tip_hash = block_hash(block)
+            if tip_hash in self.checkpoints:
+                self.checkpoints.move_to_end(tip_hash)
+                return self.checkpoints[tip_hash]
+        return 0
+
+    def validate(self, chain: list[Block]) -> bool:
+        """Validate the blocks of the chain above its verified height.
+
+        Args:
+            chain: blocks of the chain from the genesis block
+
+        Returns:
+            True if all blocks of the chain are valid
+        """
+        start = self.verified_height(chain)
+        if start >= len(chain) - 1:
+            return True
+        # the chunks overlap by one block, which is the previous block of the first block validated by the chunk
+        chunks = [chain[i:i + self.chunk_size + 1] for i in range(start, len(chain) - 1, self.chunk_size)]
+        if self.pool is None or len(chunks) == 1:
+            results = map(_first_invalid, chunks)
+        else:
+            results = self.pool.imap(_first_invalid, chunks)
+        for chunk in chunks:
+            if next(results) is not None:
+                return False
+            # the chunks are validated in order, so the chain is verified up to the end of every valid chunk
+            self._checkpoint(chunk[-1])
+        return True
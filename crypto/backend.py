@@ -0,0 +1,174 @@
+"""
+Big integer arithmetic backend for the crypto system and the miner.
+
+gmpy2 is used if it is installed, otherwise the built-in Python int is used. The backend is selected at import time
+and can be forced with the ARITH_BACKEND environment variable ("gmpy2" or "python"). Every function returns a Python
+int, so that keys and ciphers are serialized in the same way with both backends.
+
+Modules shall call the functions through this module, e.g. backend.powmod(...), so that set_backend() takes effect.
+"""
+import math
+from os import environ
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+PYTHON = "python"
+GMPY2 = "gmpy2"
+
+
+def _py_powmod(base: int, exp: int, modulus: int) -> int:
+    return pow(base, exp, modulus)
+
+
+def _py_invert(a: int, modulus: int) -> int:
+    return pow(a, -1, modulus)
+
+
+def _py_jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) for odd n > 0."""
+    a %= n
+    result = 1
+    while a != 0:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _py_is_strong_probable_prime(n: int, base: int) -> bool:
+    """Strong Fermat (Miller-Rabin) test of odd n > 2 for a single base."""
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _py_is_strong_lucas_probable_prime(n: int) -> bool:
+    """Strong Lucas test of odd n > 2 with Selfridge's parameters."""
+    # find D in 5, -7, 9, -11, ... with jacobi(D, n) == -1
+    d = 5
+    while True:
+        jacobi_d = _py_jacobi(d, n)
+        if jacobi_d == -1:
+            break
+        if jacobi_d == 0 and abs(d) != n:
+            return False
+        d = -d - 2 if d > 0 else -d + 2
+        if d == 13 and math.isqrt(n) ** 2 == n:
+            # Selfridge's search never ends for perfect squares
+            return False
+    q = (1 - d) // 4
+    # n + 1 = k * 2^s with odd k
+    k = n + 1
+    s = 0
+    while k % 2 == 0:
+        k //= 2
+        s += 1
+    # compute U_k, V_k and Q^k by the binary expansion of k, with P = 1
+    u, v, q_k = 0, 2, 1
+    half = (n + 1) // 2
+    for bit in bin(k)[2:]:
+        # doubling
+        u = u * v % n
+        v = (v * v - 2 * q_k) % n
+        q_k = q_k * q_k % n
+        if bit == '1':
+            # add one: U_(m+1) = (U_m + V_m) / 2, V_(m+1) = (D * U_m + V_m) / 2
+            u, v = (u + v) * half % n, (d * u + v) * half % n
+            q_k = q_k * q % n
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v = (v * v - 2 * q_k) % n
+        q_k = q_k * q_k % n
+        if v == 0:
+            return True
+    return False
+
+
+def _py_is_prime(n: int) -> bool:
+    """Baillie-PSW primality test, which has no known pseudoprime."""
+    if n < 2:
+        return False
+    for prime in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % prime == 0:
+            return n == prime
+    return _py_is_strong_probable_prime(n, 2) and _py_is_strong_lucas_probable_prime(n)
+
+
+def _gmpy2_powmod(base: int, exp: int, modulus: int) -> int:
+    return int(gmpy2.powmod(base, exp, modulus))
+
+
+def _gmpy2_invert(a: int, modulus: int) -> int:
+    return int(gmpy2.invert(a, modulus))
+
+
+def _gmpy2_jacobi(a: int, n: int) -> int:
+    return int(gmpy2.jacobi(a, n))
+
+
+def _gmpy2_is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    return bool(gmpy2.is_bpsw_prp(n))
+
+
+def _py_gcd(a: int, b: int) -> int:
+    return math.gcd(a, b)
+
+
+def _gmpy2_gcd(a: int, b: int) -> int:
+    return int(gmpy2.gcd(a, b))
+
+
+BACKEND = None
+powmod = _py_powmod
+invert = _py_invert
+gcd = _py_gcd
+jacobi = _py_jacobi
+is_prime = _py_is_prime
+
+
+def available_backends() -> list[str]:
+    """Names of the backends which can be used in this environment."""
+    return [PYTHON, GMPY2] if gmpy2 is not None else [PYTHON]
+
+
+def set_backend(name: str):
+    """Select the arithmetic backend.
+
+    Args:
+        name: "gmpy2" or "python"
+    """
+    global BACKEND, powmod, invert, gcd, jacobi, is_prime
+    if name == GMPY2:
+        if gmpy2 is None:
+            raise ValueError("gmpy2 is not installed!")
+        powmod, invert, gcd, jacobi, is_prime = _gmpy2_powmod, _gmpy2_invert, _gmpy2_gcd, _gmpy2_jacobi, \
+            _gmpy2_is_prime
+    elif name == PYTHON:
+        powmod, invert, gcd, jacobi, is_prime = _py_powmod, _py_invert, _py_gcd, _py_jacobi, _py_is_prime
+    else:
+        raise ValueError(f"Unknown arithmetic backend {name}!")
+    BACKEND = name
+
+
+set_backend(environ.get("ARITH_BACKEND", GMPY2 if gmpy2 is not None else PYTHON))
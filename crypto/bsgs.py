@@ -0,0 +1,189 @@
+"""
+Memory-bounded baby-step giant-step search of the private key.
+
+The baby steps g^j (0 <= j < m) are kept in a sorted NumPy uint64 array with a uint32 array of their exponents, which
+is 12 bytes per baby step instead of about 100 bytes per entry of a Python dict. The number of baby steps m is limited
+by a budget: a smaller table needs (p - 1) / m giant steps, so memory is traded for time. The giant steps
+h * g^(-m*i) are split into ranges, which are searched in chunks with np.searchsorted by a pool of forked processes.
+If NumPy is not installed or p has more than 64 bits, the search falls back to the dict based
+elgamal.bsgs_search_private_key.
+"""
+import math
+import multiprocessing
+from typing import Optional
+from crypto import backend
+from crypto.elgamal import PublicKey, PrivateKey, bsgs_search_private_key
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# max bit length of p, so that every residue fits in uint64
+MAX_TABLE_BITS = 64
+# default max number of baby steps, about 200 MB of table
+DEFAULT_BABY_STEPS = 2 ** 24
+# number of giant steps searched by one np.searchsorted call
+GIANT_CHUNK = 4096
+
+
+def compact_available(bit_length: int) -> bool:
+    """Test if the compact table can be used for a prime p with the given bit length."""
+    return np is not None and bit_length <= MAX_TABLE_BITS
+
+
+class BabyStepTable(object):
+    """Sorted table of the baby steps g^j mod p for 0 <= j < m."""
+    def __init__(self, g: int, p: int, m: int, chunk: int = 2 ** 16):
+        """Build the table.
+
+        Args:
+            g: generator
+            p: prime modulus with no more than 64 bits
+            m: number of baby steps
+            chunk: number of baby steps converted to a NumPy array at a time, which bounds the transient memory
+        """
+        self.g = g
+        self.p = p
+        self.m = m
+        values = np.empty(m, dtype=np.uint64)
+        current = 1
+        for start in range(0, m, chunk):
+            steps = []
+            for _ in range(min(chunk, m - start)):
+                steps.append(current)
+                current = current * g % p
+            values[start:start + len(steps)] = steps
+        order = np.argsort(values, kind='stable')
+        self.values = values[order]
+        del values
+        self.exponents = order.astype(np.uint32 if m <= 2 ** 32 else np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the table in bytes."""
+        return self.values.nbytes + self.exponents.nbytes
+
+    def lookup(self, giants: list[int]) -> Optional[tuple[int, int]]:
+        """Search a chunk of giant steps in the table.
+
+        Returns:
+            index of the first giant step found in the table and the exponent of its baby step, or None
+        """
+        keys = np.array(giants, dtype=np.uint64)
+        pos = np.searchsorted(self.values, keys)
+        pos[pos == self.m] = 0
+        hits = np.flatnonzero(self.values[pos] == keys)
+        if hits.size == 0:
+            return None
+        k = int(hits[0])
+        return k, int(self.exponents[pos[k]])
+
+
+# the table of the forked giant step workers, inherited from the parent process
+_worker_table: Optional[BabyStepTable] = None
+
+
+def _init_worker(table: BabyStepTable):
+    global _worker_table
+    _worker_table = table
+
+
+def _giant_steps(table: BabyStepTable, h: int, start: int, end: int) -> Optional[int]:
+    """Search the giant steps h * g^(-m*i) for start <= i < end.
+
+    Returns:
+        the discrete logarithm of h, or None if it is not in the range
+    """
+    p = table.p
+    factor = backend.powmod(backend.invert(table.g, p), table.m, p)
+    current = h * backend.powmod(factor, start, p) % p
+    for chunk_start in range(start, end, GIANT_CHUNK):
+        giants = []
+        for _ in range(min(GIANT_CHUNK, end - chunk_start)):
+            giants.append(current)
+            current = current * factor % p
+        found = table.lookup(giants)
+        if found:
+            k, j = found
+            return (chunk_start + k) * table.m + j
+    return None
+
+
+def _giant_steps_worker(args: tuple[int, int, int]) -> Optional[int]:
+    return _giant_steps(_worker_table, *args)
+
+
+class BSGSSolver(object):
+    """Baby-step giant-step solver with a bounded baby step table and parallel giant steps."""
+    def __init__(self, pubkey: PublicKey, baby_steps: int = DEFAULT_BABY_STEPS, workers: int = 1,
+                 ranges_per_worker: int = 16):
+        """Build the baby step table of the generator g.
+
+        Args:
+            pubkey: public key, the table is reusable for all keys with the same p and g
+            baby_steps: max number of baby steps, the table takes 12 bytes per baby step
+            workers: number of processes searching the giant steps
+            ranges_per_worker: number of giant step ranges per worker, so that a found key stops the other workers early
+        """
+        order = pubkey.p - 1
+        self.p = pubkey.p
+        self.g = pubkey.g
+        self.order = order
+        self.m = max(1, min(math.isqrt(order) + 1, baby_steps))
+        self.giants = -(-order // self.m)
+        self.workers = max(1, workers)
+        self.ranges = self.workers * ranges_per_worker if self.workers > 1 else 1
+        self.table = BabyStepTable(self.g, self.p, self.m)
+
+    @property
+    def memory(self) -> int:
+        """Memory used by the baby step table in bytes."""
+        return self.table.nbytes
+
+    def _ranges(self, h: int) -> list[tuple[int, int, int]]:
+        size = -(-self.giants // self.ranges)
+        return [(h, start, min(start + size, self.giants)) for start in range(0, self.giants, size)]
+
+    def solve(self, h: int) -> Optional[int]:
+        """Find x with g^x = h mod p.
+
+        Returns:
+            the discrete logarithm in [0, p - 1), or None if h is not generated by g
+        """
+        if self.workers == 1:
+            x = _giant_steps(self.table, h, 0, self.giants)
+            return x % self.order if x is not None else None
+        context = multiprocessing.get_context("fork")
+        with context.Pool(self.workers, initializer=_init_worker, initargs=(self.table,)) as pool:
+            for x in pool.imap(_giant_steps_worker, self._ranges(h)):
+                if x is not None:
+                    pool.terminate()
+                    return x % self.order
+        return None
+
+    def search_private_key(self, pubkey: PublicKey) -> Optional[PrivateKey]:
+        """Find the private key of a public key with the same p and g as the table."""
+        if pubkey.p != self.p or pubkey.g != self.g:
+            raise ValueError("The public key does not match the baby step table!")
+        x = self.solve(pubkey.h)
+        if x is None:
+            return None
+        return PrivateKey(pubkey.p, pubkey.g, x, bit_length=pubkey.bit_length)
+
+
+def compact_bsgs_search_private_key(pubkey: PublicKey, baby_steps: int = DEFAULT_BABY_STEPS,
+                                    workers: int = 1) -> Optional[PrivateKey]:
+    """BSGS search of the private key with a compact, memory-bounded baby step table.
+
+    Args:
+        pubkey: elgamal public key.
+        baby_steps: max number of baby steps, the table takes 12 bytes per baby step
+        workers: number of processes searching the giant steps
+
+    Returns:
+        paired private key
+    """
+    if not compact_available(pubkey.p.bit_length()):
+        return bsgs_search_private_key(pubkey)
+    return BSGSSolver(pubkey, baby_steps, workers).search_private_key(pubkey)
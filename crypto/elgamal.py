@@ -84,12 +84,22 @@ and get the message I had started with.  But I did not receive the right message
 decrypted it, despite having checked my encrypt and decrypt modules many times.  I fixed this by raising
 s to p-2 instead of -1 in the decryption function.
 """
+import os
+import base64
+import hashlib
+import itertools
+import multiprocessing
+import struct
 from typing import Optional
+from Crypto.Cipher import AES
 from crypto.elgamal_util import *
+from crypto import backend
 from crypto.pollard_rho import pollard_rho
 
 
 class PrivateKey(object):
+    __slots__ = ("p", "g", "x", "bit_length")
+
     def __init__(self, p: int, g: int, x: int, bit_length=0):
         """Init private key structure for elgamal encryption.
 
@@ -112,6 +122,9 @@ class PrivateKey(object):
 
 
 class PublicKey(object):
+    # the keys of all blocks are kept in memory by the miner, so the attributes are slotted without instance dict
+    __slots__ = ("p", "g", "h", "bit_length", "x")
+
     def __init__(self, p: int, g: int, h: int, bit_length=0):
         """Init public key structure for elgamal encryption.
 
@@ -134,9 +147,10 @@ class PublicKey(object):
         keys = key_str.split(',')
         if len(keys) < 3:
             raise ValueError("The input string is not valid")
-        p = int(keys[0], 16)
-        g = int(keys[1], 16)
-        h = int(keys[2], 16)
+        # the fields are in the order of __repr__, which is also hashed by the block header and cannot change
+        g = int(keys[0], 16)
+        h = int(keys[1], 16)
+        p = int(keys[2], 16)
         bit_length = int(keys[3])
         return PublicKey(p, g, h, bit_length=bit_length)
 
@@ -150,6 +164,38 @@ class PublicKey(object):
             return False
 
 
+def encode_bytes(data: bytes, k: int) -> list[int]:
+    """Encodes bytes to integers, k bytes per integer in little endian order.
+
+    Args:
+        data: message bytes
+        k: number of bytes per integer
+
+    Returns:
+        A list of encoded integers, the last one is padded with zero bytes
+    """
+    view = memoryview(data)
+    return [int.from_bytes(view[idx:idx + k], 'little') for idx in range(0, len(view), k)]
+
+
+def decode_bytes(encoded_integers: list[int], k: int, length: int = None) -> bytes:
+    """Decodes integers to the original message bytes, k bytes per integer in little endian order.
+
+    Args:
+        encoded_integers: encoded integers
+        k: number of bytes per integer
+        length: length of the message, the padding of the last integer is kept if it is not given
+
+    Returns:
+        Decoded message bytes.
+    """
+    try:
+        data = b''.join([num.to_bytes(k, 'little') for num in encoded_integers])
+    except OverflowError:
+        raise ValueError("Encoded integer is out of range")
+    return data if length is None else data[:length]
+
+
 def encode(s_plaintext: str, bit_length: int) -> list[int]:
     """Encodes bytes to integers mod p.
     Example
@@ -164,32 +210,10 @@ def encode(s_plaintext: str, bit_length: int) -> list[int]:
     Returns:
         A list of encoded integers
     """
-    byte_array = bytearray(s_plaintext, 'utf-16')
-
-    # z is the array of integers mod p
-    z = []
-
     # each encoded integer will be a linear combination of k message bytes
     # k must be the number of bits in the prime divided by 8 because each
     # message byte is 8 bits long
-    k = bit_length // 8
-
-    # j marks the jth encoded integer
-    # j will start at 0 but make it -k because j will be incremented during first iteration
-    j = -1 * k
-    # num is the summation of the message bytes
-    # num = 0
-    # i iterates through byte array
-    for idx in range(len(byte_array)):
-        # if i is divisible by k, start a new encoded integer
-        if idx % k == 0:
-            j += k
-            # num = 0
-            z.append(0)
-        # add the byte multiplied by 2 raised to a multiple of 8
-        z[j // k] += byte_array[idx] * (2 ** (8 * (idx % k)))
-
-    return z
+    return encode_bytes(s_plaintext.encode('utf-16'), bit_length // 8)
 
 
 def decode(encoded_integers: list[int], bit_length: int) -> str:
@@ -201,11 +225,9 @@ def decode(encoded_integers: list[int], bit_length: int) -> str:
     o              111
     u              117
     if the encoded integer is 7696217 and k = 3
-    m[0] = 7696217 % 256 % 65536 / (2^(8*0)) = 89 = 'Y'
-    7696217 - (89 * (2^(8*0))) = 7696128
-    m[1] = 7696128 % 65536 / (2^(8*1)) = 111 = 'o'
-    7696128 - (111 * (2^(8*1))) = 7667712
-    m[2] = 7667712 / (2^(8*2)) = 117 = 'u'
+    m[0] = 7696217 % 256 = 89 = 'Y'
+    m[1] = 7696217 // 2^8 % 256 = 111 = 'o'
+    m[2] = 7696217 // 2^16 % 256 = 117 = 'u'
 
     Args:
         encoded_integers:
@@ -214,58 +236,39 @@ def decode(encoded_integers: list[int], bit_length: int) -> str:
     Returns:
         Decoded message string.
     """
-    # bytes array will hold the decoded original message bytes
-    bytes_array = []
-
     # same deal as in the encode function.
     # each encoded integer is a linear combination of k message bytes
-    # k must be the number of bits in the prime divided by 8 because each
-    # message byte is 8 bits long
-    k = bit_length // 8
-
-    # num is an integer in list aiPlaintext
-    for num in encoded_integers:
-        # get the k message bytes from the integer, i counts from 0 to k-1
-        for idx in range(k):
-            # temporary integer
-            temp = num
-            # j goes from i+1 to k-1
-            for j in range(idx + 1, k):
-                # get remainder from dividing integer by 2^(8*j)
-                temp = temp % (2 ** (8 * j))
-            # message byte representing a letter is equal to temp divided by 2^(8*i)
-            letter = temp // (2 ** (8 * idx))
-            # add the message byte letter to the byte array
-            bytes_array.append(letter)
-            # subtract the letter multiplied by the power of two from num so
-            # so the next message byte can be found
-            num = num - (letter * (2 ** (8 * idx)))
-
-    decoded_text = bytearray(b for b in bytes_array).decode('utf-16')
-
-    return decoded_text
-
-
-def generate_pub_key(seed: int, bit_length: int, i_confidence=32) -> PublicKey:
+    return decode_bytes(encoded_integers, bit_length // 8).decode('utf-16')
+
+
+def generate_pub_key(seed: int, bit_length: int, i_confidence=32, version: int = 1,
+                     search: Optional[ParallelSafePrimeSearch] = None) -> PublicKey:
     """Generates public key K1 (p, g, h) and private key K2 (p, g, x).
 
     Args:
-        seed:
-        bit_length:
-        i_confidence:
+        seed: random generator seed, which is derived from the previous public key
+        bit_length: number of binary bits of the prime p
+        i_confidence: rounds of the solovay-strassen test of the v1 derivation
+        version: key derivation scheme, 1 for random candidates tested by solovay-strassen, 2 for the sieved search
+            of find_safe_prime tested by BPSW
+        search: optional process pool of the v2 safe prime search, which gives the same key in less time
 
     Returns:
-
+        public key derived from the seed
     """
     # p is the prime
     # g is the primitive root
     # x is random in (0, p-1) inclusive
     # h = g ^ x mod p
 
-    p = find_prime(bit_length, i_confidence, seed)
+    if version == 1:
+        p = find_prime(bit_length, i_confidence, seed)
+    elif version == 2:
+        p = find_safe_prime(bit_length, seed, search)
+    else:
+        raise ValueError(f"Unknown key derivation version {version}!")
     g = find_primitive_root(p, seed)
-    random.seed(seed)
-    h = random.randint(1, p - 1)
+    h = random.Random(seed).randint(1, p - 1)
 
     public_key = PublicKey(p, g, h, bit_length)
 
@@ -335,36 +338,265 @@ def pollard_search_private_key(pubkey: PublicKey) -> Optional[PrivateKey]:
         return None
 
 
-def encrypt(key: PublicKey, s_plaintext: str) -> str:
-    """Encrypts a string using the public key k.
+def random_exponents(count: int, modulus: int) -> list[int]:
+    """Draw random exponents in [1, modulus - 2] from the CSPRNG of the operating system.
+
+    All exponents are drawn by a single os.urandom call with 64 extra bits each, so the modulo bias is negligible.
+
+    Args:
+        count: number of exponents
+        modulus: prime modulus
+
+    Returns:
+        random exponents
+    """
+    size = (modulus.bit_length() + 64 + 7) // 8
+    pool = os.urandom(size * count)
+    return [1 + int.from_bytes(pool[i * size:(i + 1) * size], 'little') % (modulus - 2) for i in range(count)]
+
+
+# a cipher string may start with the header "#<flags>:<fields>:" to select its format, the fields are separated by
+# commas, a cipher without header is a list of decimal (c, d) pairs encrypting the utf-16 message
+CIPHER_HEADER = '#'
+# the message is encoded as utf-8 with its length in the header instead of padding utf-16 with null characters
+CIPHER_COMPACT = 1
+# the (c, d) pairs are the base64 of a 4-byte big endian pair count and fixed width big endian fields sized to p
+CIPHER_BINARY = 2
+# the payload is encrypted by AES-GCM with a key encapsulated in a single (c, d) pair, the header fields are the
+# envelope version, c and d, the body is the base64 of nonce, ciphertext and tag
+CIPHER_HYBRID = 4
+CIPHER_FLAGS = CIPHER_COMPACT | CIPHER_BINARY | CIPHER_HYBRID
+# struct formats of the binary fields with machine word sizes
+STRUCT_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+# version of the hybrid envelope
+HYBRID_VERSION = 1
+HYBRID_NONCE_SIZE = 12
+
+
+def compact_block_size(bit_length: int) -> int:
+    """Number of message bytes per integer of the compact format, so that every integer is less than p."""
+    if bit_length < 9:
+        raise ValueError("Bit length of the key shall be at least 9 for the compact cipher format!")
+    return (bit_length - 1) // 8
+
+
+def format_cipher_header(flags: int, fields: list) -> str:
+    """Format the header of a cipher string."""
+    return f"{CIPHER_HEADER}{flags}:{','.join(str(field) for field in fields)}:"
+
+
+def parse_cipher_header(cipher_string: str) -> tuple[int, list[str], str]:
+    """Split a cipher string into its header and body.
+
+    Returns:
+        flags, header fields and body of the cipher, the flags are 0 for the legacy format without header
+    """
+    if not cipher_string.startswith(CIPHER_HEADER):
+        return 0, [], cipher_string
+    try:
+        flags, fields, body = cipher_string[len(CIPHER_HEADER):].split(':', 2)
+        flags = int(flags)
+    except ValueError:
+        raise ValueError("Malformed Cipher Header")
+    if flags & ~CIPHER_FLAGS:
+        raise ValueError(f"Unknown cipher flags {flags}")
+    return flags, fields.split(',') if fields else [], body
+
+
+def encrypt_integers(key: PublicKey, z: list[int], rng: random.Random = None,
+                     fixed_base: bool = False) -> list[tuple[int, int]]:
+    """Encrypts the encoded integers to (c, d) pairs.
 
     Args:
         key: public key for encryption
-        s_plaintext: input message string
+        z: encoded integers less than p
+        rng: optional random generator of the ephemeral keys for reproducible ciphers, the CSPRNG of the operating
+            system is used by default
+        fixed_base: use the cached fixed base tables of g and h if they are faster than the backend, which pays off
+            when many integers are encrypted to the same key
 
     Returns:
-        Encrypted text string.
+        cipher pairs
     """
-    z = encode(s_plaintext, key.bit_length)
+    # pick a random ephemeral key y for every integer in z
+    if rng is not None:
+        ys = [rng.randint(0, key.p) for _ in z]
+    else:
+        ys = random_exponents(len(z), key.p)
 
+    g_table = h_table = None
+    if fixed_base and fixed_base_faster(key.p):
+        g_table = fixed_base_table(key.g, key.p)
+        h_table = fixed_base_table(key.h, key.p)
     # cipher_pairs list will hold pairs (c, d) corresponding to each integer in z
     cipher_pairs = []
     # i is an integer in z
-    for i_code in z:
-        # pick random y from (0, p-1) inclusive
-        y = random.randint(0, key.p)
+    for i_code, y in zip(z, ys):
         # c = g^y mod p
-        c = mod_exp(key.g, y, key.p)
+        c = g_table.pow(y) if g_table else mod_exp(key.g, y, key.p)
         # d = ih^y mod p
-        d = (i_code * mod_exp(key.h, y, key.p)) % key.p
+        d = (i_code * (h_table.pow(y) if h_table else mod_exp(key.h, y, key.p))) % key.p
         # add the pair to the cipher pairs list
-        cipher_pairs.append([c, d])
+        cipher_pairs.append((c, d))
+    return cipher_pairs
+
+
+def decrypt_integers(key: PrivateKey, cipher_pairs: list[tuple[int, int]]) -> list[int]:
+    """Decrypts (c, d) pairs to the encoded integers."""
+    # decrypts each pair and adds the decrypted integer to list of plaintext integers
+    plaintext = []
+    for c, d in cipher_pairs:
+        # s = c^x mod p
+        s = mod_exp(c, key.x, key.p)
+        # plaintext integer = ds^-1 mod p
+        plain_i = (d * backend.invert(s, key.p)) % key.p
+        # add plain to list of plaintext integers
+        plaintext.append(plain_i)
+    return plaintext
+
+
+def format_pairs(cipher_pairs: list[tuple[int, int]]) -> str:
+    """Format cipher pairs as space separated decimal numbers."""
+    return ''.join(f"{c} {d} " for c, d in cipher_pairs)
+
+
+def parse_pairs(body: str) -> list[tuple[int, int]]:
+    """Parse cipher pairs from space separated decimal numbers."""
+    cipher_array = body.split()
+    if not len(cipher_array) % 2 == 0:
+        raise ValueError("Malformed Cipher Text")
+    numbers = [int(num) for num in cipher_array]
+    return list(zip(numbers[0::2], numbers[1::2]))
+
+
+def _hybrid_key(m: int, p: int) -> bytes:
+    """Derive the AES-256 key from the encapsulated random element m of Z_p."""
+    return hashlib.sha256(b"time-release-kem" + m.to_bytes((p.bit_length() + 7) // 8, 'big')).digest()
+
 
-    encrypted_str = ""
-    for pair in cipher_pairs:
-        encrypted_str += str(pair[0]) + ' ' + str(pair[1]) + ' '
+def hybrid_encrypt(key: PublicKey, data: bytes, rng: random.Random = None, fixed_base: bool = False) -> str:
+    """Encrypts bytes with a random AES-GCM key encapsulated under the public key.
 
-    return encrypted_str
+    A random element m of Z_p is encrypted as a single ElGamal pair (c, d) and the AES key is derived from m by
+    SHA-256, so the cost of the public key operations does not depend on the size of the payload.
+
+    Args:
+        key: public key for encryption
+        data: payload bytes
+        rng: optional random generator for reproducible ciphers, the CSPRNG of the operating system is used by default
+        fixed_base: use the cached fixed base tables of the public key
+
+    Returns:
+        Encrypted text string with the hybrid envelope.
+    """
+    if rng is not None:
+        m = rng.randint(1, key.p - 1)
+        nonce = rng.randbytes(HYBRID_NONCE_SIZE)
+    else:
+        # random m in [1, p - 1]
+        m = random_exponents(1, key.p + 1)[0]
+        nonce = os.urandom(HYBRID_NONCE_SIZE)
+    (c, d), = encrypt_integers(key, [m], rng, fixed_base)
+    header = format_cipher_header(CIPHER_HYBRID, [HYBRID_VERSION, c, d])
+    aes = AES.new(_hybrid_key(m, key.p), AES.MODE_GCM, nonce=nonce)
+    # the header is authenticated, so the encapsulated key cannot be swapped
+    aes.update(header.encode('ascii'))
+    ciphertext, tag = aes.encrypt_and_digest(data)
+    return header + base64.b64encode(nonce + ciphertext + tag).decode('ascii')
+
+
+def hybrid_decrypt(key: PrivateKey, cipher_string: str) -> bytes:
+    """Decrypts a cipher string with the hybrid envelope to the payload bytes.
+
+    Args:
+        key: Private key to decrypt the encapsulated AES key.
+        cipher_string: encrypted cipher string of hybrid_encrypt.
+
+    Returns:
+        Decrypted payload bytes.
+    """
+    flags, fields, body = parse_cipher_header(cipher_string)
+    if not flags & CIPHER_HYBRID or len(fields) != 3 or int(fields[0]) != HYBRID_VERSION:
+        raise ValueError("Malformed Hybrid Cipher Envelope")
+    c, d = int(fields[1]), int(fields[2])
+    m, = decrypt_integers(key, [(c, d)])
+    raw = base64.b64decode(body, validate=True)
+    if len(raw) < HYBRID_NONCE_SIZE + 16:
+        raise ValueError("Malformed Hybrid Cipher Envelope")
+    aes = AES.new(_hybrid_key(m, key.p), AES.MODE_GCM, nonce=raw[:HYBRID_NONCE_SIZE])
+    aes.update(cipher_string[:len(cipher_string) - len(body)].encode('ascii'))
+    # raises ValueError if the key is wrong or the cipher has been modified
+    return aes.decrypt_and_verify(raw[HYBRID_NONCE_SIZE:-16], raw[-16:])
+
+
+def format_binary_pairs(cipher_pairs: list[tuple[int, int]], p: int) -> str:
+    """Format cipher pairs as base64 of the length prefixed fixed width binary fields."""
+    width = (p.bit_length() + 7) // 8
+    data = bytearray(len(cipher_pairs).to_bytes(4, 'big'))
+    if width in STRUCT_FORMATS:
+        data += struct.pack(f">{2 * len(cipher_pairs)}{STRUCT_FORMATS[width]}", *itertools.chain(*cipher_pairs))
+        return base64.b64encode(data).decode('ascii')
+    for c, d in cipher_pairs:
+        data += c.to_bytes(width, 'big')
+        data += d.to_bytes(width, 'big')
+    return base64.b64encode(data).decode('ascii')
+
+
+def parse_binary_pairs(body: str, p: int) -> list[tuple[int, int]]:
+    """Parse cipher pairs from base64 of the length prefixed fixed width binary fields."""
+    width = (p.bit_length() + 7) // 8
+    try:
+        data = base64.b64decode(body, validate=True)
+    except ValueError:
+        raise ValueError("Malformed Cipher Text")
+    if len(data) < 4 or len(data) != 4 + 2 * width * int.from_bytes(data[:4], 'big'):
+        raise ValueError("Malformed Cipher Text")
+    count = 2 * int.from_bytes(data[:4], 'big')
+    if width in STRUCT_FORMATS:
+        # unpack the machine word sized fields at once
+        numbers = struct.unpack_from(f">{count}{STRUCT_FORMATS[width]}", data, 4)
+    else:
+        # split the fields by struct and convert them in a single pass without per field slicing
+        fields = struct.unpack_from(">" + f"{width}s" * count, data, 4)
+        numbers = list(map(int.from_bytes, fields, itertools.repeat('big')))
+    return list(zip(numbers[0::2], numbers[1::2]))
+
+
+def encrypt(key: PublicKey, s_plaintext: str, rng: random.Random = None, compact: bool = False,
+            hybrid: bool = False, binary: bool = False, fixed_base: bool = False) -> str:
+    """Encrypts a string using the public key k.
+
+    Args:
+        key: public key for encryption
+        s_plaintext: input message string
+        rng: optional random generator of the ephemeral keys for reproducible ciphers, the CSPRNG of the operating
+            system is used by default
+        compact: encode the message as utf-8 with its length in the cipher header instead of the legacy utf-16
+        hybrid: encrypt the utf-8 message with AES-GCM and encapsulate its key in a single pair, which is much
+            smaller and faster for large messages
+        binary: format the pairs as base64 of fixed width binary fields instead of decimal numbers
+        fixed_base: use the cached fixed base tables of the public key, see encrypt_batch
+
+    Returns:
+        Encrypted text string.
+    """
+    if hybrid:
+        return hybrid_encrypt(key, s_plaintext.encode('utf-8'), rng, fixed_base)
+    flags = 0
+    fields = []
+    if compact:
+        data = s_plaintext.encode('utf-8')
+        z = encode_bytes(data, compact_block_size(key.bit_length))
+        flags |= CIPHER_COMPACT
+        fields.append(len(data))
+    else:
+        z = encode(s_plaintext, key.bit_length)
+    cipher_pairs = encrypt_integers(key, z, rng, fixed_base)
+    if binary:
+        flags |= CIPHER_BINARY
+        return format_cipher_header(flags, fields) + format_binary_pairs(cipher_pairs, key.p)
+    header = format_cipher_header(flags, fields) if flags else ''
+    return header + format_pairs(cipher_pairs)
 
 
 def decrypt(key: PrivateKey, cipher_string: str) -> str:
@@ -373,29 +605,19 @@ def decrypt(key: PrivateKey, cipher_string: str) -> str:
 
     Args:
         key: Private key to decrypt message string.
-        cipher_string: encrypted cipher string.
+        cipher_string: encrypted cipher string in the legacy, compact, binary or hybrid format.
 
     Returns:
         Decrypted message string.
     """
-    # decrypts each pair and adds the decrypted integer to list of plaintext integers
-    plaintext = []
-
-    cipher_array = cipher_string.split()
-    if not len(cipher_array) % 2 == 0:
-        raise ValueError("Malformed Cipher Text")
-    for idx in range(0, len(cipher_array), 2):
-        # c = first number in pair
-        c = int(cipher_array[idx])
-        # d = second number in pair
-        d = int(cipher_array[idx + 1])
-
-        # s = c^x mod p
-        s = mod_exp(c, key.x, key.p)
-        # plaintext integer = ds^-1 mod p
-        plain_i = (d * mod_exp(s, key.p - 2, key.p)) % key.p
-        # add plain to list of plaintext integers
-        plaintext.append(plain_i)
+    flags, fields, body = parse_cipher_header(cipher_string)
+    if flags & CIPHER_HYBRID:
+        return hybrid_decrypt(key, cipher_string).decode('utf-8')
+    cipher_pairs = parse_binary_pairs(body, key.p) if flags & CIPHER_BINARY else parse_pairs(body)
+    plaintext = decrypt_integers(key, cipher_pairs)
+    if flags & CIPHER_COMPACT:
+        length = int(fields[0])
+        return decode_bytes(plaintext, compact_block_size(key.bit_length), length).decode('utf-8')
 
     decrypted_text = decode(plaintext, key.bit_length)
 
@@ -403,3 +625,80 @@ def decrypt(key: PrivateKey, cipher_string: str) -> str:
     decrypted_text = "".join([ch for ch in decrypted_text if ch != '\x00'])
 
     return decrypted_text
+
+
+def _encrypt_worker(args: tuple) -> list[str]:
+    """Encrypt a chunk of messages in a worker process of the batch encryptor."""
+    key, messages, options = args
+    return [encrypt(key, message, fixed_base=True, **options) for message in messages]
+
+
+class BatchEncryptor(object):
+    """Encrypt many messages to the same public key, e.g. all messages time-locked to one release height.
+
+    The fixed base tables of g and h are built once per key and process, then every chunk of every message takes
+    its powers from the tables. With more than one worker, the messages are split into chunks for a process pool,
+    which is kept across calls, so close the encryptor or use it as a context manager.
+    """
+    def __init__(self, workers: int = 1, chunk_size: int = 64):
+        """Init the batch encryptor.
+
+        Args:
+            workers: number of worker processes, the messages are encrypted in the calling process if 1
+            chunk_size: number of messages per task of the process pool
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        # every worker builds the tables of a key on its first chunk and keeps them in its table cache
+        self.pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Terminate the process pool."""
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def encrypt(self, key: PublicKey, messages: list[str], rng: random.Random = None, **options) -> list[str]:
+        """Encrypt the messages to the public key.
+
+        Args:
+            key: public key for encryption
+            messages: input message strings
+            rng: optional random generator for reproducible ciphers, only supported without process pool, since the
+                order of draws of the workers is not deterministic
+            options: cipher format options of encrypt, i.e. compact, hybrid and binary
+
+        Returns:
+            encrypted text strings in the order of the messages
+        """
+        if self.pool is None or len(messages) <= self.chunk_size:
+            return [encrypt(key, message, rng, fixed_base=True, **options) for message in messages]
+        if rng is not None:
+            raise ValueError("A random generator is not supported by the process pool of the batch encryptor!")
+        chunks = [(key, messages[i:i + self.chunk_size], options) for i in range(0, len(messages), self.chunk_size)]
+        return list(itertools.chain.from_iterable(self.pool.map(_encrypt_worker, chunks)))
+
+
+def encrypt_batch(key: PublicKey, messages: list[str], rng: random.Random = None, workers: int = 1,
+                  **options) -> list[str]:
+    """Encrypt many messages to the same public key with the fixed base tables of the key.
+
+    Args:
+        key: public key for encryption
+        messages: input message strings
+        rng: optional random generator for reproducible ciphers, only supported by a single worker
+        workers: number of worker processes
+        options: cipher format options of encrypt, i.e. compact, hybrid and binary
+
+    Returns:
+        encrypted text strings in the order of the messages
+    """
+    with BatchEncryptor(workers) as encryptor:
+        return encryptor.encrypt(key, messages, rng, **options)
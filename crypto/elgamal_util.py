@@ -1,7 +1,12 @@
 """
 Math utility methods to support elgamal crypto system.
 """
+import itertools
+import multiprocessing
 import random
+from functools import lru_cache
+from typing import Iterator, Optional
+from crypto import backend
 
 
 def gcd(a: int, b: int) -> int:
@@ -38,7 +43,7 @@ def extended_gcd(a: int, b: int) -> tuple[int, int, int]:
 
 
 def mod_exp(base: int, exp: int, modulus: int) -> int:
-    """Calling Python built-in method to implement fast modular exponentiation.
+    """Calling the arithmetic backend (gmpy2 or Python built-in pow) to implement fast modular exponentiation.
 
     Args:
         base:
@@ -48,10 +53,135 @@ def mod_exp(base: int, exp: int, modulus: int) -> int:
     Returns:
 
     """
-    return pow(base, exp, modulus)
+    return backend.powmod(base, exp, modulus)
 
 
-def solovay_strassen(num: int, i_confidence: int) -> bool:
+class FixedBaseExp(object):
+    """Modular exponentiation of a fixed base with precomputed window tables.
+
+    For w-bit windows, the table keeps base^(d * 2^(w * i)) for every digit d and window i of the exponent,
+    so base^exp is the product of one table entry per window without any squaring.
+    """
+    def __init__(self, base: int, modulus: int, window: int = 8):
+        """Build the window tables.
+
+        Args:
+            base: fixed base
+            modulus: a prime modulus
+            window: bit width of the window, only 8-bit windows use the fast byte digits of the exponent
+        """
+        self.base = base
+        self.modulus = modulus
+        self.window = window
+        # the exponent is reduced by the group order p - 1 before the lookup
+        self.order = modulus - 1
+        self.num_windows = max(1, (self.order.bit_length() + window - 1) // window)
+        self.tables = []
+        row_base = base % modulus
+        for _ in range(self.num_windows):
+            row = [1] * (1 << window)
+            for digit in range(1, 1 << window):
+                row[digit] = row[digit - 1] * row_base % modulus
+            self.tables.append(row)
+            row_base = row[-1] * row_base % modulus
+
+    def pow(self, exp: int) -> int:
+        """Compute base^exp % modulus with table lookups."""
+        if exp < 0 or exp >= self.order:
+            exp %= self.order
+        modulus = self.modulus
+        result = 1
+        if self.window == 8:
+            digits = exp.to_bytes(self.num_windows, byteorder='little')
+        else:
+            mask = (1 << self.window) - 1
+            digits = [(exp >> (self.window * i)) & mask for i in range(self.num_windows)]
+        for row, digit in zip(self.tables, digits):
+            if digit:
+                result = result * row[digit] % modulus
+        return result
+
+
+@lru_cache(maxsize=64)
+def fixed_base_table(base: int, modulus: int) -> FixedBaseExp:
+    """Get the cached fixed base table, so that the table of a public key is only built once."""
+    return FixedBaseExp(base, modulus)
+
+
+# min bit length of the modulus for which the fixed base tables in Python beat the powmod of the gmpy2 backend
+FIXED_BASE_MIN_BITS = 256
+
+
+def fixed_base_faster(modulus: int) -> bool:
+    """Check if the fixed base tables are faster than the powmod of the current backend for the modulus."""
+    return backend.BACKEND == backend.PYTHON or modulus.bit_length() >= FIXED_BASE_MIN_BITS
+
+
+# min bit length of the modulus for which the joint window loop in Python beats separate built-in pow calls
+MULTI_EXP_MIN_BITS = 512
+
+
+def joint_window_exp(bases: list[int], exps: list[int], modulus: int, window: int = 2) -> int:
+    """Straus/Shamir simultaneous exponentiation of prod(bases[i]^exps[i]) % modulus.
+
+    The products of all combinations of w-bit digits of the bases are precomputed, then the exponents are scanned
+    together from the top window, so the squarings are shared by all bases.
+
+    Args:
+        bases: bases of the product
+        exps: non-negative exponents of the bases
+        modulus: modulus
+        window: bit width of the joint window, the table has 2^(window * len(bases)) entries
+
+    Returns:
+        product of the powers
+    """
+    size = 1 << window
+    # table[d_0 + d_1 * size + ...] = bases[0]^d_0 * bases[1]^d_1 * ...
+    table = [1]
+    for base in bases:
+        powers = [1]
+        for _ in range(size - 1):
+            powers.append(powers[-1] * base % modulus)
+        table = [entry * power % modulus for power in powers for entry in table]
+    mask = size - 1
+    num_windows = (max(exp.bit_length() for exp in exps) + window - 1) // window
+    result = 1
+    for i in range(num_windows - 1, -1, -1):
+        for _ in range(window):
+            result = result * result % modulus
+        shift = window * i
+        digit = 0
+        for j, exp in enumerate(exps):
+            digit |= ((exp >> shift) & mask) << (window * j)
+        if digit:
+            result = result * table[digit] % modulus
+    return result % modulus
+
+
+def multi_exp(bases: list[int], exps: list[int], modulus: int) -> int:
+    """Compute prod(bases[i]^exps[i]) % modulus, e.g. g^a * h^b of a pollard rho point.
+
+    The joint window exponentiation is used for big moduli with the Python backend, otherwise separate powmod calls
+    of the backend in C are faster.
+
+    Args:
+        bases: bases of the product
+        exps: non-negative exponents of the bases
+        modulus: modulus
+
+    Returns:
+        product of the powers
+    """
+    if backend.BACKEND == backend.PYTHON and modulus.bit_length() >= MULTI_EXP_MIN_BITS:
+        return joint_window_exp(bases, exps, modulus, 3)
+    result = 1
+    for base, exp in zip(bases, exps):
+        result = result * backend.powmod(base, exp, modulus) % modulus
+    return result
+
+
+def solovay_strassen(num: int, i_confidence: int, rng: random.Random = None) -> bool:
     """ Solovay-strassen primality test.
     This function tests if num is prime.
     http://www-math.ucdenver.edu/~wcherowi/courses/m5410/ctcprime.html
@@ -59,21 +189,23 @@ def solovay_strassen(num: int, i_confidence: int) -> bool:
     Args:
         num: input integer
         i_confidence:
+        rng: random generator of the witnesses, the global random generator is used if it is not given
 
     Returns:
         if pass the test
     """
+    randint = rng.randint if rng is not None else random.randint
     # ensure confidence of t
     for idx in range(i_confidence):
         # choose random a between 1 and n-2
-        a = random.randint(1, num - 1)
+        a = randint(1, num - 1)
 
         # if a is not relatively prime to n, n is composite
-        if gcd(a, num) > 1:
+        if backend.gcd(a, num) > 1:
             return False
 
         # declares n prime if jacobi(a, n) is congruent to a^((n-1)/2) mod n
-        if not jacobi(a, num) % num == mod_exp(a, (num - 1) // 2, num):
+        if not backend.jacobi(a, num) % num == mod_exp(a, (num - 1) // 2, num):
             return False
 
     # if there have been t iterations without failure, num is believed to be prime
@@ -127,19 +259,22 @@ def jacobi(a: int, n: int) -> int:
             return jacobi(n, a)
 
 
-def find_primitive_root(p: int, seed: int) -> int:
+def find_primitive_root(p: int, seed: int, rng: random.Random = None) -> int:
     """Finds a primitive root for prime p.
     This function was implemented from the algorithm described here:
     http://modular.math.washington.edu/edu/2007/spring/ent/ent-html/node31.html
 
     Args:
         p:
-        seed:
+        seed: random generator seed
+        rng: private random generator, a new generator is seeded with the seed if it is not given
 
     Returns:
         A primitive root for prime p.
     """
-    random.seed(seed)
+    # a private generator instead of the global one, so that keys can be derived concurrently in threads
+    if rng is None:
+        rng = random.Random(seed)
     if p == 2:
         return 1
     # the prime divisors of p-1 are 2 and (p-1)/2 because
@@ -149,7 +284,7 @@ def find_primitive_root(p: int, seed: int) -> int:
 
     # test random g's until one is found that is a primitive root mod p
     while True:
-        g = random.randint(2, p - 1)
+        g = rng.randint(2, p - 1)
         # g is a primitive root if for all prime factors of p-1, p[i]
         # g^((p-1)/p[i]) (mod p) is not congruent to 1
         if not (mod_exp(g, (p - 1) // p1, p) == 1):
@@ -157,36 +292,202 @@ def find_primitive_root(p: int, seed: int) -> int:
                 return g
 
 
-def find_prime(bit_length: int, i_confidence: int, seed: int) -> int:
+def find_prime(bit_length: int, i_confidence: int, seed: int, rng: random.Random = None) -> int:
     """Find a prime number p for elgamal public key.
 
     Args:
         bit_length: number of binary bits for the prime number.
         i_confidence:
         seed: random generator seed
+        rng: private random generator, a new generator is seeded with the seed if it is not given
 
     Returns:
         A prime number with requested length of bits in binary.
     """
-    random.seed(seed)
+    # a private generator instead of the global one, so that keys can be derived concurrently in threads
+    if rng is None:
+        rng = random.Random(seed)
     # keep testing until one is found
     while True:
         # generate potential prime randomly
-        p = random.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
+        p = rng.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
         # make sure it is odd
         while p % 2 == 0:
-            p = random.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
+            p = rng.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
 
         # keep doing this if the solovay-strassen test fails
-        while not solovay_strassen(p, i_confidence):
-            p = random.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
+        while not solovay_strassen(p, i_confidence, rng):
+            p = rng.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
             while p % 2 == 0:
-                p = random.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
+                p = rng.randint(2 ** (bit_length - 2), 2 ** (bit_length - 1))
 
         # if p is prime compute p = 2*p + 1
         # this step is critical to protect the encryption from Pohlig–Hellman algorithm
         # if p is prime, we have succeeded; else, start over
         p = p * 2 + 1
-        if solovay_strassen(p, i_confidence):
+        if solovay_strassen(p, i_confidence, rng):
             return p
 
+
+# bound of the small primes sieving q and 2q + 1 of the v2 safe prime derivation
+SIEVE_PRIME_BOUND = 2048
+# number of odd candidates q sieved at a time
+SIEVE_WINDOW = 4096
+
+
+@lru_cache(maxsize=1)
+def small_primes(bound: int = SIEVE_PRIME_BOUND) -> tuple[int, ...]:
+    """Odd primes less than the bound by the sieve of Eratosthenes."""
+    sieve = bytearray([1]) * bound
+    sieve[:2] = b'\x00\x00'
+    for i in range(2, int(bound ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytearray(len(range(i * i, bound, i)))
+    return tuple(i for i in range(3, bound) if sieve[i])
+
+
+def sieve_window(q_start: int, size: int, primes: tuple[int, ...]) -> bytearray:
+    """Sieve the odd candidates q = q_start + 2k for 0 <= k < size.
+
+    A candidate is removed if q or 2q + 1 is divisible by one of the small primes, all of which must be less than
+    q_start so that no prime q is removed.
+
+    Args:
+        q_start: odd start of the window
+        size: number of candidates
+        primes: odd small primes
+
+    Returns:
+        flags of the candidates which survive the sieve
+    """
+    flags = bytearray([1]) * size
+    for r in primes:
+        # q_start + 2k = 0 mod r and q_start + 2k = (r - 1) / 2 mod r, i.e. 2q + 1 = 0 mod r
+        inv_2 = (r + 1) // 2
+        for residue in (0, (r - 1) // 2):
+            k = (residue - q_start) * inv_2 % r
+            flags[k::r] = bytearray(len(range(k, size, r)))
+    return flags
+
+
+def is_safe_prime_candidate(q: int) -> bool:
+    """Test if q is a Sophie Germain prime, i.e. both q and p = 2q + 1 are prime.
+
+    The base-2 Fermat test of p runs first as it rejects almost all candidates. If q is prime, p passing the Fermat
+    test is proven prime by Pocklington's criterion, since q > sqrt(p) and gcd(2^2 - 1, p) = 1.
+    """
+    p = 2 * q + 1
+    if backend.powmod(2, p - 1, p) != 1:
+        return False
+    return backend.is_prime(q)
+
+
+def sieve_primes(low: int) -> tuple[int, ...]:
+    """Small primes sieving the candidates q >= low, all of them are less than any candidate."""
+    return tuple(r for r in small_primes() if r < low)
+
+
+def safe_prime_partitions(bit_length: int, seed: int, size: int = SIEVE_WINDOW) -> Iterator[tuple[int, int, int]]:
+    """Split the deterministic candidate stream of the v2 derivation into fixed partitions.
+
+    The stream starts from a random odd q in [2^(bit_length - 2), 2^(bit_length - 1)) drawn from the seed and runs
+    over the following odd candidates, wrapping around to the lowest odd candidate at the end of the range.
+
+    Args:
+        bit_length: number of binary bits for the prime number, at least 5.
+        seed: random generator seed
+        size: max number of candidates per partition
+
+    Returns:
+        iterator of (first odd candidate q, number of candidates, lower bound of q) in the order of the stream
+    """
+    if bit_length < 5:
+        raise ValueError("Bit length of the safe prime shall be at least 5!")
+    low = 2 ** (bit_length - 2)
+    high = 2 ** (bit_length - 1)
+    q_start = random.Random(seed).randrange(low, high) | 1
+    while True:
+        count = min(size, (high - q_start + 1) // 2)
+        yield q_start, count, low
+        q_start += 2 * count
+        if q_start >= high:
+            q_start = low + 1
+
+
+def search_safe_prime_partition(partition: tuple[int, int, int]) -> Optional[int]:
+    """Find the first safe prime p = 2q + 1 in a partition of the candidate stream.
+
+    Args:
+        partition: first odd candidate q, number of candidates and lower bound of q
+
+    Returns:
+        the safe prime of the first candidate q passing the sieve and the primality tests, or None
+    """
+    q_start, size, low = partition
+    flags = sieve_window(q_start, size, sieve_primes(low))
+    for k in range(size):
+        if flags[k] and is_safe_prime_candidate(q_start + 2 * k):
+            return 2 * (q_start + 2 * k) + 1
+    return None
+
+
+class ParallelSafePrimeSearch(object):
+    """Process pool testing consecutive partitions of the v2 candidate stream in parallel.
+
+    The lowest partition with a hit wins, so the result is bit-identical to the sequential search. The pool is kept
+    open between the searches, e.g. to derive a chain of future public keys.
+    """
+    def __init__(self, workers: int, partition_size: int = 512):
+        """Start the worker processes.
+
+        Args:
+            workers: number of worker processes
+            partition_size: number of candidates per partition
+        """
+        self.workers = workers
+        self.partition_size = partition_size
+        self.pool = multiprocessing.Pool(workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes."""
+        self.pool.terminate()
+        self.pool.join()
+
+    def find(self, bit_length: int, seed: int) -> int:
+        """Find the same safe prime as the sequential find_safe_prime."""
+        partitions = safe_prime_partitions(bit_length, seed, self.partition_size)
+        # a few partitions per worker in each round, so that the workers do not test too far ahead of the hit
+        batch = 4 * self.workers
+        while True:
+            for p in self.pool.map(search_safe_prime_partition, itertools.islice(partitions, batch), chunksize=1):
+                if p:
+                    return p
+
+
+def find_safe_prime(bit_length: int, seed: int, search: Optional[ParallelSafePrimeSearch] = None) -> int:
+    """Find a safe prime p = 2q + 1 for the v2 elgamal public key derivation.
+
+    The candidate stream of safe_prime_partitions is scanned with an incremental sieve over q and 2q + 1 together.
+    The survivors are tested by is_safe_prime_candidate with the BPSW test, so the result is deterministic for the
+    seed.
+
+    Args:
+        bit_length: number of binary bits for the prime number, at least 5.
+        seed: random generator seed
+        search: optional process pool testing the partitions of the stream in parallel with the same result
+
+    Returns:
+        The first safe prime with the requested length of bits in binary in the candidate stream.
+    """
+    if search is not None:
+        return search.find(bit_length, seed)
+    for partition in safe_prime_partitions(bit_length, seed):
+        p = search_safe_prime_partition(partition)
+        if p:
+            return p
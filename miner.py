@@ -3,14 +3,24 @@ import json
 import requests
 import signal
 from os import environ
-from typing import Optional
+from typing import Optional, Callable
+from functools import partial
 import dataset
 import urllib.parse
 from crypto import elgamal
-from mining.pollard_rho_hash import PRMiner
-from blockchain.block import Block, create_genesis_block
+from mining.pollard_rho_hash import PRMiner, SimplePRMiner, WalkState
+from mining.pollard_rho_parallel import ParallelPRMiner
+from blockchain.block import Block, create_genesis_block, derive_public_key
+from blockchain.block_index import BlockIndex
+from blockchain.chain_store import ChainStore
 from blockchain.transaction import Tx
-from miner_config import BLOCKCHAIN_DB_URL
+from blockchain.key_schedule import KeySchedule
+from blockchain.release import ReleaseEngine
+from blockchain.sync import ChainSync, parse_peers, fork_index
+from blockchain.validator import ChainValidator, validate_link
+from miner_config import BLOCKCHAIN_DB_URL, MINING_WORKERS, CYCLE_DETECTION, CANDIDATE_MAX_AGE, \
+    CANDIDATE_MAX_WAITING_TXS, BLOCK_VERSION, KEYGEN_WORKERS, KEY_SCHEDULE_AHEAD, KEY_SCHEDULE_BATCH, RELEASE_WORKERS, \
+    SYNC_WORKERS, SYNC_BATCH, SYNC_TIMEOUT, VALIDATION_WORKERS, VALIDATION_CHUNK
 from dotenv import load_dotenv
 
 load_dotenv()  # take environment variables from .env.
@@ -64,31 +74,64 @@ def calculate_difficulty(bit_length: int):
     return bit_length
 
 
+class CandidateRefreshPolicy:
+    """Policy to decide when the candidate block shall be rebuilt.
+
+    A new candidate block changes the header hash, so all the walk of the old candidate is thrown away. The candidate
+    is kept while the chain tip and the difficulty are unchanged, unless it is too old or too many transactions are
+    waiting to be included.
+    """
+    def __init__(self, max_age: float = CANDIDATE_MAX_AGE, max_waiting_txs: int = CANDIDATE_MAX_WAITING_TXS):
+        """Init refresh policy.
+
+        Args:
+            max_age: max time in seconds to keep mining the same candidate block
+            max_waiting_txs: max number of received transactions waiting for a new candidate block
+        """
+        self.max_age = max_age
+        self.max_waiting_txs = max_waiting_txs
+
+    def should_refresh(self, candidate_block: Optional[Block], prev_block_hash, bit_length: int,
+                       waiting_txs: int) -> bool:
+        if candidate_block is None:
+            return True
+        if candidate_block.prev_block_hash != prev_block_hash or candidate_block.difficulty != bit_length:
+            # the chain tip or the difficulty has changed
+            return True
+        if time.time() - candidate_block.timestamp >= self.max_age:
+            return True
+        return waiting_txs >= self.max_waiting_txs
+
+
 def proof_of_work(candidate_block: Block,
                   blockchain: list[Block],
-                  peer_nodes) -> tuple[Optional[Block], list[Block]]:
+                  chain_sync: ChainSync,
+                  miner_class: Callable[..., SimplePRMiner] = PRMiner,
+                  walk_state: WalkState = None) -> tuple[Optional[Block], list[Block]]:
     """Find private key by double hash with different nonce values
     TODO: If other nodes are found first, False is returned..
 
     Args:
         candidate_block:
         blockchain:
-        peer_nodes:
+        chain_sync: sync of the chain with the peer nodes if the block is not sealed
+        miner_class: miner to seal the block, e.g. PRMiner or ParallelPRMiner
+        walk_state: walk state of the candidate block, it is resumed and updated in place by the miner
 
     Returns:
 
     """
-    miner = PRMiner(candidate_block, block_time=BLOCK_TIME)
+    miner = miner_class(candidate_block, block_time=BLOCK_TIME, state=walk_state)
     nonce, solution = miner.mining()
     if nonce and solution:
         try:
             solution.generate_private_key()
-            candidate_block.solution = solution
+            candidate_block.seal(solution)
             return candidate_block, blockchain
         except ValueError:
             return None, blockchain
     else:
-        new_blockchain = consensus(blockchain, peer_nodes)
+        new_blockchain = consensus(blockchain, chain_sync)
         if new_blockchain:
             return None, new_blockchain
         else:
@@ -99,14 +142,38 @@ def mine(blockchain: list[Block],
          node_pending_txs: list[Tx],
          database,
          debug=False,
-         difficulty_adjustable=False):
+         difficulty_adjustable=False,
+         miner_class: Callable[..., SimplePRMiner] = PRMiner,
+         refresh_policy: CandidateRefreshPolicy = None):
     """ Stores the transactions that this node has in a list.
     If the node you sent the transaction adds a block
     it will get accepted, but there is a chance it gets
     discarded and your transaction goes back as if it was never
-    processed"""
+    processed.
+    The candidate block and its walk state are kept across block time timeouts until the refresh policy asks for a
+    new candidate block, so the work of the miner is not thrown away every round."""
     # declare with global keyword to modify blockchain and pending transactions
     global difficulty
+    if refresh_policy is None:
+        refresh_policy = CandidateRefreshPolicy()
+    candidate_block = None
+    walk_state = WalkState()
+    # the process pool of the v2 safe prime search is kept for all public keys derived by this miner
+    keygen_search = elgamal.ParallelSafePrimeSearch(KEYGEN_WORKERS) if KEYGEN_WORKERS > 1 else None
+    # the future public keys are derived a batch at a time after each new block, so mining is not blocked for long
+    key_schedule = KeySchedule(database, ahead=KEY_SCHEDULE_AHEAD, search=keygen_search)
+    key_schedule.advance(blockchain[-1], max_keys=KEY_SCHEDULE_BATCH)
+    # the messages locked to each new block are released with the private key recovered from its solution
+    release_engine = ReleaseEngine(database, workers=RELEASE_WORKERS)
+    # every synced chain is fully validated, only above the height verified for its tip by a former sync
+    chain_validator = ChainValidator(workers=VALIDATION_WORKERS, chunk_size=VALIDATION_CHUNK)
+    # the sessions of the peers are kept alive across the sync rounds
+    chain_sync = ChainSync(parse_peers(PEER_NODES), workers=SYNC_WORKERS, batch=SYNC_BATCH, timeout=SYNC_TIMEOUT,
+                           validator=chain_validator)
+    # the blocks are indexed by header hash, the blockchain list is kept as the main chain of the index
+    block_index = BlockIndex(blockchain)
+    # only the new and changed blocks of the main chain are written to the db
+    chain_store = ChainStore(database)
     # database['logs'].insert({'category': 'status', 'timestamp': datetime.now(), 'info': 'start mining!'})
     while True:
         """Mining is the only way that new coins can be created.
@@ -127,13 +194,9 @@ def mine(blockchain: list[Block],
             # database['logs'].insert({'category': 'request', 'timestamp': datetime.now(), 'info': req})
             new_txs = requests.get(req).content
             new_txs = json.loads(new_txs)
-            # add the mining reward token as coinbase transaction
-            node_pending_txs.append(Tx.coinbase(MINER_ADDRESS, mining_reward))
             for tx in list(new_txs):
                 node_pending_txs.append(Tx.from_dict(tx))
 
-            new_block_index = last_block.height + 1
-            new_block_timestamp = time.time()
             # avoid to recalculate block hash if the block data is retrieved from database
             # WARNING: this part of code is insecure and it is not based on original design but only for
             # simplification of code.
@@ -141,51 +204,55 @@ def mine(blockchain: list[Block],
                 prev_block_hash = last_block.current_block_hash
             else:
                 prev_block_hash = last_block.hash_header()
-            prev_public_key = last_block.public_key
-            # generate new public key with previous public key
-            new_public_key = elgamal.generate_pub_key(bit_length=difficulty,
-                                                      seed=int(
-                                                          prev_public_key.p + prev_public_key.g + prev_public_key.h))
-            candidate_block = Block(new_block_index,
-                                    new_block_timestamp,
-                                    node_pending_txs,
-                                    new_public_key,
-                                    prev_block_hash=prev_block_hash)
+            if refresh_policy.should_refresh(candidate_block, prev_block_hash, difficulty, len(node_pending_txs)):
+                # carry over the transactions of the old candidate except its coinbase transaction
+                block_txs = candidate_block.transactions[1:] if candidate_block else []
+                # add the mining reward token as coinbase transaction
+                block_txs = [Tx.coinbase(MINER_ADDRESS, mining_reward)] + block_txs + node_pending_txs
+                node_pending_txs = []
+                # generate new public key with previous public key
+                new_public_key = derive_public_key(last_block.public_key, difficulty, BLOCK_VERSION, keygen_search)
+                candidate_block = Block(last_block.height + 1,
+                                        time.time(),
+                                        block_txs,
+                                        new_public_key,
+                                        prev_block_hash=prev_block_hash,
+                                        version=BLOCK_VERSION)
 
             # Find the proof of work for the current block being mined
             # Note: The program will hang here until a new proof of work is found
-            new_block, updated_blockchain = proof_of_work(candidate_block, blockchain, PEER_NODES)
+            new_block, updated_blockchain = proof_of_work(candidate_block, blockchain, chain_sync, miner_class,
+                                                          walk_state)
             # If we didn't guess the proof, start mining again
             if new_block is None:
-                # Update blockchain and save it to file
-                blockchain = updated_blockchain
-                # update blockchain in the db
-                for bk in blockchain:
-                    database['blockchain'].update(bk.get_db_record(), ['height'])
+                # index the synced blocks above the fork, the main chain is switched if the synced tip has more work
+                fork = block_index.add_blocks(updated_blockchain[fork_index(blockchain, updated_blockchain):])
+                if fork is not None:
+                    # only the blocks above the fork point are rewritten in the db
+                    rows = chain_store.save(blockchain)
+                    if debug:
+                        print(f"Switched to a synced chain from height {fork}, {rows} rows written")
+                    key_schedule.advance(blockchain[-1], max_keys=KEY_SCHEDULE_BATCH)
                 continue
             else:
                 # Once we find a valid proof of work, we know we can mine a block so
                 # ...we reward the miner by adding a transaction
-                # First we load all pending transactions sent to the node server
-                # insert transactions to database
-                db_txs = []
-                for tx in node_pending_txs:
-                    # the tx signature has been verified by app, here need to validate the amount
-                    db_tx = tx.__dict__
-                    db_tx["block_height"] = new_block_index
-                    db_txs.append(db_tx)
-                database["transactions"].insert_many(db_txs)
-                res_txs = database["transactions"].find(block_height=new_block_index)
-                tx_ids = [tx["id"] for tx in res_txs]
-                # Empty transaction list
-                node_pending_txs = []
-                # Now create the new block
-                blockchain.append(new_block)
+                # the tx signature has been verified by app, here need to validate the amount
+                # the candidate block has been sealed
+                candidate_block = None
+                # Now create the new block, which extends the main chain
+                block_index.add(new_block)
                 if debug:
                     if validate_blockchain(blockchain):
                         print("Newly mined block is valid!")
-                # insert new block to the database
-                database['blockchain'].insert(new_block.get_db_record(tx_ids=tx_ids))
+                # insert new block and its transactions to the database
+                rows = chain_store.save(blockchain)
+                if debug:
+                    print(f"{rows} rows written")
+                key_schedule.advance(new_block, max_keys=KEY_SCHEDULE_BATCH)
+                private_key = new_block.solution.generate_private_key()
+                if private_key:
+                    release_engine.release(new_block.height, private_key)
         except TimeoutException:
             continue
         else:
@@ -197,33 +264,15 @@ def mine(blockchain: list[Block],
             signal.alarm(0)
 
 
-def find_new_chains(peer_nodes):
-    # TODO: this method needs to convert json to block obj
-    # Get the blockchains of every other node
-    other_chains = []
-    for node_url in peer_nodes:
-        # Get their chains using a GET request
-        other_blockchain = requests.get(node_url + "/blocks").content
-        # Convert the JSON object to a Python dictionary
-        other_blockchain = json.loads(other_blockchain)
-        # Verify other node block is correct
-        validated = validate_blockchain(other_blockchain)
-        if validated:
-            # Add it to our list
-            other_chains.append(other_blockchain)
-    return other_chains
-
-
-def consensus(blockchain, peer_nodes) -> Optional[list[Block]]:
-    # Get the blocks from other nodes
-    other_chains = find_new_chains(peer_nodes)
+def consensus(blockchain: list[Block], chain_sync: ChainSync) -> Optional[list[Block]]:
+    """Sync the chain with the longest valid chain of the peer nodes.
+
+    Returns:
+        the longer chain of a peer, or None if our chain is the longest
+    """
     # If our chain isn't longest, then we store the longest chain
-    longest_chain = blockchain
-    for chain in other_chains:
-        if len(longest_chain) < len(chain):
-            longest_chain = chain
-    # If the longest chain wasn't ours, then we set our chain to the longest
-    if longest_chain == blockchain:
+    longest_chain = chain_sync.sync(blockchain)
+    if longest_chain is None:
         # Keep searching for proof
         return None
     else:
@@ -235,27 +284,14 @@ def validate_blockchain(blockchain: list[Block]):
     if len(blockchain) < 2:
         # no need to validate if only contains genesis block
         return True
-    last_block = blockchain[-2]
-    new_block = blockchain[-1]
-    if new_block.prev_block_hash != last_block.current_block_hash:
-        # the recent blocks are not chained
-        return False
-    v_miner = PRMiner(new_block)
-    v_pub_key = new_block.public_key
-    v_solution = new_block.solution
-    # test value is g^a & h^b
-    test_val_1 = pow(v_pub_key.g, v_solution.a1, v_pub_key.p) * \
-        pow(v_pub_key.h, v_solution.b1, v_pub_key.p) % v_pub_key.p
-    test_val_2 = pow(v_pub_key.g, v_solution.a2, v_pub_key.p) * \
-        pow(v_pub_key.h, v_solution.b2, v_pub_key.p) % v_pub_key.p
-    if test_val_1 != test_val_2:
-        return False
-    # validate nonce value to match the solution
-    header_hash = v_miner.header_hash(new_block.nonce)
-    f_value = v_miner.func_f(header_hash, new_block.nonce)
-    if f_value != test_val_1 or f_value != test_val_2:
-        return False
-    return True
+    return validate_link(blockchain[-2], blockchain[-1])
+
+
+def get_miner_class() -> Callable[..., SimplePRMiner]:
+    """Select the miner class based on the miner configuration."""
+    if MINING_WORKERS > 1:
+        return partial(ParallelPRMiner, workers=MINING_WORKERS)
+    return partial(PRMiner, cycle_detection=CYCLE_DETECTION)
 
 
 def welcome_msg():
@@ -272,21 +308,10 @@ def retrieve_chain_from_db(database):
         # write the genesis block if the blockchain is empty
         current_chain = [create_genesis_block()]
         database['blockchain'].insert(current_chain[0].get_db_record())
+        current_chain[0].dirty = False
     else:
-        # load the whole blockchain from database
-        current_chain = []
-        for db_block in database['blockchain']:
-            current_block = Block.from_db(db_block)
-            # recover all Tx objects from db
-            tx_id_str = db_block['transactions']
-            if tx_id_str is not None and tx_id_str != "[]":
-                tx_ids = [int(tx_id) for tx_id in tx_id_str.split(',')]
-                db_txs = database['transactions'].find(id=tx_ids)
-                txs = []
-                for db_tx in db_txs:
-                    txs.append(Tx.from_dict(db_tx))
-                current_block.transactions = txs
-            current_chain.append(current_block)
+        # stream the blockchain from database in height order, the transactions are loaded when they are accessed
+        current_chain = ChainStore(database).load()
     return current_chain
 
 
@@ -295,4 +320,4 @@ if __name__ == '__main__':
     # if first time running, use the genesis block
     db = dataset.connect(BLOCKCHAIN_DB_URL)
     # Start mining
-    mine(retrieve_chain_from_db(db), [], db, debug=True)
+    mine(retrieve_chain_from_db(db), [], db, debug=True, miner_class=get_miner_class())
@@ -1,2 +1,32 @@
 # Node's blockchain database
-BLOCKCHAIN_DB_URL = 'sqlite:///blockchain.db'
\ No newline at end of file
+BLOCKCHAIN_DB_URL = 'sqlite:///blockchain.db'
+# Number of processes for parallel mining, the single process miner is used if it is less than 2
+MINING_WORKERS = 1
+# Cycle detection strategy of the single process miner: "floyd", "brent" or "stack"
+CYCLE_DETECTION = "floyd"
+# Max time in seconds to keep mining the same candidate block across block time timeouts
+CANDIDATE_MAX_AGE = 300
+# Max number of received transactions waiting for a new candidate block
+CANDIDATE_MAX_WAITING_TXS = 100
+# Version of the mined blocks, the public key of a block from version 2 is derived by the sieved safe prime search and
+# the body hash of a block from version 3 is the root of the Merkle tree of its transactions, the header of a block from
+# version 4 is a fixed binary layout which commits the previous block hash
+BLOCK_VERSION = 1
+# Number of processes for the v2 safe prime search of public keys, the search is sequential if it is less than 2
+KEYGEN_WORKERS = 1
+# Number of future public keys kept in the key schedule ahead of the tip, one day of blocks by default
+KEY_SCHEDULE_AHEAD = 2880
+# Max number of scheduled public keys derived by the miner after each new block
+KEY_SCHEDULE_BATCH = 64
+# Number of processes decrypting the released ciphers after each new block, the miner decrypts them if less than 2
+RELEASE_WORKERS = 1
+# Number of concurrent requests to the peer nodes during chain sync
+SYNC_WORKERS = 8
+# Max number of blocks or headers fetched from a peer node per request
+SYNC_BATCH = 500
+# Timeout in seconds of a request to a peer node
+SYNC_TIMEOUT = 10
+# Number of processes validating the blocks of a synced chain, the miner validates them if less than 2
+VALIDATION_WORKERS = 1
+# Number of blocks per task of the validation processes
+VALIDATION_CHUNK = 16
@@ -0,0 +1,150 @@
+"""
+Vectorized Pollard rho hash mining for small public keys.
+
+If the prime p has no more than 32 bits, every modular product of two residues fits in 64-bit integers, so thousands
+of independent walks can be advanced in lockstep with NumPy arrays. The three partitions of PRMiner.func_f are
+selected with masks, g^hash and h^hash are looked up in byte window tables and the walks meet each other on
+distinguished points. The header hash of every walk is still computed by hashlib one by one.
+If NumPy is not installed or the key is too large, the miner falls back to the scalar PRMiner walk.
+"""
+import time
+from typing import Optional
+from blockchain.block import Block
+from mining.pollard_rho_hash import PRMiner, WalkState
+from mining.pollard_rho_parallel import DPCollector
+from mining.pollard_rho_solution import PRSolution
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# max bit length of the prime p, so that the product of two residues fits in uint64
+MAX_BATCH_BITS = 32
+
+
+def batch_available(bit_length: int) -> bool:
+    """Test if the vectorized engine can mine a key with the given bit length of p."""
+    return np is not None and bit_length <= MAX_BATCH_BITS
+
+
+class BatchPRMiner(PRMiner):
+    """The pollard rho miner advancing a batch of walks in lockstep with NumPy."""
+    def __init__(self, block: Block, block_time=0, walks: int = 1024, dp_bits: int = None, state: WalkState = None):
+        """Init batch miner.
+
+        Args:
+            block: candidate block to be sealed
+            block_time: max time in seconds to search the solution
+            walks: number of walks in the batch
+            dp_bits: number of leading zero bits of distinguished points, default depends on key size
+            state: walk state keeping the distinguished points collected for the same block
+        """
+        super().__init__(block, block_time, state=state)
+        self.walks = walks
+        if dp_bits is None:
+            # keep the steps walked after the first collision small compared to sqrt(p)
+            dp_bits = max(1, block.public_key.bit_length // 2 - walks.bit_length() - 1)
+        self.dp_bits = dp_bits
+        # abandon a walk if it does not meet a distinguished point after 20 times of the expected length
+        self.max_walk = 20 * 2 ** dp_bits
+
+    @staticmethod
+    def _window_table(table):
+        """Convert a fixed base table to a uint64 array indexed by [window, byte]."""
+        return np.array(table.tables, dtype=np.uint64)
+
+    @staticmethod
+    def _table_pow(table, exps, p):
+        """Vectorized fixed base exponentiation with the byte window table of a 32-bit modulus."""
+        result = table[0][exps & np.uint64(0xff)]
+        for i in range(1, table.shape[0]):
+            result = result * table[i][(exps >> np.uint64(8 * i)) & np.uint64(0xff)] % p
+        return result
+
+    @staticmethod
+    def _pow(bases, exps, p):
+        """Vectorized square and multiply for variable bases."""
+        result = np.ones_like(bases)
+        bases = bases.copy()
+        exps = exps.copy()
+        while exps.any():
+            odd = (exps & 1).astype(bool)
+            result[odd] = result[odd] * bases[odd] % p
+            bases = bases * bases % p
+            exps >>= np.uint64(1)
+        return result
+
+    def mining(self) -> tuple[int, Optional[PRSolution]]:
+        """
+        Walk the batch until two walks reach the same distinguished point.
+
+        Returns:
+            nonce and paired private key
+        """
+        pubkey = self.block.public_key
+        if not batch_available(pubkey.p.bit_length()):
+            return super().mining()
+        p = np.uint64(pubkey.p)
+        order = np.uint64(pubkey.p - 1)
+        n = (pubkey.p - 1) // 2
+        shift = np.uint64(pubkey.p.bit_length() - self.dp_bits)
+        if self._table_key is not pubkey:
+            self._load_tables()
+        g_table = self._window_table(self._g_table)
+        h_table = self._window_table(self._h_table)
+        block_key = self.walk_key()
+        if not self.state.resumable(block_key, "batch"):
+            self.state.start(block_key, "batch", None)
+        collector = DPCollector(n, self.state.points)
+        rng = np.random.default_rng()
+
+        def new_walks(size):
+            a = rng.integers(0, n, size=size, endpoint=True, dtype=np.uint64)
+            b = rng.integers(0, n, size=size, endpoint=True, dtype=np.uint64)
+            y = self._table_pow(g_table, a, p) * self._table_pow(h_table, b, p) % p
+            return a, b, y
+
+        a_i, b_i, y_i = new_walks(self.walks)
+        lengths = np.zeros(self.walks, dtype=np.int64)
+        self.steps = 0
+        init_time = time.time()
+        try:
+            while self._running(n, init_time):
+                hashes = np.fromiter((self.header_hash(y) for y in y_i.tolist()), dtype=np.uint64,
+                                     count=self.walks)
+                prev_y = y_i
+                partition = hashes % np.uint64(3)
+                h_part = partition == 2
+                sq_part = partition == 0
+                g_part = partition == 1
+                y_i = y_i.copy()
+                y_i[h_part] = self._table_pow(h_table, hashes[h_part], p) * y_i[h_part] % p
+                y_i[g_part] = self._table_pow(g_table, hashes[g_part], p) * y_i[g_part] % p
+                y_i[sq_part] = self._pow(y_i[sq_part], hashes[sq_part], p)
+                a_i[sq_part] = a_i[sq_part] * hashes[sq_part] % order
+                a_i[g_part] = (a_i[g_part] + hashes[g_part]) % order
+                b_i[sq_part] = b_i[sq_part] * hashes[sq_part] % order
+                b_i[h_part] = (b_i[h_part] + hashes[h_part]) % order
+                lengths += 1
+                self.steps += self.walks
+
+                distinguished = np.flatnonzero((y_i >> shift) == 0)
+                for idx in distinguished.tolist():
+                    found = collector.add(int(y_i[idx]), int(a_i[idx]), int(b_i[idx]), int(prev_y[idx]))
+                    if found:
+                        nonce, solution = found
+                        solution.pubkey = pubkey
+                        self.block.nonce = nonce
+                        self.state.block_key = None
+                        return nonce, solution
+                # restart the walks which reached a distinguished point or are trapped in a cycle
+                restart = np.flatnonzero(((y_i >> shift) == 0) | (lengths >= self.max_walk))
+                if restart.size:
+                    a_i[restart], b_i[restart], y_i[restart] = new_walks(restart.size)
+                    lengths[restart] = 0
+        finally:
+            self.state.steps += self.steps
+        # failed to find the solution and nonce, return none
+        print("Cannot seal a new block within block time! Try again")
+        return 0, None
@@ -6,23 +6,86 @@ from typing import Optional
 import time
 from blockchain.block import Block
 from crypto.pollard_rho import func_g, func_h
+from crypto.elgamal_util import fixed_base_table, multi_exp
+from crypto import backend
 from mining.pollard_rho_solution import PRSolution
 
 
+# cycle detection strategies of the rho walk
+FLOYD = "floyd"
+BRENT = "brent"
+STACK = "stack"
+CYCLE_DETECTIONS = (FLOYD, BRENT, STACK)
+
+
+class WalkState:
+    """State of a rho walk which can be suspended at the end of block time and resumed later.
+
+    The walk only makes sense for the candidate block it started with, so the state is bound to a key of the block
+    header without nonce. Every pointer is kept as an (a, b, y) triple for y = g^a * h^b.
+    """
+    def __init__(self):
+        self.block_key = None
+        self.cycle_detection = None
+        # Floyd: tortoise and hare; Brent: saved point and walking point; stack: the walking point is the hare
+        self.tortoise = None
+        self.hare = None
+        # the point before the hare, which is the nonce if the hare meets the tortoise
+        self.prev_y = None
+        # length of the current Brent window and number of steps walked in it
+        self.power = 1
+        self.lam = 0
+        # points stored by the stack strategy, None after the walk falls back to Brent's algorithm
+        self.table = []
+        # distinguished points collected by the parallel miner
+        self.points = {}
+        # total number of step evaluations of the walk
+        self.steps = 0
+
+    def start(self, block_key, cycle_detection: str, point: tuple[int, int, int]):
+        """Start a new walk from the point (a, b, y)."""
+        self.__init__()
+        self.block_key = block_key
+        self.cycle_detection = cycle_detection
+        self.tortoise = point
+        self.hare = point
+
+    def resumable(self, block_key, cycle_detection: str) -> bool:
+        """Test if the walk has been started for the same candidate block and strategy."""
+        return self.block_key == block_key and self.cycle_detection == cycle_detection
+
+
 class SimplePRMiner:
     """A pollard rho miner uses textbook mapping functions to search private key."""
-    def __init__(self, block: Block, block_time=0):
+    def __init__(self, block: Block, block_time=0, cycle_detection=FLOYD, table_size=32, state: WalkState = None):
+        """Init pollard rho miner.
+
+        Args:
+            block: candidate block to be sealed
+            block_time: max time in seconds to search the solution
+            cycle_detection: strategy to detect the cycle of the walk, one of "floyd", "brent" and "stack"
+            table_size: max number of points stored by the "stack" strategy
+            state: walk state to be resumed if it belongs to the same block, it is updated in place by mining
+        """
+        if cycle_detection not in CYCLE_DETECTIONS:
+            raise ValueError(f"Unknown cycle detection strategy {cycle_detection}!")
         self.block = block
         self.block_time = block_time
+        self.cycle_detection = cycle_detection
+        self.table_size = table_size
+        self.state = state if state is not None else WalkState()
+        # number of step evaluations (header hash + mapping functions) in last mining
+        self.steps = 0
 
     def header_hash(self, nonce: int) -> int:
-        self.block.nonce = nonce
         # if the block is restored from database or json, the full Tx info may missing
         # WARNING: this part of code is insecure and it is not based on original design but only for
         # simplification of code.
-        header_hash = self.block.current_block_hash if self.block.current_block_hash else self.block.hash_header()
-        hash_val = int.from_bytes(header_hash, byteorder='little', signed=True) % self.block.public_key.p
-        return hash_val
+        if self.block.current_block_hash:
+            return int.from_bytes(self.block.current_block_hash, byteorder='little', signed=True) % \
+                self.block.public_key.p
+        # the nonce of the block is only assigned once the solution is found
+        return self.block.hash_with_nonce(nonce)
 
     def func_f(self, hash_i, y_i):
         """x_(i+1) = func_f(hash(x_i))"""
@@ -50,7 +113,28 @@ class SimplePRMiner:
 
     @staticmethod
     def _calculate_y(a, b, g, h, p):
-        return (pow(g, a, p) * pow(h, b, p)) % p
+        return multi_exp([g, h], [a, b], p)
+
+    def _random_point(self, n, rng=None):
+        """Start a walk from y = g^a * h^b with random a and b."""
+        pubkey = self.block.public_key
+        a_i = rng.randint(0, n) if rng else randint(0, n)
+        b_i = rng.randint(0, n) if rng else randint(0, n)
+        return a_i, b_i, self._calculate_y(a_i, b_i, pubkey.g, pubkey.h, pubkey.p)
+
+    def _step(self, a_i, b_i, y_i, n):
+        """Walk a single step from y_i = g^a_i * h^b_i."""
+        self.steps += 1
+        hash_i = self.header_hash(y_i)
+        return self.func_g(a_i, n, hash_i), self.func_h(b_i, n, hash_i), self.func_f(hash_i, y_i)
+
+    def _running(self, n, init_time):
+        return self.steps <= 3 * n and (time.time() - init_time) < self.block_time
+
+    def walk_key(self):
+        """Key of the candidate block for the walk state."""
+        pubkey = self.block.public_key
+        return self.block.static_digest(), self.block.current_block_hash, pubkey.p, pubkey.g, pubkey.h
 
     def mining(self) -> tuple[int, Optional[PRSolution]]:
         """
@@ -58,6 +142,7 @@ class SimplePRMiner:
         Computes `x` = a mod n for the DLP base**x % p == y
         in the Group G = {0, 1, 2, ..., n}
         given that order `n` is a prime number.
+        If the walk state belongs to the same block, the walk is resumed instead of starting over.
 
         Returns:
             nonce and paired private key
@@ -65,62 +150,135 @@ class SimplePRMiner:
         pubkey = self.block.public_key
         n = (pubkey.p - 1) // 2
 
-        a_i = randint(0, n)
-        b_i = randint(0, n)
-        a_2i = a_i
-        b_2i = b_i
+        state = self.state
+        block_key = self.walk_key()
+        if not state.resumable(block_key, self.cycle_detection):
+            state.start(block_key, self.cycle_detection, self._random_point(n))
 
-        y_i = self._calculate_y(a_i, b_i, pubkey.g, pubkey.h, pubkey.p)
-        y_2i = y_i
-
-        i = 1
+        self.steps = 0
         init_time = time.time()
-        while i <= n and (time.time() - init_time) < self.block_time:
+        try:
+            if self.cycle_detection == BRENT:
+                found = self._brent_mining(state, n, init_time)
+            elif self.cycle_detection == STACK:
+                found = self._stack_mining(state, n, init_time)
+            else:
+                found = self._floyd_mining(state, n, init_time)
+        finally:
+            state.steps += self.steps
+        if found:
+            nonce, solution = found
+            solution.pubkey = pubkey
+            # the nonce of the block shall be the one which matches the solution
+            self.block.nonce = nonce
+            # the walk is finished, do not resume it
+            state.block_key = None
+            return nonce, solution
+        # failed to find the solution and nonce, return none
+        print("Cannot seal a new block within block time! Try again")
+        return 0, None
+
+    def _floyd_mining(self, state: WalkState, n, init_time) -> Optional[tuple[int, PRSolution]]:
+        """Floyd's cycle detection, the hare walks two steps when the tortoise walks one step."""
+        a_i, b_i, y_i = state.tortoise
+        a_2i, b_2i, y_2i = state.hare
+        while self._running(n, init_time):
             # Single Step calculations
-            hash_1i = self.header_hash(y_i)
-            a_i = self.func_g(a_i, n, hash_1i)
-            b_i = self.func_h(b_i, n, hash_1i)
-            y_i = self.func_f(hash_1i, y_i)
-            # print(f"y: {y_i}, a: {a_i}, b: {b_i}")
+            a_i, b_i, y_i = self._step(a_i, b_i, y_i, n)
             # assert(y_i == self._calculate_y(a_i, b_i, pubkey.g, pubkey.h, pubkey.p))
 
             # Double Step calculations
-            hash_2mi = self.header_hash(y_2i)
-            a_2i = self.func_g(a_2i, n, hash_2mi)
-            b_2i = self.func_h(b_2i, n, hash_2mi)
-            y_2mi = self.func_f(hash_2mi, y_2i)
-            hash_2i = self.header_hash(y_2mi)
-            a_2i = self.func_g(a_2i, n, hash_2i)
-            b_2i = self.func_h(b_2i, n, hash_2i)
-            y_2i = self.func_f(hash_2i, y_2mi)
+            a_2i, b_2i, y_2mi = self._step(a_2i, b_2i, y_2i, n)
+            a_2i, b_2i, y_2i = self._step(a_2i, b_2i, y_2mi, n)
             # assert (y_2i == self._calculate_y(a_2i, b_2i, pubkey.g, pubkey.h, pubkey.p))
+            # if the walk is interrupted between these assignments, the distance of the pointers is only off by one
+            # step, which still grows by one per iteration so that the cycle is found
+            state.tortoise = (a_i, b_i, y_i)
+            state.hare = (a_2i, b_2i, y_2i)
 
             if y_i == y_2i:
-                # print("left side = ", (pow(pubkey.g, a_i, pubkey.p) * pow(pubkey.h, b_i, pubkey.p)) % pubkey.p)
-                # print("right side = ", (pow(pubkey.g, a_2i, pubkey.p) * pow(pubkey.h, b_2i, pubkey.p)) % pubkey.p)
-                solution = PRSolution(a_i, a_2i, b_i, b_2i, n)
-                solution.pubkey = pubkey
-                return y_2mi, solution
-            else:
-                i += 1
-                continue
-        # failed to find the solution and nonce, return none
-        print("Cannot seal a new block within block time! Try again")
-        return 0, None
+                return y_2mi, PRSolution(a_i, a_2i, b_i, b_2i, n)
+        return None
+
+    def _brent_mining(self, state: WalkState, n, init_time) -> Optional[tuple[int, PRSolution]]:
+        """Brent's cycle detection, the tortoise teleports to the hare whenever the walked length is a power of 2."""
+        a_t, b_t, y_t = state.tortoise
+        if state.prev_y is None:
+            # the hare starts one step ahead of the tortoise
+            state.prev_y = state.hare[2]
+            state.hare = self._step(*state.hare, n)
+            state.power = state.lam = 1
+        a_i, b_i, y_i = state.hare
+        while self._running(n, init_time):
+            if y_i == y_t:
+                return state.prev_y, PRSolution(a_t, a_i, b_t, b_i, n)
+            if state.power == state.lam:
+                a_t, b_t, y_t = a_i, b_i, y_i
+                state.tortoise = (a_t, b_t, y_t)
+                state.power *= 2
+                state.lam = 0
+            state.prev_y = y_i
+            a_i, b_i, y_i = self._step(a_i, b_i, y_i, n)
+            state.hare = (a_i, b_i, y_i)
+            state.lam += 1
+        return None
+
+    def _stack_mining(self, state: WalkState, n, init_time) -> Optional[tuple[int, PRSolution]]:
+        """Nivasch's stack cycle detection with a bounded table of stored points.
+
+        The table keeps an increasing sequence of points, the walk is in a cycle when it meets the minimum point of
+        the cycle again. The minimum of the cycle must stay in the table to be detected, so when the table is full
+        the walk continues with Brent's cycle detection from the current point, which needs no memory.
+        """
+        if state.table is None:
+            return self._brent_mining(state, n, init_time)
+        table = state.table
+        a_i, b_i, y_i = state.hare
+        while self._running(n, init_time):
+            while table and table[-1][0] > y_i:
+                table.pop()
+            if table and table[-1][0] == y_i:
+                _, a_t, b_t = table[-1]
+                return state.prev_y, PRSolution(a_t, a_i, b_t, b_i, n)
+            if len(table) == self.table_size:
+                state.table = None
+                state.tortoise = state.hare
+                state.prev_y = None
+                return self._brent_mining(state, n, init_time)
+            table.append((y_i, a_i, b_i))
+            state.prev_y = y_i
+            a_i, b_i, y_i = self._step(a_i, b_i, y_i, n)
+            state.hare = (a_i, b_i, y_i)
+        return None
 
 
 class PRMiner(SimplePRMiner):
     """The pollard rho miner with a mapping function which is hard to compute reversely."""
+    def __init__(self, block: Block, block_time=0, cycle_detection=FLOYD, table_size=32, state: WalkState = None):
+        super().__init__(block, block_time, cycle_detection, table_size, state)
+        # fixed base tables of g and h, which are shared by all miners of the same public key
+        self._table_key = None
+        self._g_table = None
+        self._h_table = None
+        self._load_tables()
+
+    def _load_tables(self):
+        pubkey = self.block.public_key
+        self._g_table = fixed_base_table(pubkey.g, pubkey.p)
+        self._h_table = fixed_base_table(pubkey.h, pubkey.p)
+        self._table_key = pubkey
+
     def func_f(self, hash_i, y_i):
-        base = self.block.public_key.g
-        h = self.block.public_key.h
+        if self._table_key is not self.block.public_key:
+            # the public key of the block has been replaced
+            self._load_tables()
         p = self.block.public_key.p
         if hash_i % 3 == 2:
-            return (pow(h, hash_i, p) * y_i) % p
+            return (self._h_table.pow(hash_i) * y_i) % p
         elif hash_i % 3 == 0:
-            return pow(y_i, hash_i, p)
+            return backend.powmod(y_i, hash_i, p)
         elif hash_i % 3 == 1:
-            return (pow(base, hash_i, p) * y_i) % p
+            return (self._g_table.pow(hash_i) * y_i) % p
         else:
             raise ValueError("Input value has error!")
 
@@ -0,0 +1,155 @@
+"""
+Parallel Pollard rho hash mining with distinguished points.
+
+Every worker process runs short random walks with the same mapping functions as PRMiner. A walk stops as soon as
+it reaches a "distinguished" point (a point with k leading zero bits) and reports it to the collector in the parent
+process. Two walks reaching the same distinguished point with different exponents give the solution, so the expected
+time to seal a block drops roughly linearly with the number of workers.
+
+The workers are forked from the miner process so that they inherit the candidate block as it is. A pickled copy of a
+block does not have the same header hash, because the body hash depends on the repr of the transaction objects.
+"""
+import multiprocessing
+import queue
+import random
+import time
+from typing import Optional
+from blockchain.block import Block
+from mining.pollard_rho_hash import PRMiner, WalkState
+from mining.pollard_rho_solution import PRSolution
+
+
+def default_dp_bits(bit_length: int) -> int:
+    """Number of leading zero bits for distinguished points, which keeps each walk much shorter than sqrt(p)."""
+    return max(1, bit_length // 4)
+
+
+def is_distinguished(y: int, shift: int) -> bool:
+    """Test if a point has enough leading zero bits, where shift = p.bit_length() - dp_bits."""
+    return y >> shift == 0
+
+
+class DPCollector:
+    """Collector of distinguished points which detects the collision of two different walks."""
+    def __init__(self, n: int, points: dict = None):
+        """Init collector.
+
+        Args:
+            n: order of the subgroup, where n = (p - 1) // 2
+            points: distinguished points collected before for the same block
+        """
+        self.n = n
+        # distinguished point -> (a, b, previous point of the walk)
+        self.points = points if points is not None else {}
+
+    def add(self, y: int, a: int, b: int, prev_y: int) -> Optional[tuple[int, PRSolution]]:
+        """Add a distinguished point y = g^a * h^b reached from prev_y.
+
+        Returns:
+            nonce and solution if the point has been reached by another walk, otherwise None
+        """
+        seen = self.points.get(y)
+        if seen is None:
+            self.points[y] = (a, b, prev_y)
+            return None
+        a1, b1, _ = seen
+        if (b1 - b) % self.n == 0:
+            # both walks carry the same exponent of h, so the collision cannot reveal the private key
+            return None
+        return prev_y, PRSolution(a1, a, b1, b, self.n)
+
+
+def _walk_worker(block: Block, dp_bits: int, max_walk: int, points: multiprocessing.Queue, steps, stop):
+    """Run random walks until the stop event is set and report every distinguished point to the collector."""
+    miner = PRMiner(block)
+    n = (block.public_key.p - 1) // 2
+    shift = block.public_key.p.bit_length() - dp_bits
+    # the module level generator is copied by fork, every worker needs its own random state
+    rng = random.Random()
+    while not stop.is_set():
+        a_i, b_i, y_i = miner._random_point(n, rng)
+        miner.steps = 0
+        while miner.steps < max_walk:
+            prev_y = y_i
+            a_i, b_i, y_i = miner._step(a_i, b_i, y_i, n)
+            if is_distinguished(y_i, shift):
+                points.put((y_i, a_i, b_i, prev_y))
+                break
+        # if no distinguished point is found, the walk is trapped in a cycle, start a new one
+        with steps.get_lock():
+            steps.value += miner.steps
+
+
+class ParallelPRMiner(PRMiner):
+    """The pollard rho miner running independent walks in a group of forked processes.
+
+    The worker processes are started for every call of mining() and stopped once the block is sealed or the block
+    time is over, forking a process costs a few milliseconds which is negligible compared to the block time.
+    """
+    def __init__(self, block: Block, block_time=0, workers: int = None, dp_bits: int = None,
+                 state: WalkState = None):
+        """Init parallel miner.
+
+        Args:
+            block: candidate block to be sealed
+            block_time: max time in seconds to search the solution
+            workers: number of walking processes, default is the number of CPUs
+            dp_bits: number of leading zero bits of distinguished points, default depends on key size
+            state: walk state keeping the distinguished points collected for the same block
+        """
+        super().__init__(block, block_time, state=state)
+        self.workers = workers if workers else multiprocessing.cpu_count()
+        self.dp_bits = dp_bits if dp_bits else default_dp_bits(block.public_key.bit_length)
+        # abandon a walk if it does not meet a distinguished point after 20 times of the expected length
+        self.max_walk = 20 * 2 ** self.dp_bits
+
+    def mining(self) -> tuple[int, Optional[PRSolution]]:
+        """
+        Collect distinguished points from all workers until two walks collide.
+        The number of steps of all finished walks is recorded in `steps`, the walks interrupted by the end of mining
+        are not counted. The distinguished points are kept in the walk state, so a later call for the same block
+        continues with all points collected before.
+
+        Returns:
+            nonce and paired private key
+        """
+        pubkey = self.block.public_key
+        block_key = self.walk_key()
+        if not self.state.resumable(block_key, "parallel"):
+            self.state.start(block_key, "parallel", None)
+        collector = DPCollector((pubkey.p - 1) // 2, self.state.points)
+        context = multiprocessing.get_context("fork")
+        points = context.Queue()
+        steps = context.Value('q', 0)
+        stop = context.Event()
+        processes = [context.Process(target=_walk_worker,
+                                     args=(self.block, self.dp_bits, self.max_walk, points, steps, stop),
+                                     daemon=True)
+                     for _ in range(self.workers)]
+        for process in processes:
+            process.start()
+        init_time = time.time()
+        try:
+            while (time.time() - init_time) < self.block_time:
+                try:
+                    y_i, a_i, b_i, prev_y = points.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                found = collector.add(y_i, a_i, b_i, prev_y)
+                if found:
+                    nonce, solution = found
+                    solution.pubkey = pubkey
+                    self.block.nonce = nonce
+                    self.state.block_key = None
+                    return nonce, solution
+        finally:
+            stop.set()
+            for process in processes:
+                process.terminate()
+                process.join()
+            # a terminated worker may hold the lock of the counter, read the raw value
+            self.steps = steps.get_obj().value
+            self.state.steps += self.steps
+        # failed to find the solution and nonce, return none
+        print("Cannot seal a new block within block time! Try again")
+        return 0, None
@@ -4,6 +4,8 @@ from crypto.pollard_rho import pollard_eqs_solver
 
 class PRSolution:
     """Solution from pollard rho method."""
+    __slots__ = ("a1", "a2", "b1", "b2", "n", "pubkey")
+
     def __init__(self, a1, a2, b1, b2, n, pubkey: PublicKey = None):
         self.a1 = a1
         self.a2 = a2
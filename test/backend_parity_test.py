@@ -0,0 +1,81 @@
+import random
+import unittest
+import crypto.elgamal as elgamal
+from crypto import backend
+
+
+class TestBackendParity(unittest.TestCase):
+    """The gmpy2 and Python backends shall give bit-identical results for the same seeds."""
+    def setUp(self) -> None:
+        self._backend = backend.BACKEND
+        self._seed = 833050814021254693158343911234888353695402778102174580258852673738983005
+
+    def tearDown(self) -> None:
+        backend.set_backend(self._backend)
+
+    def _run_backends(self, func) -> list:
+        """Run func with every available backend and return the results."""
+        results = []
+        for name in backend.available_backends():
+            backend.set_backend(name)
+            results.append(func())
+        return results
+
+    def _assert_parity(self, func):
+        results = self._run_backends(func)
+        for result in results[1:]:
+            self.assertEqual(results[0], result, "The arithmetic backends are not identical!")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backend.set_backend("unknown")
+
+    def test_primitives(self):
+        rng = random.Random(self._seed)
+        numbers = [(rng.getrandbits(256), rng.getrandbits(128), rng.getrandbits(256) | 1) for _ in range(200)]
+
+        def primitives():
+            return [(backend.powmod(a, e, m), backend.gcd(a, m), backend.jacobi(a, m),
+                     backend.invert(a, m) if backend.gcd(a, m) == 1 else None) for a, e, m in numbers]
+        self._assert_parity(primitives)
+
+    def test_is_prime(self):
+        rng = random.Random(self._seed)
+        # strong pseudoprimes to base 2, Carmichael numbers and Mersenne primes
+        special = [2047, 3277, 4033, 4681, 8321, 561, 1105, 1729, 3215031751, 2 ** 61 - 1, 2 ** 89 - 1, 2 ** 127 - 1]
+        numbers = list(range(10000)) + special + [rng.getrandbits(80) for _ in range(1000)]
+
+        def primes():
+            return [backend.is_prime(num) for num in numbers]
+        results = self._run_backends(primes)
+        self.assertEqual(results[0][2047], False)
+        self.assertEqual(results[0][10000 + special.index(2 ** 127 - 1)], True)
+        for result in results[1:]:
+            self.assertEqual(results[0], result, "The primality tests are not identical!")
+
+    def test_pub_key_chain(self):
+        def pub_key_chain():
+            pub = elgamal.generate_pub_key(seed=self._seed, bit_length=64)
+            chain = [pub]
+            for _ in range(20):
+                pub = elgamal.generate_pub_key(seed=int(pub.p + pub.g + pub.h), bit_length=64)
+                chain.append(pub)
+            return chain
+        self._assert_parity(pub_key_chain)
+
+    def test_encryption(self):
+        pub = elgamal.generate_pub_key(seed=self._seed, bit_length=20)
+        private_key = elgamal.find_private_key(pub)
+        message = "The same cipher shall be decrypted by every backend."
+
+        def encryption():
+            cipher = elgamal.encrypt(pub, message, random.Random(self._seed))
+            return cipher, elgamal.decrypt(private_key, cipher)
+        results = self._run_backends(encryption)
+        self.assertEqual(results[0][1], message)
+        for result in results[1:]:
+            self.assertEqual(results[0], result, "The ciphers are not identical!")
+
+
+if __name__ == '__main__':
+    unittest.main()
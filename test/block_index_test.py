@@ -0,0 +1,66 @@
+import time
+import unittest
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.block_index import BlockIndex, block_work
+from blockchain.validator import block_hash
+from sync_test import mine_chain
+
+
+class TestBlockIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 24))
+        genesis.current_block_hash = genesis.hash_header()
+        cls.main = mine_chain([genesis], 6, "main")
+        cls.fork = mine_chain(cls.main[:4], 3, "fork")
+        cls.short_fork = mine_chain(cls.main[:4], 2, "fork")
+
+    def test_main_chain(self):
+        chain = list(self.main)
+        block_index = BlockIndex(chain)
+        self.assertIs(chain, block_index.chain)
+        self.assertEqual(self.main, chain)
+        self.assertIs(self.main[-1], block_index.tip.block)
+        self.assertEqual(7 * block_work(self.main[0]), block_index.tip.work)
+        self.assertIs(self.main[2], block_index.get(block_hash(self.main[3])).parent.block)
+        self.assertIn(block_hash(self.main[5]), block_index)
+        self.assertEqual(7, len(block_index))
+
+    def test_fork_choice(self):
+        """The main chain is only switched to a fork with more work, and only above the fork point."""
+        chain = self.main[:6]
+        block_index = BlockIndex(chain)
+        # a tie keeps the tip which has been seen first
+        self.assertIsNone(block_index.add_blocks(self.short_fork[4:]))
+        self.assertEqual(self.main[:6], chain)
+        self.assertIs(self.main[5], block_index.tip.block)
+        self.assertEqual(6, block_index.add(self.main[6]))
+        self.assertEqual(self.main, chain)
+        self.assertIsNone(block_index.add_blocks(self.fork[4:]))
+        self.assertEqual(12, len(block_index))
+        # the same block is not indexed again
+        self.assertIsNone(block_index.add(self.main[6]))
+        self.assertEqual(12, len(block_index))
+
+    def test_reorg(self):
+        chain = self.main[:6]
+        block_index = BlockIndex(chain)
+        self.assertEqual(4, block_index.add_blocks(self.fork[4:]))
+        self.assertEqual(self.fork, chain)
+        self.assertIs(self.fork[-1], block_index.tip.block)
+        self.assertFalse(block_index.on_main_chain(block_index.get(block_hash(self.main[5]))))
+        # the old branch is kept in the index, so it becomes the main chain again once it has more work
+        self.assertIsNone(block_index.add(self.main[6]))
+        longer_main = mine_chain(self.main, 1, "main")
+        self.assertEqual(4, block_index.add(longer_main[-1]))
+        self.assertEqual(longer_main, chain)
+
+    def test_unknown_parent(self):
+        block_index = BlockIndex(self.main[:3])
+        with self.assertRaises(ValueError):
+            block_index.add(self.main[4])
+
+
+if __name__ == '__main__':
+    unittest.main()
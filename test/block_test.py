@@ -0,0 +1,82 @@
+import time
+import unittest
+import crypto.elgamal as elgamal
+from blockchain.block import Block, BINARY_HEADER_VERSION, BINARY_HEADER_FORMAT
+from blockchain.transaction import Tx
+from mining.pollard_rho_hash import PRMiner
+
+
+class TestBlock(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pub = elgamal.generate_pub_key(0xffffffffffff, 32)
+        self.txs = [Tx.coinbase("miner", 100), Tx("alice", "bob", 5, "#4:1,2,3:AAAA", 10)]
+        self.block = Block(1, time.time(), self.txs, self.pub, prev_block_hash=b"\x00" * 32)
+
+    def test_slots(self):
+        nonce, solution = PRMiner(self.block, 600).mining()
+        for obj in (self.block, self.pub, solution, self.txs[0], solution.generate_private_key()):
+            self.assertFalse(hasattr(obj, "__dict__"), f"{type(obj).__name__} shall be slotted")
+        self.assertEqual(32, self.block.difficulty)
+
+    def test_seal(self):
+        nonce, solution = PRMiner(self.block, 600).mining()
+        header_hash = self.block.hash_header()
+        self.block.seal(solution)
+        self.assertIs(solution, self.block.solution)
+        self.assertEqual(header_hash, self.block.current_block_hash)
+        self.assertIsNone(self.block._static_hash)
+        # the header of a sealed block is hashed again without keeping the hash object
+        self.assertEqual(header_hash, self.block.hash_header())
+        self.assertIsNone(self.block._static_hash)
+        record = self.block.get_db_record(tx_ids=[1, 2])
+        self.assertEqual(header_hash, record["header_hash"])
+        loaded = Block.from_db(record)
+        self.assertEqual(repr(solution), repr(loaded.solution))
+        self.assertEqual(self.block.nonce, record["nonce"])
+
+    def test_hash_with_nonce(self):
+        """Test if the fast path of the miner matches the header hash of every block version."""
+        for version in range(1, BINARY_HEADER_VERSION + 1):
+            block = Block(1, self.block.timestamp, self.txs, self.pub, prev_block_hash=b"\x00" * 32, version=version)
+            for nonce in (1, 12345, self.pub.p - 1):
+                block.nonce = nonce
+                expected = int.from_bytes(block.hash_header(), byteorder='little', signed=True) % self.pub.p
+                block.nonce = None
+                self.assertEqual(expected, block.hash_with_nonce(nonce))
+                # the nonce of the block is not changed by the fast path
+                self.assertIsNone(block.nonce)
+
+    def test_binary_header(self):
+        block = Block(1, self.block.timestamp, self.txs, self.pub, prev_block_hash=b"\x00" * 32,
+                      version=BINARY_HEADER_VERSION)
+        header = block.binary_header()
+        self.assertEqual(BINARY_HEADER_FORMAT.size + 3 * block.key_width(), len(header))
+        self.assertEqual((BINARY_HEADER_VERSION, 1, block.timestamp, 32, b"\x00" * 32, block.body_hash()),
+                         BINARY_HEADER_FORMAT.unpack_from(header))
+        self.assertEqual(self.pub.h, int.from_bytes(header[-block.key_width():], 'big'))
+        # the previous block hash is committed by the binary header
+        other = Block(1, self.block.timestamp, self.txs, self.pub, prev_block_hash=b"\x01" * 32,
+                      version=BINARY_HEADER_VERSION)
+        self.assertNotEqual(block.hash_with_nonce(7), other.hash_with_nonce(7))
+        nonce, solution = PRMiner(block, 600).mining()
+        block.seal(solution)
+        self.assertEqual(nonce, block.nonce)
+        self.assertEqual(block.current_block_hash, block.hash_header())
+        # the sealed block is validated like in miner.validate_blockchain
+        v_miner = PRMiner(block)
+        self.assertEqual(elgamal.multi_exp([self.pub.g, self.pub.h], [solution.a1, solution.b1], self.pub.p),
+                         v_miner.func_f(v_miner.header_hash(block.nonce), block.nonce))
+
+    def test_tx_dict(self):
+        tx = self.txs[1]
+        record = tx.to_dict()
+        record["block_height"] = 1
+        # the record is a new dict, so adding database columns does not change the transaction
+        self.assertEqual(tx.to_dict(), Tx.from_dict(record).to_dict())
+        self.assertNotIn("block_height", tx.to_dict())
+        self.assertEqual({"version", "addr_from", "addr_to", "amount", "cipher", "release_block_idx"},
+                         set(tx.to_dict()))
+
+
+if __name__ == '__main__':
+    unittest.main()
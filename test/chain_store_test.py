@@ -0,0 +1,105 @@
+import pickle
+import time
+import unittest
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.block import Block
+from blockchain.block_index import BlockIndex
+from blockchain.chain_store import ChainStore, pad_rows
+from blockchain.validator import ChainValidator, block_hash
+from sync_test import mine_chain
+
+
+class TestChainStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 24))
+        cls.genesis.current_block_hash = cls.genesis.hash_header()
+        cls.main = mine_chain([cls.genesis], 6, "main")
+
+    def setUp(self) -> None:
+        # the database of a node with the genesis block, whose tables have all columns
+        self.database = dataset.connect('sqlite:///:memory:')
+        records = pad_rows([self.genesis.get_db_record(), self.main[1].get_db_record(tx_ids=[0])])
+        self.database['blockchain'].insert(records[0])
+        tx_id = self.database['transactions'].insert(dict(self.main[1].transactions[0].to_dict(), block_height=1))
+        self.database['transactions'].delete(id=tx_id)
+        for block in self.main:
+            block.dirty = block.height > 0
+
+    def assert_stored(self, chain: list[Block]):
+        rows = list(self.database['blockchain'].find(order_by="id"))
+        self.assertEqual(list(range(1, len(chain) + 1)), [row["id"] for row in rows])
+        self.assertEqual([block_hash(block) for block in chain], [row["header_hash"] for row in rows])
+        for row, block in zip(rows[1:], chain[1:]):
+            tx_ids = [int(tx_id) for tx_id in row["transactions"].split(",")]
+            txs = list(self.database['transactions'].find(id=tx_ids))
+            self.assertEqual([tx.to_dict() for tx in block.transactions],
+                             [{key: tx[key] for key in block.transactions[0].to_dict()} for tx in txs])
+        self.assertFalse(any(block.dirty for block in chain))
+
+    def test_dirty(self):
+        block = Block(1, time.time(), [], self.genesis.public_key)
+        self.assertTrue(block.dirty)
+        block.dirty = False
+        block.add_transactions(self.main[1].transactions)
+        self.assertTrue(block.dirty)
+        db_block = Block.from_db(self.main[1].get_db_record())
+        self.assertFalse(db_block.dirty)
+
+    def test_save(self):
+        chain_store = ChainStore(self.database)
+        chain = self.main[:5]
+        self.assertEqual(8, chain_store.save(chain))
+        self.assert_stored(chain)
+        # a clean chain is not written again
+        self.assertEqual(0, chain_store.save(chain))
+        chain = list(self.main)
+        self.assertEqual(4, chain_store.save(chain))
+        self.assert_stored(chain)
+        # the rows above a lower tip are deleted
+        self.assertEqual(0, chain_store.save(chain[:4]))
+        self.assert_stored(chain[:4])
+        self.assertEqual(3, len(self.database['transactions']))
+
+    def test_reorg(self):
+        """Only the blocks above the fork point are rewritten, also for a branch which has been stored before."""
+        chain = list(self.main)
+        block_index = BlockIndex(chain)
+        chain_store = ChainStore(self.database)
+        self.assertEqual(12, chain_store.save(chain))
+        fork = mine_chain(self.main[:3], 5, "fork")
+        self.assertEqual(3, block_index.add_blocks(fork[3:]))
+        self.assertEqual(10, chain_store.save(chain))
+        self.assert_stored(fork)
+        longer_main = mine_chain(self.main, 2, "main")
+        self.assertEqual(3, block_index.add_blocks(longer_main[7:]))
+        self.assertEqual(12, chain_store.save(chain))
+        self.assert_stored(longer_main)
+
+    def test_load(self):
+        ChainStore(self.database).save(self.main)
+        # a row of a transaction which is not in a block is skipped
+        self.database['transactions'].insert(dict(self.main[1].transactions[0].to_dict(), block_height=None))
+        for lazy in (True, False):
+            chain_store = ChainStore(self.database)
+            chain = chain_store.load(lazy=lazy)
+            self.assertEqual(len(self.main), chain_store.height)
+            self.assertEqual([block_hash(block) for block in self.main], [block_hash(block) for block in chain])
+            self.assertFalse(any(block.dirty for block in chain))
+            self.assertEqual(lazy, chain[3]._tx_loader is not None)
+            self.assertEqual([[tx.to_dict() for tx in block.transactions] for block in self.main],
+                             [[tx.to_dict() for tx in block.transactions] for block in chain])
+            self.assertIsNone(chain[3]._tx_loader)
+            self.assertTrue(ChainValidator().validate(chain))
+            self.assertEqual(0, chain_store.save(chain))
+
+    def test_pickle_deferred(self):
+        ChainStore(self.database).save(self.main)
+        block = ChainStore(self.database).load()[2]
+        block = pickle.loads(pickle.dumps(block))
+        self.assertEqual(self.main[2].transactions[0].to_dict(), block.transactions[0].to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
+import base64
 import crypto.elgamal as elgamal
+from crypto import backend
 import unittest
+import random
 import sys
 
 
@@ -13,6 +16,9 @@ class TestElgamalEncryption(unittest.TestCase):
         self.assertEqual(0x92901, self.pub.h, "Public key h part is not correct!")
         self.assertEqual(0xb8433, self.pub.p, "Public key p part is not correct!")
 
+    def test_pubkey_str(self):
+        self.assertEqual(self.pub, elgamal.PublicKey.from_hex_str(repr(self.pub)))
+
     def test_python_version(self):
         self.assertTrue(sys.version_info >= (3, 7), "Python version is too low!")
 
@@ -29,6 +35,117 @@ class TestElgamalEncryption(unittest.TestCase):
             plain = elgamal.decrypt(private_key, cipher)
             self.assertEqual(message, plain, "Private key is not valid!")
 
+    def test_ephemeral_keys(self):
+        """Test if every cipher uses fresh ephemeral keys unless a random generator is given."""
+        private_key = elgamal.find_private_key(self.pub)
+        message = "The same message is encrypted twice."
+        ciphers = [elgamal.encrypt(self.pub, message) for _ in range(2)]
+        self.assertNotEqual(ciphers[0], ciphers[1])
+        for cipher in ciphers:
+            self.assertEqual(message, elgamal.decrypt(private_key, cipher))
+        self.assertEqual(elgamal.encrypt(self.pub, message, random.Random(1)),
+                         elgamal.encrypt(self.pub, message, random.Random(1)))
+        for y in elgamal.random_exponents(1000, self.pub.p):
+            self.assertTrue(1 <= y <= self.pub.p - 2)
+
+
+class TestCipherCodec(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pub = elgamal.generate_pub_key(seed=833050814021254693158343911234888353695402778102174580258852673738983005,
+                                            bit_length=20)
+        self.private_key = elgamal.find_private_key(self.pub)
+        self.messages = ["", "a", "ab\x00c", "Time release message with ünïcode ✓ and 😀 " * 10]
+
+    def test_byte_codec(self):
+        data = bytes(range(256)) * 3
+        for k in (1, 2, 3, 8, 32):
+            z = elgamal.encode_bytes(data, k)
+            self.assertTrue(all(num < 2 ** (8 * k) for num in z))
+            self.assertEqual(data, elgamal.decode_bytes(z, k, len(data)))
+        with self.assertRaises(ValueError):
+            elgamal.decode_bytes([2 ** 16], 2)
+
+    def test_legacy_cipher(self):
+        """Test if a cipher in the legacy format is still decrypted."""
+        self.assertEqual("ab", elgamal.decrypt(self.private_key, "724106 116455 136186 579818 583315 367303 "))
+        for message in self.messages:
+            cipher = elgamal.encrypt(self.pub, message)
+            self.assertFalse(cipher.startswith(elgamal.CIPHER_HEADER))
+            self.assertEqual(message.replace("\x00", ""), elgamal.decrypt(self.private_key, cipher))
+
+    def test_compact_cipher(self):
+        """Test if the compact format keeps null characters and has fewer pairs than the legacy format."""
+        for message in self.messages:
+            cipher = elgamal.encrypt(self.pub, message, compact=True)
+            self.assertTrue(cipher.startswith("#1:"))
+            self.assertEqual(message, elgamal.decrypt(self.private_key, cipher))
+        message = self.messages[-1]
+        self.assertLess(len(elgamal.encrypt(self.pub, message, compact=True)), len(elgamal.encrypt(self.pub, message)))
+
+    def test_binary_cipher(self):
+        """Test if the binary format decrypts like the decimal format and is smaller."""
+        for compact in (False, True):
+            for message in self.messages:
+                cipher = elgamal.encrypt(self.pub, message, random.Random(self.pub.p), compact=compact, binary=True)
+                decimal = elgamal.encrypt(self.pub, message, random.Random(self.pub.p), compact=compact)
+                self.assertTrue(cipher.startswith("#3:" if compact else "#2::"))
+                self.assertEqual(elgamal.decrypt(self.private_key, decimal), elgamal.decrypt(self.private_key, cipher))
+            self.assertLess(len(cipher), len(decimal))
+        width = (self.pub.p.bit_length() + 7) // 8
+        pairs = [(1, self.pub.p - 1), (self.pub.p - 2, 0)]
+        binary = elgamal.format_binary_pairs(pairs, self.pub.p)
+        self.assertEqual(pairs, elgamal.parse_binary_pairs(binary, self.pub.p))
+        self.assertEqual(4 + 4 * width, len(base64.b64decode(binary)))
+
+    def test_hybrid_cipher(self):
+        """Test if the hybrid envelope is decrypted and rejects a modified cipher."""
+        for message in self.messages:
+            cipher = elgamal.encrypt(self.pub, message, hybrid=True)
+            self.assertTrue(cipher.startswith(f"#{elgamal.CIPHER_HYBRID}:{elgamal.HYBRID_VERSION},"))
+            self.assertEqual(message, elgamal.decrypt(self.private_key, cipher))
+        payload = bytes(range(256)) * 4096
+        cipher = elgamal.hybrid_encrypt(self.pub, payload)
+        self.assertEqual(payload, elgamal.hybrid_decrypt(self.private_key, cipher))
+        # one pair in the header whatever the size of the payload
+        self.assertLess(len(cipher), len(payload) * 1.4)
+        self.assertEqual(elgamal.encrypt(self.pub, "seeded", random.Random(1), hybrid=True),
+                         elgamal.encrypt(self.pub, "seeded", random.Random(1), hybrid=True))
+        flags, fields, body = elgamal.parse_cipher_header(elgamal.encrypt(self.pub, "secret", hybrid=True))
+        modified = [
+            elgamal.format_cipher_header(flags, [fields[0], fields[1], int(fields[2]) + 1]) + body,
+            elgamal.format_cipher_header(flags, [2] + fields[1:]) + body,
+            elgamal.format_cipher_header(flags, fields) + body[:-4] + "AAAA",
+        ]
+        for cipher in modified:
+            with self.assertRaises(ValueError):
+                elgamal.decrypt(self.private_key, cipher)
+
+    def test_batch_encryption(self):
+        """Test if the batch encryption gives the same ciphers as single encryption with the same random draws."""
+        messages = [f"message {i} to the same release height" for i in range(100)]
+        initial_backend = backend.BACKEND
+        try:
+            for name in backend.available_backends():
+                # the python backend always uses the fixed base tables
+                backend.set_backend(name)
+                for options in ({}, {"compact": True, "binary": True}, {"hybrid": True}):
+                    rng = random.Random(self.pub.p)
+                    ciphers = [elgamal.encrypt(self.pub, message, rng, **options) for message in messages]
+                    self.assertEqual(ciphers, elgamal.encrypt_batch(self.pub, messages, random.Random(self.pub.p),
+                                                                    **options))
+        finally:
+            backend.set_backend(initial_backend)
+        with elgamal.BatchEncryptor(workers=2, chunk_size=16) as encryptor:
+            ciphers = encryptor.encrypt(self.pub, messages, binary=True)
+            self.assertEqual(messages, [elgamal.decrypt(self.private_key, cipher) for cipher in ciphers])
+            with self.assertRaises(ValueError):
+                encryptor.encrypt(self.pub, messages, random.Random(0))
+
+    def test_malformed_header(self):
+        for cipher in ("#1", "#x:1:", "#64::1 2 ", "#4:1,2:AAAA", "#2::AAAAAQ==", "#2::*"):
+            with self.assertRaises(ValueError):
+                elgamal.decrypt(self.private_key, cipher)
+
 
 if __name__ == '__main__':
     unittest.main()
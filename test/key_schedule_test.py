@@ -0,0 +1,55 @@
+import time
+import unittest
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.block import Block, derive_public_key
+from blockchain.key_schedule import KeySchedule, derive_from_checkpoint, pub_key_from_record
+
+
+class TestKeySchedule(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db = dataset.connect('sqlite:///:memory:')
+        self.version = 2
+        self.tip = Block(10, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 32, version=2),
+                         version=self.version)
+        self.chain = [self.tip.public_key]
+        for _ in range(40):
+            self.chain.append(derive_public_key(self.chain[-1], 32, self.version))
+
+    def test_advance(self):
+        schedule = KeySchedule(self.db, ahead=30)
+        self.assertEqual(10, schedule.advance(self.tip, max_keys=10))
+        self.assertEqual(20, schedule.head())
+        self.assertEqual(20, schedule.advance(self.tip))
+        self.assertEqual(40, schedule.head())
+        self.assertEqual(0, schedule.advance(self.tip))
+        for i, pub_key in enumerate(self.chain[:31]):
+            self.assertEqual(pub_key, schedule.get(self.tip.height + i))
+        keys = schedule.range(15, 18)
+        self.assertEqual([15, 16, 17], [key["height"] for key in keys])
+        self.assertEqual(self.chain[5:8], [pub_key_from_record(key) for key in keys])
+
+    def test_new_tip(self):
+        schedule = KeySchedule(self.db, ahead=30)
+        schedule.advance(self.tip)
+        # the scheduled keys are kept if the new tip matches the schedule
+        next_block = Block(11, time.time(), [], self.chain[1], version=self.version)
+        self.assertEqual(1, schedule.advance(next_block))
+        # a new tip with another key drops and derives the schedule above the tip again
+        other_block = Block(12, time.time(), [], elgamal.generate_pub_key(0xffff, 32), version=1)
+        self.assertEqual(30, schedule.advance(other_block))
+        self.assertEqual(other_block.public_key, schedule.get(12))
+        self.assertEqual(derive_public_key(other_block.public_key, 32, 1), schedule.get(13))
+        self.assertEqual(42, schedule.head())
+
+    def test_checkpoint(self):
+        schedule = KeySchedule(self.db, ahead=30)
+        schedule.advance(self.tip, max_keys=20)
+        self.assertIsNone(schedule.nearest(9))
+        checkpoint = schedule.nearest(self.tip.height + 40)
+        self.assertEqual(self.tip.height + 20, checkpoint["height"])
+        self.assertEqual(self.chain[40], derive_from_checkpoint(checkpoint, self.tip.height + 40))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,5 +26,34 @@ class GreatestCommonDivisorTests(unittest.TestCase):
         self.assertNotEqual(elgamal.gcd(10, 20), 1)
 
 
+class FixedBaseExpTests(unittest.TestCase):
+    def test_fixed_base_exp(self):
+        for bit_length in (20, 32, 64):
+            pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=bit_length)
+            for window in (4, 8):
+                table = elgamal.FixedBaseExp(pub.g, pub.p, window)
+                for exp in (0, 1, pub.p - 2, pub.p - 1, pub.p, 3 * pub.p + 7, 0x1234567):
+                    self.assertEqual(pow(pub.g, exp, pub.p), table.pow(exp))
+
+
+class MultiExpTests(unittest.TestCase):
+    def test_joint_window_exp(self):
+        for bit_length in (20, 64):
+            pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=bit_length)
+            for window in (1, 2, 3):
+                for a, b in ((0, 0), (1, 0), (0, 1), (pub.p - 2, pub.p - 1), (0x1234567, 3 * pub.p + 7)):
+                    expected = pow(pub.g, a, pub.p) * pow(pub.h, b, pub.p) % pub.p
+                    self.assertEqual(expected, elgamal.joint_window_exp([pub.g, pub.h], [a, b], pub.p, window))
+                    self.assertEqual(expected, elgamal.multi_exp([pub.g, pub.h], [a, b], pub.p))
+
+    def test_multi_exp_big_modulus(self):
+        p = 2 ** 521 - 1
+        bases = [3, 5, 7]
+        exps = [2 ** 520 + 12345, 2 ** 300 - 1, 0]
+        expected = pow(3, exps[0], p) * pow(5, exps[1], p) % p
+        self.assertEqual(expected, elgamal.multi_exp(bases, exps, p))
+        self.assertEqual(expected, elgamal.joint_window_exp(bases, exps, p, 2))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
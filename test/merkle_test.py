@@ -0,0 +1,68 @@
+import time
+import unittest
+import crypto.elgamal as elgamal
+from blockchain.block import Block, MERKLE_BODY_VERSION
+from blockchain.merkle import MerkleTree, verify_proof, EMPTY_ROOT
+from blockchain.transaction import Tx
+
+
+class TestMerkleTree(unittest.TestCase):
+    def setUp(self) -> None:
+        self.leaves = [f"tx {i}".encode() for i in range(33)]
+
+    def test_append(self):
+        """Test if appending leaves one by one gives the same tree as building it at once."""
+        self.assertEqual(EMPTY_ROOT, MerkleTree().root)
+        tree = MerkleTree()
+        for size, leaf in enumerate(self.leaves, 1):
+            tree.append(leaf)
+            built = MerkleTree(self.leaves[:size])
+            self.assertEqual(built.levels, tree.levels)
+            self.assertEqual(size, len(tree))
+
+    def test_proof(self):
+        for size in (1, 2, 3, 5, 8, 33):
+            tree = MerkleTree(self.leaves[:size])
+            for index in range(size):
+                proof = tree.proof(index)
+                self.assertTrue(verify_proof(self.leaves[index], proof, tree.root))
+                self.assertFalse(verify_proof(b"forged tx", proof, tree.root))
+        with self.assertRaises(IndexError):
+            MerkleTree(self.leaves[:3]).proof(3)
+
+    def test_duplicated_leaf(self):
+        """The lone node is promoted, so a duplicated last leaf changes the root."""
+        self.assertNotEqual(MerkleTree(self.leaves[:3]).root, MerkleTree(self.leaves[:3] + self.leaves[2:3]).root)
+        # a leaf cannot be passed off as an inner node
+        tree = MerkleTree(self.leaves[:2])
+        self.assertNotEqual(tree.root, MerkleTree([tree.levels[0][0] + tree.levels[0][1]]).root)
+
+
+class TestMerkleBody(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pub = elgamal.generate_pub_key(0xffffffffffff, 32)
+        self.txs = [Tx.coinbase("miner", 100)] + [Tx("alice", "bob", str(i), "#4:1,2,3:AAAA", 10) for i in range(9)]
+
+    def test_body_hash(self):
+        """Test if the body hash of a v3 block does not depend on the tx objects."""
+        timestamp = time.time()
+        block = Block(1, timestamp, list(self.txs), self.pub, version=MERKLE_BODY_VERSION)
+        # the transactions as loaded from the database, with the amount stored as integer
+        loaded_txs = [Tx.from_dict(dict(tx.to_dict(), amount=int(tx.amount), id=i)) for i, tx in enumerate(self.txs)]
+        loaded = Block(1, timestamp, loaded_txs, self.pub, version=MERKLE_BODY_VERSION)
+        self.assertEqual(block.body_hash(), loaded.body_hash())
+        self.assertEqual(block.hash_header(), loaded.hash_header())
+        self.assertEqual(block.body_hash(), block.get_db_record()["merkle_root"])
+
+    def test_add_transactions(self):
+        block = Block(1, time.time(), self.txs[:3], self.pub, version=MERKLE_BODY_VERSION)
+        header_hash = block.hash_header()
+        block.add_transactions(self.txs[3:])
+        self.assertNotEqual(header_hash, block.hash_header())
+        self.assertEqual(MerkleTree([tx.encode() for tx in self.txs]).root, block.body_hash())
+        index = 4
+        self.assertTrue(verify_proof(self.txs[index].encode(), block.merkle_tree().proof(index), block.body_hash()))
+
+
+if __name__ == '__main__':
+    unittest.main()
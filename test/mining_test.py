@@ -1,6 +1,9 @@
 import crypto.elgamal as elgamal
-from mining.pollard_rho_hash import PRMiner, SimplePRMiner
+from mining.pollard_rho_hash import PRMiner, SimplePRMiner, WalkState, FLOYD, BRENT, STACK
+from mining.pollard_rho_parallel import ParallelPRMiner
+from mining.pollard_rho_batch import BatchPRMiner, batch_available
 from blockchain.block import Block
+from blockchain.transaction import Tx
 import unittest
 import time
 
@@ -15,6 +18,14 @@ class TestMining(unittest.TestCase):
 
     def _block_mining(self):
         nonce, solution = self.test_miner.mining()
+        # test if the nonce value matches the solution
+        pubkey = self.test_block.public_key
+        v_miner = PRMiner(self.test_block)
+        f_value = v_miner.func_f(v_miner.header_hash(nonce), nonce)
+        self.assertEqual(f_value,
+                         pow(pubkey.g, solution.a1, pubkey.p) * pow(pubkey.h, solution.b1, pubkey.p) % pubkey.p)
+        self.assertEqual(f_value,
+                         pow(pubkey.g, solution.a2, pubkey.p) * pow(pubkey.h, solution.b2, pubkey.p) % pubkey.p)
         private_key = solution.generate_private_key()
         generator = self.test_block.public_key.g
         prime = self.test_block.public_key.p
@@ -49,3 +60,75 @@ class TestMining(unittest.TestCase):
         block_len = 5
         for _ in range(block_len):
             self._block_mining()
+
+    def test_brent_miner(self):
+        """Test safe mining method with Brent's cycle detection."""
+        self.test_miner = PRMiner(self.test_block, self.test_block_time, cycle_detection=BRENT)
+        block_len = 5
+        for _ in range(block_len):
+            self._block_mining()
+
+    def test_stack_miner(self):
+        """Test safe mining method with stack cycle detection."""
+        self.test_miner = PRMiner(self.test_block, self.test_block_time, cycle_detection=STACK)
+        block_len = 5
+        for _ in range(block_len):
+            self._block_mining()
+
+    def test_small_table_stack_miner(self):
+        """Test stack cycle detection with a table much smaller than the expected stack depth."""
+        for table_size in (0, 1, 2):
+            self.test_miner = PRMiner(self.test_block, self.test_block_time, cycle_detection=STACK,
+                                      table_size=table_size)
+            self._block_mining()
+            # the walk shall end within a few times of the expected rho length sqrt(p)
+            self.assertLess(self.test_miner.steps, 40 * int(self.test_block.public_key.p ** 0.5))
+
+    def test_resume_walk(self):
+        """Test if the walk is resumed after the miner stops at the end of block time."""
+        for cycle_detection in (FLOYD, BRENT, STACK):
+            self.test_block.public_key = elgamal.generate_pub_key(0xffffffffffff, 36)
+            state = WalkState()
+            nonce, solution = PRMiner(self.test_block, 0.05, cycle_detection=cycle_detection, state=state).mining()
+            self.assertIsNone(solution)
+            first_steps = state.steps
+            hare = state.hare
+            self.assertGreater(first_steps, 0)
+            self.assertTrue(state.resumable(PRMiner(self.test_block).walk_key(), cycle_detection))
+            self.test_miner = PRMiner(self.test_block, self.test_block_time, cycle_detection=cycle_detection,
+                                      state=state)
+            self.test_miner.mining()
+            # the walk continued from the suspended hare instead of a new random point
+            self.assertEqual(state.steps, first_steps + self.test_miner.steps)
+            self.assertNotEqual(hare, state.hare)
+            self.assertIsNone(state.block_key)
+
+    def test_parallel_miner(self):
+        """Test parallel mining method with distinguished points."""
+        self.test_miner = ParallelPRMiner(self.test_block, self.test_block_time, workers=2)
+        block_len = 3
+        for _ in range(block_len):
+            self._block_mining()
+
+    def test_parallel_miner_with_txs(self):
+        """Test parallel mining of a block with transactions, the workers shall hash the same block header."""
+        self.test_block.transactions = [Tx.coinbase("miner", 100), Tx("alice", "bob", 1)]
+        self.test_miner = ParallelPRMiner(self.test_block, self.test_block_time, workers=2)
+        self._block_mining()
+        self.assertGreater(self.test_miner.steps, 0)
+
+    @unittest.skipUnless(batch_available(32), "NumPy is not installed")
+    def test_batch_miner(self):
+        """Test vectorized mining method with a batch of walks."""
+        self.test_block.transactions = [Tx.coinbase("miner", 100)]
+        self.test_miner = BatchPRMiner(self.test_block, self.test_block_time)
+        block_len = 3
+        for _ in range(block_len):
+            self._block_mining()
+
+    def test_batch_miner_fallback(self):
+        """Test if the batch miner falls back to the scalar walk for a large key."""
+        self.test_block.public_key = elgamal.generate_pub_key(0xffffffffffff, 34)
+        self.test_miner = BatchPRMiner(self.test_block, self.test_block_time)
+        self._block_mining()
+        self.assertEqual(FLOYD, self.test_miner.state.cycle_detection)
@@ -1,4 +1,7 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
 import crypto.elgamal as elgamal
+from blockchain.block import derive_public_key, KEY_DERIVATION_V2_VERSION
 import unittest
 import copy
 
@@ -22,3 +25,78 @@ class TestPubKey(unittest.TestCase):
         for i in range(self._pub_length):
             pub = elgamal.generate_pub_key(seed=int(pub.p + pub.g + pub.h), bit_length=self._bit_length)
             self.assertEqual(pub, self.pub_list[i], "The public key generator is not repeatable!")
+
+    def test_concurrent_derivation(self):
+        """Test if public keys derived concurrently in threads are the same as the sequential ones."""
+        seeds = [int(pub.p + pub.g + pub.h) for pub in [self.genesis_pub] + self.pub_list[:-1]]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for version in (1, 2):
+                expected = [elgamal.generate_pub_key(seed=seed, bit_length=self._bit_length, version=version)
+                            for seed in seeds]
+                pub_list = list(executor.map(lambda seed: elgamal.generate_pub_key(
+                    seed=seed, bit_length=self._bit_length, version=version), seeds))
+                self.assertEqual(expected, pub_list, "The concurrent public key generator is not repeatable!")
+                if version == 1:
+                    self.assertEqual(self.pub_list, pub_list)
+
+    def test_global_random_state(self):
+        """Test if the key derivation leaves the global random generator alone."""
+        state = random.getstate()
+        elgamal.generate_pub_key(seed=self._seed, bit_length=self._bit_length)
+        self.assertEqual(state, random.getstate())
+
+
+class TestPubKeyV2(unittest.TestCase):
+    def setUp(self) -> None:
+        self._seed = 833050814021254693158343911234888353695402778102174580258852673738983005
+        self._pub_length = 20
+
+    def test_safe_prime(self):
+        """Test if the v2 derivation finds safe primes with the requested bit length."""
+        for bit_length in (5, 8, 20, 32, 64, 128, 256):
+            p = elgamal.find_safe_prime(bit_length, self._seed)
+            self.assertEqual(bit_length, p.bit_length())
+            self.assertTrue(elgamal.solovay_strassen(p, 32) and elgamal.solovay_strassen((p - 1) // 2, 32))
+
+    def test_sieve_window(self):
+        """Test if the sieve only removes candidates q where q or 2q + 1 has a small factor."""
+        q_start = 2 ** 40 + 1
+        primes = elgamal.small_primes()
+        flags = elgamal.sieve_window(q_start, 1000, primes)
+        for k, flag in enumerate(flags):
+            q = q_start + 2 * k
+            self.assertEqual(bool(flag), all(q % r and (2 * q + 1) % r for r in primes))
+
+    def test_pub_repeatability(self):
+        """Test if the v2 public key chain is repeatable and differs from the v1 chain."""
+        for bit_length in (32, 64):
+            pub_v1 = elgamal.generate_pub_key(seed=self._seed, bit_length=bit_length)
+            pub_v2 = elgamal.generate_pub_key(seed=self._seed, bit_length=bit_length, version=2)
+            self.assertEqual(pub_v1, elgamal.generate_pub_key(seed=self._seed, bit_length=bit_length, version=1))
+            self.assertNotEqual(pub_v1, pub_v2)
+            chain = [pub_v2]
+            for _ in range(self._pub_length):
+                chain.append(derive_public_key(chain[-1], bit_length, KEY_DERIVATION_V2_VERSION))
+            pub = pub_v2
+            for expected in chain[1:]:
+                pub = elgamal.generate_pub_key(seed=int(pub.p + pub.g + pub.h), bit_length=bit_length, version=2)
+                self.assertEqual(expected, pub, "The v2 public key generator is not repeatable!")
+                self.assertEqual(bit_length, pub.p.bit_length())
+
+    def test_parallel_search(self):
+        """Test if the parallel safe prime search is bit-identical to the sequential search."""
+        with elgamal.ParallelSafePrimeSearch(workers=3, partition_size=16) as search:
+            for bit_length in (5, 12, 32, 128):
+                for seed in range(10):
+                    self.assertEqual(elgamal.find_safe_prime(bit_length, seed),
+                                     elgamal.find_safe_prime(bit_length, seed, search))
+            pub = elgamal.generate_pub_key(seed=self._seed, bit_length=64, version=2)
+            parallel_pub = pub
+            for _ in range(self._pub_length):
+                pub = derive_public_key(pub, 64, KEY_DERIVATION_V2_VERSION)
+                parallel_pub = derive_public_key(parallel_pub, 64, KEY_DERIVATION_V2_VERSION, search)
+                self.assertEqual(pub, parallel_pub)
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            elgamal.generate_pub_key(seed=self._seed, bit_length=32, version=3)
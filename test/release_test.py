@@ -0,0 +1,51 @@
+import unittest
+import dataset
+import crypto.elgamal as elgamal
+from blockchain.release import ReleaseEngine
+from blockchain.transaction import Tx
+
+
+class TestReleaseEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db = dataset.connect('sqlite:///:memory:')
+        self.pub = elgamal.generate_pub_key(seed=0xffffffffffff, bit_length=20)
+        self.private_key = elgamal.find_private_key(self.pub)
+        self.other_pub = elgamal.generate_pub_key(seed=0xffff, bit_length=20)
+        self.messages = [f"released message {i}" for i in range(40)]
+        txs = [Tx.coinbase("miner", 100)]
+        for i, message in enumerate(self.messages):
+            options = [{}, {"compact": True, "binary": True}, {"hybrid": True}][i % 3]
+            txs.append(Tx("alice", "bob", 1, elgamal.encrypt(self.pub, message, **options), 7))
+        # locked to another height and a cipher which cannot be decrypted by the key of the block
+        txs.append(Tx("alice", "bob", 1, elgamal.encrypt(self.other_pub, "not yet", hybrid=True), 8))
+        txs.append(Tx("alice", "carol", 1, elgamal.encrypt(self.other_pub, "other key", hybrid=True), 7))
+        for tx in txs:
+            self.db["transactions"].insert(dict(tx.to_dict(), block_height=5))
+
+    def test_release(self):
+        engine = ReleaseEngine(self.db)
+        self.assertEqual(len(self.messages), engine.release(7, self.private_key))
+        self.assertTrue(self.db["transactions"].has_index(["release_block_idx"]))
+        released = engine.get(7)
+        self.assertEqual(self.messages, [record["message"] for record in released[:-1]])
+        self.assertIsNone(released[-1]["message"])
+        self.assertEqual("carol", released[-1]["addr_to"])
+        self.assertIsNotNone(released[-1]["error"])
+        self.assertEqual([], engine.get(6))
+        # a release of the same height replaces the released messages
+        self.assertEqual(len(self.messages), engine.release(7, self.private_key))
+        self.assertEqual(released, engine.get(7))
+
+    def test_worker_pool(self):
+        with ReleaseEngine(self.db, workers=2, chunk_size=8) as engine:
+            self.assertEqual(len(self.messages), engine.release(7, self.private_key))
+            self.assertEqual(self.messages, [record["message"] for record in engine.get(7)[:-1]])
+
+    def test_empty_database(self):
+        engine = ReleaseEngine(dataset.connect('sqlite:///:memory:'))
+        self.assertEqual(0, engine.release(1, self.private_key))
+        self.assertEqual([], engine.get(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
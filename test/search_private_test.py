@@ -1,4 +1,5 @@
 import crypto.elgamal as elgamal
+from crypto import bsgs
 from crypto.pollard_rho import pollard_rho
 import unittest
 import random
@@ -38,6 +39,26 @@ class TestPrivateSearch(unittest.TestCase):
             self.assertTrue(private_key is not None, "BSGS cannot find the private key!")
             self.assertEqual(private, private_key.x)
 
+    def test_compact_bsgs_private_search(self):
+        """Test BSGS with a compact table, a small baby step budget and parallel giant steps."""
+        for pub, private in zip(self.pub_list, self.private_list):
+            for baby_steps, workers in ((2 ** 20, 1), (2 ** 10, 1), (2 ** 12, 3)):
+                private_key = bsgs.compact_bsgs_search_private_key(pub, baby_steps=baby_steps, workers=workers)
+                self.assertTrue(private_key is not None, "BSGS cannot find the private key!")
+                self.assertEqual(private, private_key.x)
+
+    def test_compact_bsgs_table_reuse(self):
+        """Test if one baby step table can solve every key with the same p and g."""
+        pub = self.pub_list[0]
+        if not bsgs.compact_available(pub.p.bit_length()):
+            self.skipTest("NumPy is not installed")
+        solver = bsgs.BSGSSolver(pub, baby_steps=2 ** 12)
+        self.assertEqual(solver.memory, 12 * 2 ** 12)
+        for x in (0, 1, 2, pub.p - 2, 123456789 % (pub.p - 1)):
+            self.assertEqual(x, solver.solve(pow(pub.g, x, pub.p)))
+        with self.assertRaises(ValueError):
+            solver.search_private_key(self.pub_list[1])
+
     def test_pollard_rho_search(self):
         """Test pollard rho algorithm to search private key."""
         for pub, private in zip(self.pub_list, self.private_list):
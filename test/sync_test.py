@@ -0,0 +1,107 @@
+import time
+import unittest
+from binascii import hexlify
+import requests
+import crypto.elgamal as elgamal
+from blockchain.block import Block, derive_public_key
+from blockchain.sync import ChainSync, parse_peers, fork_index
+from blockchain.transaction import Tx
+from blockchain.validator import block_hash
+from mining.pollard_rho_hash import PRMiner
+
+
+def mine_chain(chain: list[Block], length: int, miner_address: str) -> list[Block]:
+    """Mine blocks on top of a chain."""
+    chain = list(chain)
+    for _ in range(length):
+        prev_block = chain[-1]
+        block = Block(prev_block.height + 1, time.time(), [Tx.coinbase(miner_address, 100)],
+                      derive_public_key(prev_block.public_key, 24, 1), prev_block_hash=block_hash(prev_block))
+        nonce, solution = PRMiner(block, 600).mining()
+        block.seal(solution)
+        chain.append(block)
+    return chain
+
+
+def block_json(block: Block, with_txs: bool) -> dict:
+    """The json record of a block served by the /blocks or /headers endpoint."""
+    record = block.get_db_record(tx_ids=list(range(len(block.transactions))))
+    for field in ("prev_block_hash", "header_hash"):
+        if record[field]:
+            record[field] = hexlify(record[field]).decode('ascii')
+    if with_txs:
+        record["transactions"] = [tx.to_dict() for tx in block.transactions]
+    return record
+
+
+class FakePeerSync(ChainSync):
+    """Chain sync which serves the requests from the chains of fake peers."""
+    def __init__(self, chains: dict[str, list[Block]], **kwargs):
+        super().__init__(list(chains), **kwargs)
+        self.chains = chains
+        self.requests = []
+
+    def _get(self, peer: str, path: str, params: dict = None):
+        self.requests.append((peer, path, params))
+        chain = self.chains[peer]
+        if chain is None:
+            raise requests.ConnectionError(f"{peer} is down")
+        if path == "/last":
+            return block_json(chain[-1], False)
+        return [block_json(block, path == "/blocks") for block in chain[params["start"]:params["end"]]]
+
+
+class TestChainSync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 24))
+        genesis.current_block_hash = genesis.hash_header()
+        cls.common = mine_chain([genesis], 8, "common")
+        cls.local = mine_chain(cls.common[:5], 3, "local")
+        cls.peer = mine_chain(cls.common[:5], 6, "peer")
+
+    def test_missing_blocks(self):
+        """Only the blocks above the local tip are fetched from a peer which extends the local chain."""
+        with FakePeerSync({"peer": self.common}, batch=2) as chain_sync:
+            new_chain = chain_sync.sync(self.common[:5])
+            self.assertEqual([block_hash(block) for block in self.common],
+                             [block_hash(block) for block in new_chain])
+            self.assertEqual(5, fork_index(self.common[:5], new_chain))
+            fetched = [params for _, path, params in chain_sync.requests if path != "/last"]
+            self.assertEqual(min(params["start"] for params in fetched), 5)
+            self.assertEqual("common", new_chain[-1].transactions[0].addr_to)
+
+    def test_fork(self):
+        """The headers are fetched backwards from the local tip until the fork point is found."""
+        with FakePeerSync({"peer": self.peer}, batch=4) as chain_sync:
+            new_chain = chain_sync.sync(self.local)
+            self.assertEqual(5, fork_index(self.local, new_chain))
+            self.assertEqual([block_hash(block) for block in self.peer],
+                             [block_hash(block) for block in new_chain])
+            bodies = [params for _, path, params in chain_sync.requests if path == "/blocks"]
+            self.assertEqual(5, min(params["start"] for params in bodies))
+
+    def test_invalid_peer(self):
+        """A peer chain with an invalid header is rejected before its bodies are fetched."""
+        forged = list(self.peer)
+        block = forged[7]
+        forged_block = Block(block.height, block.timestamp, block.transactions, block.public_key, nonce=block.nonce + 1,
+                             solution=block.solution, prev_block_hash=block.prev_block_hash)
+        forged_block.current_block_hash = block.current_block_hash
+        forged[7] = forged_block
+        with FakePeerSync({"down": None, "short": self.common[:3], "forged": forged}) as chain_sync:
+            self.assertEqual({"short": 2, "forged": 10}, chain_sync.poll())
+            self.assertIsNone(chain_sync.sync(self.local))
+            self.assertFalse(any(path == "/blocks" for _, path, _ in chain_sync.requests))
+        with FakePeerSync({"forged": forged, "peer": self.peer}) as chain_sync:
+            self.assertEqual(len(self.peer), len(chain_sync.sync(self.local)))
+
+    def test_parse_peers(self):
+        self.assertEqual([], parse_peers(None))
+        self.assertEqual([], parse_peers("[]"))
+        self.assertEqual(["http://a:80", "http://b:80"], parse_peers('["http://a:80", "http://b:80"]'))
+        self.assertEqual(["http://a:80", "http://b:80"], parse_peers("http://a:80, http://b:80"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import pickle
+import time
+import unittest
+from unittest import mock
+import crypto.elgamal as elgamal
+import blockchain.validator as validator
+from blockchain.block import Block
+from blockchain.transaction import Tx
+from blockchain.validator import ChainValidator, block_hash, validate_block
+from mining.pollard_rho_hash import PRMiner
+from sync_test import mine_chain
+
+
+def mine_block(prev_block: Block, public_key: elgamal.PublicKey) -> Block:
+    """Mine a block with the given public key on top of a block."""
+    block = Block(prev_block.height + 1, time.time(), [Tx.coinbase("forger", 100)], public_key,
+                  prev_block_hash=block_hash(prev_block))
+    nonce, solution = PRMiner(block, 600).mining()
+    block.seal(solution)
+    return block
+
+
+class TestChainValidator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        genesis = Block(0, time.time(), [], elgamal.generate_pub_key(0xffffffffffff, 24))
+        genesis.current_block_hash = genesis.hash_header()
+        cls.chain = mine_chain([genesis], 9, "miner")
+        # a block which is linked and solved, but its public key is not derived from the previous key
+        forged_block = mine_block(cls.chain[5], elgamal.generate_pub_key(12345, 24))
+        cls.forged = mine_chain(cls.chain[:6] + [forged_block], 2, "forger")
+
+    def test_validate_block(self):
+        self.assertTrue(validate_block(self.chain[4], self.chain[5]))
+        self.assertFalse(validate_block(self.chain[5], self.forged[6]))
+        self.assertFalse(validate_block(self.chain[4], self.chain[6]))
+
+    def test_checkpoints(self):
+        """Only the blocks above the verified tip are validated again."""
+        with mock.patch.object(validator, "validate_block", wraps=validate_block) as checked:
+            chain_validator = ChainValidator(chunk_size=4)
+            self.assertEqual(0, chain_validator.verified_height(self.chain))
+            self.assertTrue(chain_validator.validate(self.chain[:7]))
+            self.assertEqual(6, checked.call_count)
+            self.assertEqual(6, chain_validator.verified_height(self.chain))
+            self.assertTrue(chain_validator.validate(self.chain))
+            self.assertEqual(9, checked.call_count)
+            self.assertTrue(chain_validator.validate(self.chain))
+            self.assertEqual(9, checked.call_count)
+            # the fork is validated above the highest checkpoint of the blocks it shares with the chain
+            self.assertEqual(4, chain_validator.verified_height(self.forged))
+            self.assertFalse(chain_validator.validate(self.forged))
+            self.assertEqual(11, checked.call_count)
+
+    def test_max_checkpoints(self):
+        chain_validator = ChainValidator(chunk_size=1, max_checkpoints=3)
+        self.assertTrue(chain_validator.validate(self.chain))
+        self.assertEqual([7, 8, 9], list(chain_validator.checkpoints.values()))
+        self.assertEqual(0, chain_validator.verified_height(self.chain[:7]))
+
+    def test_worker_pool(self):
+        with ChainValidator(workers=2, chunk_size=2) as chain_validator:
+            self.assertTrue(chain_validator.validate(self.chain))
+            self.assertEqual(9, chain_validator.verified_height(self.chain))
+            self.assertFalse(chain_validator.validate(self.forged))
+            self.assertEqual(4, chain_validator.verified_height(self.forged))
+
+    def test_pickle(self):
+        block = pickle.loads(pickle.dumps(self.chain[3]))
+        self.assertEqual(block_hash(self.chain[3]), block_hash(block))
+        self.assertTrue(validate_block(self.chain[2], block))
+        candidate = Block(10, time.time(), [], self.chain[9].public_key, version=3)
+        candidate.hash_with_nonce(1)
+        self.assertEqual(candidate.hash_header(), pickle.loads(pickle.dumps(candidate)).hash_header())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,8 +23,10 @@ import requests
 import crypto.elgamal as elgamal
 from os import environ
 from blockchain.block import Block
+from blockchain.key_schedule import pub_key_record, derive_from_checkpoint
 from crypto.tx_sign import generate_ecdsa_keys, sign_ecdsa_data
 from miner import BLOCK_TIME
+from miner_config import KEYGEN_WORKERS
 from dotenv import load_dotenv
 from typing import Optional
 
@@ -76,6 +78,33 @@ def wallet():
             check_logs()
 
 
+def get_future_pub_key(last_block: Block, height: int) -> elgamal.PublicKey:
+    """Get the public key of a future block.
+
+    The derivation starts from the nearest key scheduled by the node below the height, or from the last block if the
+    node has not scheduled any key yet, assuming the future blocks keep the version of the last block.
+
+    Args:
+        last_block: the last block of the chain
+        height: height of the future block
+
+    Returns:
+        public key of the future block
+    """
+    res = requests.get(MINER_NODE_URL + '/pubkeys', params={"from": height})
+    scheduled = res.json() if res.ok else []
+    if scheduled and last_block.height <= scheduled[0]["height"] <= height:
+        checkpoint = scheduled[0]
+    else:
+        checkpoint = pub_key_record(last_block.height, last_block.public_key, last_block.version)
+    search = elgamal.ParallelSafePrimeSearch(KEYGEN_WORKERS) if KEYGEN_WORKERS > 1 else None
+    try:
+        return derive_from_checkpoint(checkpoint, height, search)
+    finally:
+        if search:
+            search.close()
+
+
 def send_transaction(addr_from, private_key, addr_to, amount, msg=None, lock_time=0):
     """
     Sends your transaction to different nodes. Once any of the nodes manage
@@ -118,14 +147,11 @@ def send_transaction(addr_from, private_key, addr_to, amount, msg=None, lock_tim
                 last_block = Block.from_db(block_data)
                 # after a number of block, the encrypted message will be released
                 block_interval = lock_time//BLOCK_TIME
-                future_pub_key = last_block.public_key
-                # derive future public key
-                for _ in range(block_interval):
-                    future_pub_key = elgamal.generate_pub_key(seed=int(future_pub_key.p + future_pub_key.g + future_pub_key.h),
-                                                              bit_length=future_pub_key.bit_length)
+                release_height = last_block.height + block_interval
+                future_pub_key = get_future_pub_key(last_block, release_height)
                 # encrypt time release message
-                cipher = elgamal.encrypt(future_pub_key, msg)
-                data['release_block_idx'] = last_block.height + block_interval
+                cipher = elgamal.encrypt(future_pub_key, msg, hybrid=True)
+                data['release_block_idx'] = release_height
                 data['cipher'] = cipher
         res = requests.post(url, json=data, headers=headers)
         print(res.text)